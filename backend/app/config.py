@@ -1,6 +1,11 @@
 # backend/app/config.py
 import psycopg2
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
@@ -9,6 +14,14 @@ DB_NAME = os.getenv("DB_NAME", "geo_ads")
 DB_USER = os.getenv("DB_USER", "geo_ads_user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "geo_ads_password")
 
+# Connection pool (βλ. DBPool παρακάτω)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))  # sec αναμονής για checkout
+# Αν μια idle σύνδεση δεν έχει χρησιμοποιηθεί για τόσα sec, κάνουμε "SELECT 1" πριν τη δώσουμε.
+DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30.0"))
+
+
 def get_db_connection():
     conn = psycopg2.connect(
         host=DB_HOST,
@@ -18,3 +31,266 @@ def get_db_connection():
         password=DB_PASSWORD,
     )
     return conn
+
+
+# ------------------------------------------
+#  CONNECTION POOL
+# ------------------------------------------
+
+
+class DBPoolTimeout(Exception):
+    """Δεν βρέθηκε ελεύθερη σύνδεση μέσα στο DB_POOL_TIMEOUT."""
+
+
+class DBPool:
+    """
+    Thread-safe pool από psycopg2 συνδέσεις.
+
+    - min_size: πόσες συνδέσεις ανοίγουμε στην εκκίνηση (best effort,
+      αν η βάση είναι down το backend ξεκινάει κανονικά).
+    - max_size: πάνω όριο ταυτόχρονων συνδέσεων. Όταν γεμίσει,
+      ο επόμενος περιμένει μέχρι timeout.
+    - health check στο checkout: κλειστές συνδέσεις πετιούνται,
+      και όσες έμειναν πολύ ώρα idle ελέγχονται με "SELECT 1".
+    """
+
+    def __init__(
+        self,
+        min_size: int = DB_POOL_MIN,
+        max_size: int = DB_POOL_MAX,
+        timeout: float = DB_POOL_TIMEOUT,
+        healthcheck_idle: float = DB_POOL_HEALTHCHECK_IDLE,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("DB pool max_size must be >= 1")
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+
+        self._cond = threading.Condition()
+        # idle συνδέσεις: (conn, last_used_monotonic)
+        self._idle: deque = deque()
+        self._size = 0          # ανοιχτές συνδέσεις (idle + in use)
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_total_ms = 0.0
+        self._checkout_max_ms = 0.0
+
+    # -----------------------------
+    #  LIFECYCLE
+    # -----------------------------
+
+    def open(self) -> None:
+        """Προ-γεμίζει το pool μέχρι min_size (αγνοεί αποτυχίες σύνδεσης)."""
+        for _ in range(self.min_size):
+            try:
+                conn = get_db_connection()
+            except psycopg2.Error as e:
+                print(f"[DB] pool prefill failed: {e}")
+                return
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    # -----------------------------
+    #  CHECKOUT / CHECKIN
+    # -----------------------------
+
+    def getconn(self):
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            conn = None
+            last_used = 0.0
+            must_connect = False
+
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("DB pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise DBPoolTimeout(
+                            f"No DB connection available within {self.timeout}s"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    must_connect = True
+                    self._size += 1
+                self._in_use += 1
+
+            # Δικτυακή δουλειά ΕΚΤΟΣ lock
+            if must_connect:
+                try:
+                    conn = get_db_connection()
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                self._release_slot(discarded=True)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with self._cond:
+                self._checkouts += 1
+                self._checkout_total_ms += elapsed_ms
+                self._checkout_max_ms = max(self._checkout_max_ms, elapsed_ms)
+            return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        if not discard and not conn.closed:
+            try:
+                # Καθαρό state για τον επόμενο (π.χ. ανοιχτό transaction μετά από SELECT)
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        else:
+            discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if discard or self._closed:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, discard=broken)
+
+    # -----------------------------
+    #  METRICS
+    # -----------------------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            avg = self._checkout_total_ms / self._checkouts if self._checkouts else 0.0
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "checkout_avg_ms": round(avg, 3),
+                "checkout_max_ms": round(self._checkout_max_ms, 3),
+            }
+
+    # -----------------------------
+    #  HELPERS
+    # -----------------------------
+
+    def _release_slot(self, discarded: bool = False) -> None:
+        with self._cond:
+            if discarded:
+                self._discarded += 1
+            self._in_use -= 1
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.healthcheck_idle:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# SINGLETON (ένα pool ανά process, το διαχειρίζεται το lifespan του FastAPI)
+_POOL: Optional[DBPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def init_db_pool() -> DBPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = DBPool()
+            _POOL.open()
+        return _POOL
+
+
+def close_db_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def get_db_pool() -> DBPool:
+    """
+    Επιστρέφει το shared pool.
+    Αν κληθεί εκτός lifespan (π.χ. script), το δημιουργεί lazy.
+    """
+    if _POOL is None:
+        return init_db_pool()
+    return _POOL
+
+
+def db_connection():
+    """
+    Context manager για pooled σύνδεση:
+
+        with db_connection() as conn:
+            cur = conn.cursor()
+            ...
+    """
+    return get_db_pool().connection()
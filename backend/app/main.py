@@ -1,28 +1,106 @@
 # backend/app/main.py
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.routing import WebSocketRoute
 
+# DB connection pool
+from app.config import init_db_pool, close_db_pool, get_db_pool
+
+# Security (anti-replay, keyring, signed WS mode)
+from app.security.replay_guard import get_replay_guard
+from app.security.keyring import get_keyring
+from app.websockets.signing import WS_SIGNED_MODE, init_ws_signing
+
 # Διαφημίσεις
 from app.services.advertisement_service import AdvertisementService
+from app.services.ad_change_listener import ad_change_listener
+from app.services.ad_cache import ad_cache
 from app.models.advertisement import Advertisement
 
 # Layout γηπέδου (ζώνες + screens + index)
-from app.services.layout_service import LayoutService, get_screen_index
-from app.models.layout_models import Zone, Screen, MultiIndexKey, ScreenRecommendation
+from app.services.layout_service import get_layout_snapshot, get_screen_index, layout_store
+from app.models.layout_models import (
+    Zone,
+    Screen,
+    MultiIndexKey,
+    ScreenRecommendation,
+    RecommendationRequest,
+    BatchRecommendationResult,
+)
+
+# Pagination / NDJSON streaming
+from app.services.streaming import (
+    NDJSON_MEDIA_TYPE,
+    NEXT_CURSOR_HEADER,
+    PAGE_LIMIT_DEFAULT,
+    PAGE_LIMIT_MAX,
+    STREAM_BATCH_SIZE,
+    ndjson_chunks,
+)
+
+# Batch recommendations
+from app.services.recommendation_service import (
+    RecommendationService,
+    RECOMMENDATION_ASSIGN_CHUNK,
+    RECOMMENDATION_BATCH_MAX,
+)
 
 # WebSockets (router + manager)
-from app.websockets.websockets import router as websocket_router, ws_manager
+from app.websockets.websockets import (
+    router as websocket_router,
+    ws_manager,
+    ads_feed,
+    publish_placement_assigned,
+)
+from app.websockets.bus import event_bus
 
 # Placements
-from app.models.placement_models import AdPlacement
+from app.models.placement_models import AdPlacement, BatchPlacementResult
 from app.services.placement_service import PlacementService
-
-app = FastAPI(title="Geo-Ads Backend")
+from app.services.occupancy import screen_occupancy
+from app.services.placement_persistence import PlacementWriteBehind, placement_writer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Signed WS mode (opt-in): keyring + κλειδί του backend, πριν δεχτούμε clients
+    init_ws_signing()
+    # Startup: ανοίγουμε το pool μία φορά για όλο το process
+    init_db_pool()
+    # Layout + index χτίζονται εδώ μία φορά (όχι στο πρώτο request)·
+    # μετά ο watcher τα ξαναχτίζει μόνο όταν αλλάξει το LAYOUT_FILE
+    layout_store.current()
+    await layout_store.start()
+    # Warm-load: η τελευταία ανάθεση ανά οθόνη, ώστε το πρώτο snapshot να είναι σωστό
+    try:
+        PlacementService.warm_load(await asyncio.to_thread(PlacementWriteBehind.load_active))
+    except Exception as e:
+        print(f"[DB] placements warm-load FAILED: {e}")
+    await placement_writer.start()
+    # LISTEN advertisements_changed -> άμεσο refresh του /ws/ads
+    await ad_change_listener.start()
+    # Event bus: placements/ads events από τους υπόλοιπους workers
+    await event_bus.start()
+    yield
+    # Shutdown: σταματάμε listener + κοινό ads feed, flush των placements
+    # και κλείνουμε τις idle συνδέσεις
+    await layout_store.stop()
+    await event_bus.stop()
+    await ad_change_listener.stop()
+    await ads_feed.stop()
+    await placement_writer.stop()
+    close_db_pool()
+
+
+app = FastAPI(title="Geo-Ads Backend", lifespan=lifespan)
 
 
 @app.api_route("/health", methods=["GET", "HEAD"])
@@ -40,6 +118,48 @@ def debug_ws_routes():
     ]
 
 
+@app.get("/debug/db_pool")
+def debug_db_pool():
+    return get_db_pool().stats()
+
+
+@app.get("/debug/ws")
+def debug_ws():
+    return {
+        "placements": ws_manager.stats(),
+        "ads_clients": len(ads_feed.clients),
+        "bus": event_bus.stats(),
+    }
+
+
+@app.get("/debug/placements")
+def debug_placements():
+    return {
+        "store": PlacementService.stats(),
+        "writer": placement_writer.stats(),
+        "occupancy": screen_occupancy.stats(),
+    }
+
+
+@app.get("/debug/ad_cache")
+def debug_ad_cache():
+    return ad_cache.stats()
+
+
+@app.get("/debug/layout")
+def debug_layout():
+    return layout_store.stats()
+
+
+@app.get("/debug/security")
+def debug_security():
+    return {
+        "ws_signed_mode": WS_SIGNED_MODE,
+        "keyring": get_keyring().stats(),
+        "replay_guard": get_replay_guard().stats(),
+    }
+
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(os.path.dirname(BASE_DIR), "static")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -51,6 +171,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # Register WS routes
@@ -66,8 +187,28 @@ def root():
 #  ΔΙΑΦΗΜΙΣΕΙΣ (HTTP API)
 # -----------------------------
 @app.get("/advertisements", response_model=list[Advertisement])
-def list_advertisements():
-    return AdvertisementService.get_all()
+def list_advertisements(
+    response: Response,
+    after_id: int | None = Query(None, ge=0, description="keyset cursor: id > after_id"),
+    limit: int | None = Query(None, ge=1, le=PAGE_LIMIT_MAX),
+    format: Literal["json", "ndjson"] = Query("json"),
+):
+    # NDJSON: όλος ο πίνακας (από after_id) με server-side cursor, σε chunks
+    if format == "ndjson":
+        return StreamingResponse(
+            ndjson_chunks(AdvertisementService.iter_batches(after_id or 0)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    # Χωρίς after_id/limit: η παλιά συμπεριφορά (όλη η λίστα)
+    if after_id is None and limit is None:
+        return ad_cache.get_all()
+
+    limit = limit or PAGE_LIMIT_DEFAULT
+    ads = AdvertisementService.get_page(after_id or 0, limit)
+    if len(ads) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(ads[-1].id)
+    return ads
 
 
 @app.get("/advertisements/zone/{zone_id}", response_model=list[Advertisement])
@@ -78,9 +219,36 @@ def list_advertisements_by_zone(zone_id: str):
 # -----------------------------
 #  LAYOUT ΓΗΠΕΔΟΥ
 # -----------------------------
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match: "*" ή λίστα από (weak ή strong) ETags
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
 @app.get("/layout", response_model=list[Zone])
-def get_layout():
-    return LayoutService.get_layout()
+def get_layout(request: Request):
+    # Έτοιμο body από το layout snapshot: καμία κατασκευή/validation ανά request
+    snapshot = get_layout_snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@app.post("/layout/reload")
+def reload_layout():
+    # Sync endpoint -> τρέχει σε threadpool, το build δεν μπλοκάρει το event loop
+    try:
+        layout_store.reload()
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=422, detail=f"Layout reload failed: {e}")
+    return layout_store.stats()
 
 
 @app.get("/layout/zones/{zone_id}/screens", response_model=list[Screen])
@@ -104,9 +272,57 @@ def query_screens_near(
     y: float = Query(..., description="Grid Y (row)"),
     radius: float = Query(1.5, description="Μέγιστη απόσταση στο grid"),
     zone_id: str | None = Query(None, description="Φίλτρο ζώνης"),
+    screen_type: str | None = Query(None, description="Φίλτρο τύπου οθόνης"),
+    ad_category: str | None = Query(None, description="Μόνο οθόνες που δέχονται την κατηγορία"),
+    time_window: str | None = Query(None, description="Μόνο οθόνες ενεργές στο χρονικό παράθυρο"),
+):
+    index = get_screen_index()
+    return index.query_near(
+        x,
+        y,
+        radius,
+        zone_id,
+        screen_type=screen_type,
+        ad_category=ad_category,
+        time_window=time_window,
+    )
+
+
+@app.get("/layout/query/nearest", response_model=list[ScreenRecommendation])
+def query_screens_nearest(
+    x: float = Query(..., description="Grid X (col)"),
+    y: float = Query(..., description="Grid Y (row)"),
+    k: int = Query(1, ge=1, le=1000, description="Πόσα κοντινότερα screens"),
+    max_distance: float = Query(10.0, description="Μέγιστη απόσταση στο grid"),
+    zone_id: str | None = Query(None, description="Φίλτρο ζώνης"),
+    screen_type: str | None = Query(None, description="Φίλτρο τύπου οθόνης"),
+    ad_category: str | None = Query(None, description="Μόνο οθόνες που δέχονται την κατηγορία"),
+    time_window: str | None = Query(None, description="Μόνο οθόνες ενεργές στο χρονικό παράθυρο"),
 ):
     index = get_screen_index()
-    return index.query_near(x, y, radius, zone_id)
+    found = index.nearest(
+        x=x,
+        y=y,
+        k=k,
+        zone_id=zone_id,
+        screen_type=screen_type,
+        max_distance=max_distance,
+        ad_category=ad_category,
+        time_window=time_window,
+    )
+    return [
+        ScreenRecommendation(
+            screen_id=screen.id,
+            zone_id=screen.zone_id,
+            x=float(screen.col),
+            y=float(screen.row),
+            screen_type=screen.screen_type,
+            ad_category=ad_category,
+            time_window=time_window,
+            distance=distance,
+        )
+        for screen, distance in found
+    ]
 
 
 @app.get("/layout/multiindex", response_model=list[MultiIndexKey])
@@ -127,6 +343,7 @@ def recommend_screen_endpoint(
     screen_type: str | None = Query(None),
     ad_category: str | None = Query(None),
     time_window: str | None = Query(None),
+    occupancy: Literal["skip", "penalize", "off"] | None = Query(None, description="Default: OCCUPANCY_POLICY"),
 ):
     index = get_screen_index()
     result = index.recommend_screen(
@@ -137,6 +354,7 @@ def recommend_screen_endpoint(
         screen_type=screen_type,
         ad_category=ad_category,
         time_window=time_window,
+        occupancy=occupancy,
     )
     if result is None:
         raise HTTPException(status_code=404, detail="No suitable screen found")
@@ -163,8 +381,9 @@ def recommend_screen_for_ad(
     screen_type: str | None = Query(None),
     ad_category: str | None = Query(None),
     time_window: str | None = Query(None),
+    occupancy: Literal["skip", "penalize", "off"] | None = Query(None, description="Default: OCCUPANCY_POLICY"),
 ):
-    ad = AdvertisementService.get_by_id(ad_id)
+    ad = ad_cache.get(ad_id)
     if ad is None:
         raise HTTPException(status_code=404, detail="Advertisement not found")
 
@@ -177,6 +396,7 @@ def recommend_screen_for_ad(
         screen_type=screen_type,
         ad_category=ad_category,
         time_window=time_window,
+        occupancy=occupancy,
     )
     if result is None:
         raise HTTPException(status_code=404, detail="No suitable screen found")
@@ -194,12 +414,77 @@ def recommend_screen_for_ad(
     )
 
 
+@app.post("/recommendation/batch", response_model=list[BatchRecommendationResult])
+def recommend_screens_batch(items: list[RecommendationRequest]):
+    if len(items) > RECOMMENDATION_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {RECOMMENDATION_BATCH_MAX} items)",
+        )
+
+    results = RecommendationService.recommend_batch(items)
+    return [
+        BatchRecommendationResult(error=result)
+        if isinstance(result, str)
+        else BatchRecommendationResult(recommendation=ScreenRecommendation.from_key(*result))
+        for result in results
+    ]
+
+
 # -----------------------------
 #  PLACEMENTS
 # -----------------------------
+def _as_naive_utc(ts: datetime | None) -> datetime | None:
+    # Τα assigned_at είναι naive UTC (datetime.utcnow)
+    if ts is not None and ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _placement_batches(after: int, since: datetime | None, until: datetime | None):
+    # Σελίδες του store, ώστε να μην αντιγράφεται όλο το log σε μία λίστα
+    while True:
+        batch, after = PlacementService.list_page(after, STREAM_BATCH_SIZE, since, until)
+        if not batch:
+            return
+        yield batch
+
+
 @app.get("/placements", response_model=list[AdPlacement])
-def list_placements():
-    return PlacementService.list_all()
+def list_placements(
+    response: Response,
+    since: datetime | None = Query(None, description="assigned_at >= since"),
+    until: datetime | None = Query(None, description="assigned_at < until"),
+    after_id: int | None = Query(None, ge=0, description="keyset cursor: θέση στο log > after_id"),
+    limit: int | None = Query(None, ge=1, le=PAGE_LIMIT_MAX),
+    format: Literal["json", "ndjson"] = Query("json"),
+):
+    since, until = _as_naive_utc(since), _as_naive_utc(until)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            ndjson_chunks(
+                _placement_batches(after_id or 0, since, until),
+                lambda placement: placement.model_dump_json(),
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    if after_id is not None or limit is not None:
+        limit = limit or PAGE_LIMIT_DEFAULT
+        placements, cursor = PlacementService.list_page(after_id or 0, limit, since, until)
+        if len(placements) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = str(cursor)
+        return placements
+
+    if since is None and until is None:
+        return PlacementService.list_all()
+    return PlacementService.list_between(since or datetime.min, until)
+
+
+@app.get("/placements/active", response_model=list[AdPlacement])
+def list_active_placements():
+    return PlacementService.list_active()
 
 
 @app.get("/placements/screen/{screen_id}", response_model=list[AdPlacement])
@@ -207,6 +492,16 @@ def list_placements_by_screen(screen_id: str):
     return PlacementService.list_by_screen(screen_id)
 
 
+@app.get("/placements/zone/{zone_id}", response_model=list[AdPlacement])
+def list_placements_by_zone(zone_id: str):
+    return PlacementService.list_by_zone(zone_id)
+
+
+@app.get("/placements/ad/{ad_id}", response_model=list[AdPlacement])
+def list_placements_by_ad(ad_id: int):
+    return PlacementService.list_by_ad(ad_id)
+
+
 @app.post("/placements/recommend_and_assign/advertisements/{ad_id}", response_model=AdPlacement)
 async def recommend_and_assign_ad_for_screen(
     ad_id: int,
@@ -216,8 +511,10 @@ async def recommend_and_assign_ad_for_screen(
     screen_type: str | None = Query(None),
     ad_category: str | None = Query(None),
     time_window: str | None = Query(None),
+    occupancy: Literal["skip", "penalize", "off"] | None = Query(None, description="Default: OCCUPANCY_POLICY"),
 ):
-    ad = AdvertisementService.get_by_id(ad_id)
+    # Σε miss η ad cache πάει στη βάση: εκτός event loop
+    ad = await asyncio.to_thread(ad_cache.get, ad_id)
     if ad is None:
         raise HTTPException(status_code=404, detail="Advertisement not found")
 
@@ -230,6 +527,7 @@ async def recommend_and_assign_ad_for_screen(
         screen_type=screen_type,
         ad_category=ad_category,
         time_window=time_window,
+        occupancy=occupancy,
     )
     if result is None:
         raise HTTPException(status_code=404, detail="No suitable screen found")
@@ -238,7 +536,44 @@ async def recommend_and_assign_ad_for_screen(
 
     placement = PlacementService.assign_ad(ad_id=ad.id, key=key)
 
-    # WS broadcast σε όλους τους connected /ws/placements clients
-    await ws_manager.broadcast_placement_assigned(placement)
+    # WS broadcast σε όλους τους connected /ws/placements clients, και στους
+    # υπόλοιπους workers μέσω event bus (μόνο enqueue, χωρίς network I/O εδώ)
+    publish_placement_assigned(placement)
 
     return placement
+
+
+@app.post("/placements/recommend_and_assign/batch", response_model=list[BatchPlacementResult])
+async def recommend_and_assign_batch(items: list[RecommendationRequest]):
+    if len(items) > RECOMMENDATION_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {RECOMMENDATION_BATCH_MAX} items)",
+        )
+    if any(item.ad_id is None for item in items):
+        raise HTTPException(status_code=422, detail="Every item needs an ad_id")
+
+    # Ένα DB query για όλες τις διαφημίσεις (τα misses της cache), εκτός event loop
+    ads = await asyncio.to_thread(ad_cache.get_many, [item.ad_id for item in items])
+
+    # recommend/assign ανά στοιχείο (με το occupancy των προηγούμενων) ΣΤΟ
+    # event loop, όπως το single endpoint: το assign γράφει store, φορτίο
+    # του index και write-behind. Ανά chunk δίνουμε τη σειρά στα άλλα tasks.
+    results: list = []
+    for start in range(0, len(items), RECOMMENDATION_ASSIGN_CHUNK):
+        if start:
+            await asyncio.sleep(0)
+        chunk = items[start:start + RECOMMENDATION_ASSIGN_CHUNK]
+        results.extend(RecommendationService.recommend_and_assign_batch(chunk, ads))
+
+    out: list[BatchPlacementResult] = []
+    for result in results:
+        if isinstance(result, str):
+            out.append(BatchPlacementResult(error=result))
+            continue
+
+        # WS broadcast + event bus από το event loop
+        publish_placement_assigned(result)
+        out.append(BatchPlacementResult(placement=result))
+
+    return out
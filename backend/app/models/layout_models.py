@@ -1,6 +1,6 @@
 # backend/app/models/layout_models.py
 
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from pydantic import BaseModel
 
 
@@ -22,6 +22,12 @@ class Screen(BaseModel):
     # Ελεύθερο μεταδεδομένο για μελλοντική χρήση
     metadata: Dict[str, Any] = {}
 
+    # Κατηγορίες διαφημίσεων που δέχεται η οθόνη (π.χ. ["tech", "sports"]· κενό = όλες)
+    ad_categories: List[str] = []
+
+    # Χρονικά παράθυρα που είναι διαθέσιμη (π.χ. ["halftime"]· κενό = πάντα)
+    time_windows: List[str] = []
+
 
 class Zone(BaseModel):
     """
@@ -97,3 +103,42 @@ class ScreenRecommendation(BaseModel):
     ad_category: Optional[str] = None
     time_window: Optional[str] = None
     distance: float
+
+    @classmethod
+    def from_key(cls, key: MultiIndexKey, distance: float) -> "ScreenRecommendation":
+        return cls(
+            screen_id=key.screen_id,
+            zone_id=key.zone_id,
+            x=key.x,
+            y=key.y,
+            screen_type=key.screen_type,
+            ad_category=key.ad_category,
+            time_window=key.time_window,
+            distance=distance,
+        )
+
+
+class RecommendationRequest(BaseModel):
+    """
+    Ένα στοιχείο batch recommendation.
+
+    - Με ad_id: η ζώνη βγαίνει από τη διαφήμιση (όπως στο
+      /recommendation/advertisements/{ad_id}/screen).
+    - Χωρίς ad_id: χρησιμοποιείται το (προαιρετικό) zone_id.
+    """
+    ad_id: Optional[int] = None
+    x: float
+    y: float
+    radius: float = 10.0
+    zone_id: Optional[str] = None
+    screen_type: Optional[str] = None
+    ad_category: Optional[str] = None
+    time_window: Optional[str] = None
+    # skip | penalize | off (None = OCCUPANCY_POLICY του server)
+    occupancy: Optional[Literal["skip", "penalize", "off"]] = None
+
+
+class BatchRecommendationResult(BaseModel):
+    """Αποτέλεσμα ανά στοιχείο (ίδια σειρά με το request): ή recommendation ή error."""
+    recommendation: Optional[ScreenRecommendation] = None
+    error: Optional[str] = None
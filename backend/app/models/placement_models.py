@@ -1,6 +1,7 @@
 # backend/app/models/placement_models.py
 
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -25,3 +26,10 @@ class AdPlacement(BaseModel):
     time_window: str | None = None
 
     assigned_at: datetime
+
+
+class BatchPlacementResult(BaseModel):
+    """Αποτέλεσμα batch recommend_and_assign ανά στοιχείο: ή placement ή error."""
+
+    placement: Optional[AdPlacement] = None
+    error: Optional[str] = None
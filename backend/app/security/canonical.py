@@ -0,0 +1,127 @@
+# backend/app/security/canonical.py
+
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: χωρίς orjson μένουμε στο json της stdlib
+    orjson = None
+
+
+def _canonical_default(obj: Any) -> Any:
+    """
+    Τύποι που δεν είναι JSON-native:
+    - datetime/date -> isoformat() (π.χ. "2025-01-01T10:00:00+00:00")
+    - Enum -> value
+    """
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonCanonicalEncoder:
+    """
+    Το canonical format αναφοράς: json.dumps με sorted keys,
+    χωρίς κενά, χωρίς ASCII escaping, σε UTF-8 bytes.
+    """
+
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(
+            obj,
+            sort_keys=True,          # σταθερή σειρά κλειδιών
+            separators=(",", ":"),   # χωρίς περιττά spaces
+            ensure_ascii=False,
+            default=_canonical_default,
+        ).encode("utf-8")
+
+
+# Εκτός [1e-4, 1e16) το json γράφει floats με εκθέτη ("1e+16", "1e-05"),
+# ενώ το orjson όχι ("1e16", "0.00001")
+_FLOAT_PLAIN_MIN = 1e-4
+_FLOAT_PLAIN_MAX = 1e16
+_INT64_MIN = -(2 ** 63)
+_UINT64_MAX = 2 ** 64 - 1
+
+
+_SAFE_SCALARS = frozenset((str, bool, type(None)))
+
+
+def _orjson_safe(obj: Any) -> bool:
+    """
+    True αν το orjson βγάζει ΑΚΡΙΒΩΣ τα ίδια bytes με το json για το obj.
+    Διαφέρουν μόνο σε: floats με εκθέτη, NaN/Infinity, ints εκτός 64-bit,
+    υποκλάσεις float/int και μη-string keys· σε αυτά πέφτουμε στο json.
+    (type() αντί για isinstance: ο έλεγχος τρέχει σε κάθε encode.)
+    """
+    t = type(obj)
+    if t in _SAFE_SCALARS:
+        return True
+    if t is dict:
+        for key, value in obj.items():
+            if type(key) is not str:
+                return False
+            if type(value) not in _SAFE_SCALARS and not _orjson_safe(value):
+                return False
+        return True
+    if t is list or t is tuple:
+        for value in obj:
+            if type(value) not in _SAFE_SCALARS and not _orjson_safe(value):
+                return False
+        return True
+    if t is float:
+        # και το NaN/inf αποτυγχάνει εδώ
+        return obj == 0.0 or _FLOAT_PLAIN_MIN <= abs(obj) < _FLOAT_PLAIN_MAX
+    if t is int:
+        return _INT64_MIN <= obj <= _UINT64_MAX
+    # datetime, str-Enum κ.λπ. περνάνε από το ίδιο default· όχι όμως IntEnum/float υποκλάσεις
+    return not isinstance(obj, (int, float))
+
+
+class OrjsonCanonicalEncoder(JsonCanonicalEncoder):
+    """
+    Ίδιο canonical format μέσω orjson (OPT_SORT_KEYS), byte-for-byte.
+    Τα datetimes περνάνε από το ίδιο default (isoformat) με το json path.
+    """
+
+    name = "orjson"
+
+    _OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def encode(self, obj: Any) -> bytes:
+        if not _orjson_safe(obj):
+            return super().encode(obj)
+        return orjson.dumps(obj, default=_canonical_default, option=self._OPTIONS)
+
+
+def _resolve_encoder_from_env() -> JsonCanonicalEncoder:
+    """
+    CANONICAL_ENCODER = auto (orjson αν υπάρχει) | orjson | json.
+    """
+    raw = os.getenv("CANONICAL_ENCODER", "auto").lower()
+    if raw == "json" or orjson is None:
+        return JsonCanonicalEncoder()
+    return OrjsonCanonicalEncoder()
+
+
+_encoder_singleton: Optional[JsonCanonicalEncoder] = None
+
+
+def get_canonical_encoder() -> JsonCanonicalEncoder:
+    global _encoder_singleton
+    if _encoder_singleton is None:
+        _encoder_singleton = _resolve_encoder_from_env()
+    return _encoder_singleton
+
+
+def set_canonical_encoder(encoder: JsonCanonicalEncoder) -> None:
+    """Αλλαγή encoder (π.χ. για benchmarks ή conformance checks)."""
+    global _encoder_singleton
+    _encoder_singleton = encoder
@@ -3,8 +3,10 @@
 import os
 import hmac
 import hashlib
+from concurrent.futures import Executor, ThreadPoolExecutor
 from enum import Enum
-from typing import Optional, Union
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
 
 
 class CryptoMode(str, Enum):
@@ -30,6 +32,81 @@ def _resolve_mode_from_env() -> CryptoMode:
         return CryptoMode.HMAC_SHA256
 
 
+# Πόσα keyed signers κρατάμε (ένα ανά (mode, secret), δηλ. ανά node key)
+CRYPTO_SIGNER_CACHE_SIZE = int(os.getenv("CRYPTO_SIGNER_CACHE_SIZE", "1024"))
+# Threads για sign_many/verify_many(parallel=True)
+CRYPTO_THREADS = int(os.getenv("CRYPTO_THREADS", str(min(8, os.cpu_count() or 1))))
+# Κάτω από τόσα μηνύματα το thread pool δεν αξίζει το overhead
+CRYPTO_PARALLEL_MIN_BATCH = int(os.getenv("CRYPTO_PARALLEL_MIN_BATCH", "64"))
+
+_DIGESTMODS = {
+    CryptoMode.HMAC_SHA256: hashlib.sha256,
+    CryptoMode.HMAC_SHA3_256: hashlib.sha3_256,
+}
+
+
+class KeyedSigner:
+    """
+    HMAC signer δεμένο σε ΕΝΑ (mode, secret).
+
+    Το pre-keyed HMAC state (ipad/opad) υπολογίζεται μία φορά στο template·
+    κάθε υπογραφή κάνει μόνο copy() + update(message), χωρίς normalize
+    του secret, lookup του digestmod και key schedule ανά μήνυμα.
+    """
+
+    def __init__(self, mode: CryptoMode, key_bytes: bytes) -> None:
+        self.mode = mode
+        self._template = hmac.new(key_bytes, digestmod=_DIGESTMODS[mode])
+
+    def sign(self, message: bytes) -> str:
+        mac = self._template.copy()
+        mac.update(message)
+        return mac.hexdigest()
+
+    def verify(self, message: bytes, signature_hex: str) -> bool:
+        # compare_digest σηκώνει TypeError για μη-ASCII str: άκυρη υπογραφή, όχι exception
+        if not isinstance(signature_hex, str) or not signature_hex.isascii():
+            return False
+        # constant-time compare
+        return hmac.compare_digest(self.sign(message), signature_hex)
+
+    def sign_many(self, messages: Sequence[bytes]) -> List[str]:
+        template = self._template
+        out = []
+        for message in messages:
+            mac = template.copy()
+            mac.update(message)
+            out.append(mac.hexdigest())
+        return out
+
+    def verify_many(self, items: Sequence[Tuple[bytes, str]]) -> List[bool]:
+        expected = self.sign_many([message for message, _sig in items])
+        return [
+            isinstance(sig, str) and sig.isascii() and hmac.compare_digest(exp, sig)
+            for exp, (_message, sig) in zip(expected, items)
+        ]
+
+
+@lru_cache(maxsize=CRYPTO_SIGNER_CACHE_SIZE)
+def _get_signer(mode: CryptoMode, key_bytes: bytes) -> KeyedSigner:
+    return KeyedSigner(mode, key_bytes)
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=max(1, CRYPTO_THREADS), thread_name_prefix="crypto")
+    return _pool
+
+
+def _chunks(items: Sequence, parts: int) -> List[Sequence]:
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 class CryptoEngine:
     """
     CryptoEngine = ενιαίο interface για υπογραφή & επαλήθευση.
@@ -63,13 +140,11 @@ class CryptoEngine:
         Επιστρέφει τη σωστή συνάρτηση hash από το hashlib
         ανάλογα με το επιλεγμένο mode.
         """
-        if self.mode == CryptoMode.HMAC_SHA256:
-            return hashlib.sha256
-        elif self.mode == CryptoMode.HMAC_SHA3_256:
-            return hashlib.sha3_256
-        else:
+        try:
+            return _DIGESTMODS[self.mode]
+        except KeyError:
             # Θεωρητικά δεν φτάνουμε ποτέ εδώ αν έχουν καλυφθεί όλα τα modes.
-            raise ValueError(f"Unsupported crypto mode: {self.mode}")
+            raise ValueError(f"Unsupported crypto mode: {self.mode}") from None
 
     @staticmethod
     def _normalize_secret(secret_key: Union[str, bytes]) -> bytes:
@@ -87,10 +162,7 @@ class CryptoEngine:
         - message: τα bytes που θέλουμε να προστατεύσουμε (header+payload).
         - secret_key: το shared secret του node (per-node key).
         """
-        key_bytes = self._normalize_secret(secret_key)
-        digestmod = self._get_digestmod()
-        mac = hmac.new(key_bytes, message, digestmod=digestmod)
-        return mac.hexdigest()
+        return self.signer(secret_key).sign(message)
 
     def verify(self, message: bytes, signature_hex: str, secret_key: Union[str, bytes]) -> bool:
         """
@@ -100,9 +172,64 @@ class CryptoEngine:
         - Χρησιμοποιεί constant-time σύγκριση (hmac.compare_digest)
           για προστασία από timing attacks.
         """
-        expected = self.sign(message, secret_key)
-        # constant-time compare
-        return hmac.compare_digest(expected, signature_hex)
+        return self.signer(secret_key).verify(message, signature_hex)
+
+    def signer(self, secret_key: Union[str, bytes]) -> KeyedSigner:
+        """
+        Keyed signer για το secret, από cache ανά (mode, secret).
+        Για πολλά μηνύματα με το ίδιο key είναι ο φθηνότερος δρόμος.
+        """
+        return _get_signer(self.mode, self._normalize_secret(secret_key))
+
+    def sign_many(
+        self,
+        messages: Sequence[bytes],
+        secret_key: Union[str, bytes],
+        parallel: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> List[str]:
+        """
+        Υπογράφει ένα batch μηνυμάτων με το ίδιο secret (ίδια σειρά στο αποτέλεσμα).
+
+        Με parallel=True (ή δικό μας executor) το batch μοιράζεται σε threads:
+        το hashlib αφήνει το GIL για μηνύματα > 2 KiB, άρα κερδίζουμε
+        σε μεγάλα frames· για μικρά μηνύματα το σειριακό είναι ταχύτερο.
+        """
+        signer = self.signer(secret_key)
+        pool = self._pool_for(len(messages), parallel, executor)
+        if pool is None:
+            return signer.sign_many(messages)
+
+        out: List[str] = []
+        for part in pool.map(signer.sign_many, _chunks(messages, CRYPTO_THREADS)):
+            out.extend(part)
+        return out
+
+    def verify_many(
+        self,
+        items: Sequence[Tuple[bytes, str]],
+        secret_key: Union[str, bytes],
+        parallel: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> List[bool]:
+        """Επαληθεύει batch από (message, signature_hex)· ένα bool ανά στοιχείο."""
+        signer = self.signer(secret_key)
+        pool = self._pool_for(len(items), parallel, executor)
+        if pool is None:
+            return signer.verify_many(items)
+
+        out: List[bool] = []
+        for part in pool.map(signer.verify_many, _chunks(items, CRYPTO_THREADS)):
+            out.extend(part)
+        return out
+
+    @staticmethod
+    def _pool_for(n: int, parallel: bool, executor: Optional[Executor]) -> Optional[Executor]:
+        if executor is not None:
+            return executor
+        if parallel and n >= CRYPTO_PARALLEL_MIN_BATCH and CRYPTO_THREADS > 1:
+            return _get_pool()
+        return None
 
 
 # Optional singleton για να μην φτιάχνουμε εκατό instances
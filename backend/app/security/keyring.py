@@ -0,0 +1,118 @@
+# backend/app/security/keyring.py
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.security.crypto_engine import CryptoEngine, KeyedSigner, get_crypto_engine
+from app.security.message_schema import NodeRole
+
+# {"controller-1": {"role": "controller", "secret": "..."}, ...}
+NODE_KEYS_FILE = os.getenv("NODE_KEYS_FILE", "")
+# Κάθε πόσο (το πολύ) κοιτάμε το mtime του αρχείου για hot reload
+NODE_KEYS_RELOAD_INTERVAL = float(os.getenv("NODE_KEYS_RELOAD_INTERVAL", "2.0"))
+
+
+@dataclass(frozen=True)
+class NodeKey:
+    """
+    Το κλειδί ενός κόμβου, μαζί με τον έτοιμο keyed signer
+    (pre-keyed HMAC state), ώστε το verify να μη στήνει HMAC από την αρχή.
+    """
+    node_id: str
+    role: NodeRole
+    signer: KeyedSigner
+
+
+class NodeKeyring:
+    """
+    In-memory keyring: node_id -> (role, secret, signer).
+
+    - Φορτώνει ΜΙΑ φορά από το NODE_KEYS_FILE (JSON).
+    - Hot reload: στο get() ελέγχεται το mtime το πολύ κάθε reload_interval
+      δευτερόλεπτα· αν άλλαξε, χτίζεται νέο dict και γίνεται atomic swap.
+      Άκυρο αρχείο δεν σβήνει τα τρέχοντα κλειδιά.
+    """
+
+    def __init__(
+        self,
+        path: str = NODE_KEYS_FILE,
+        reload_interval: float = NODE_KEYS_RELOAD_INTERVAL,
+        crypto: Optional[CryptoEngine] = None,
+    ) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self.crypto = crypto or get_crypto_engine()
+
+        self._keys: Dict[str, NodeKey] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, node_id: str) -> Optional[NodeKey]:
+        self._maybe_reload()
+        return self._keys.get(node_id)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check or not self.path:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def reload(self) -> None:
+        """Ξαναδιαβάζει το αρχείο και αντικαθιστά ατομικά τα κλειδιά."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                keys = {
+                    node_id: NodeKey(
+                        node_id=node_id,
+                        role=NodeRole(entry["role"]),
+                        signer=self.crypto.signer(entry["secret"]),
+                    )
+                    for node_id, entry in raw.items()
+                }
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                self.reload_failures += 1
+                print(f"[SEC] node keys reload FAILED ({self.path}): {e}")
+                return
+
+            self._keys = keys
+            self._mtime = mtime
+            self.reloads += 1
+            print(f"[SEC] node keys loaded ({len(keys)} nodes)")
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "nodes": len(self._keys),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+        }
+
+
+# SINGLETON (ένα keyring ανά process)
+_keyring_singleton: Optional[NodeKeyring] = None
+
+
+def get_keyring() -> NodeKeyring:
+    global _keyring_singleton
+    if _keyring_singleton is None:
+        _keyring_singleton = NodeKeyring()
+    return _keyring_singleton
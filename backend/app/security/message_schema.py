@@ -1,13 +1,13 @@
 # backend/app/security/message_schema.py
 
-import json
 import secrets
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
+from app.security.canonical import get_canonical_encoder
 from app.security.crypto_engine import CryptoEngine, get_crypto_engine
 
 
@@ -55,6 +55,31 @@ class MessageHeader(BaseModel):
         description="Message schema version for future migrations.",
     )
 
+    # Cache του canonical encoding (άκυρο σε κάθε ανάθεση πεδίου)
+    _canonical: Optional[bytes] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith("_"):
+            self._canonical = None
+        super().__setattr__(name, value)
+
+    def to_canonical_bytes(self) -> bytes:
+        if self._canonical is None:
+            # Ίδιο περιεχόμενο με self.dict(), χωρίς το overhead του generic dump
+            self._canonical = get_canonical_encoder().encode(
+                {
+                    "node_id": self.node_id,
+                    "zone_id": self.zone_id,
+                    "role": self.role,
+                    "msg_type": self.msg_type,
+                    "timestamp": self.timestamp,
+                    "nonce": self.nonce,
+                    "alg": self.alg,
+                    "version": self.version,
+                }
+            )
+        return self._canonical
+
 
 class SignedMessage(BaseModel):
     """
@@ -68,27 +93,53 @@ class SignedMessage(BaseModel):
     payload: Dict[str, Any]
     hmac: str
 
+    # Memoized canonical bytes: sign-then-send και receive-then-verify
+    # κάνουν serialize ΜΙΑ φορά. Το hmac δεν μπαίνει στο canonical,
+    # άρα η ανάθεσή του δεν ακυρώνει την cache.
+    _canonical: Optional[bytes] = PrivateAttr(default=None)
+    _canonical_header: Optional[bytes] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ("header", "payload"):
+            self._canonical = None
+        super().__setattr__(name, value)
+
     def _to_canonical_bytes(self) -> bytes:
         """
-        Γυρνάει (header + payload) σε σταθερό JSON string (sorted keys),
+        Γυρνάει (header + payload) σε σταθερό JSON (sorted keys),
         ΧΩΡΙΣ το hmac, ώστε:
         - ο υπολογισμός HMAC να είναι deterministic,
         - να έχουμε το ίδιο input σε υπογραφή/επαλήθευση.
 
         Αυτό είναι σημαντικό για να μην αλλάζει το digest
         απλά και μόνο επειδή άλλαξε η σειρά των keys.
+
+        Ισοδύναμο byte-for-byte με json.dumps({"header": ..., "payload": ...},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False), με τα
+        datetimes σε isoformat(). Επειδή "header" < "payload", το header
+        (cached στο ίδιο το MessageHeader) κολλάει απευθείας στο αποτέλεσμα.
+
+        Σημείωση: in-place αλλαγές στο payload (π.χ. payload["x"] = 1)
+        δεν ανιχνεύονται· κάλεσε invalidate_canonical() ή κάνε ανάθεση.
         """
-        data = {
-            "header": self.header.dict(),
-            "payload": self.payload,
-        }
-        json_str = json.dumps(
-            data,
-            sort_keys=True,          # σταθερή σειρά κλειδιών
-            separators=(",", ":"),   # χωρίς περιττά spaces
-            ensure_ascii=False,
-        )
-        return json_str.encode("utf-8")
+        header_bytes = self.header.to_canonical_bytes()
+        # Αλλαγή σε πεδίο του header -> νέο header_bytes object -> rebuild
+        if self._canonical is None or header_bytes is not self._canonical_header:
+            self._canonical_header = header_bytes
+            self._canonical = b"".join(
+                (
+                    b'{"header":',
+                    header_bytes,
+                    b',"payload":',
+                    get_canonical_encoder().encode(self.payload),
+                    b"}",
+                )
+            )
+        return self._canonical
+
+    def invalidate_canonical(self) -> None:
+        self._canonical = None
+        self.header._canonical = None
 
     def compute_hmac(
         self,
@@ -116,7 +167,8 @@ class SignedMessage(BaseModel):
 
         Σημείωση:
         - Δεν ελέγχει μόνο του timestamps ή nonces.
-          Αυτό θα το κάνουμε στο WebSocket layer (anti-replay window).
+          Αυτό το κάνει το ReplayGuard (app/security/replay_guard.py),
+          ΜΕΤΑ από επιτυχημένο verify_hmac.
         """
         if crypto is None:
             crypto = get_crypto_engine()
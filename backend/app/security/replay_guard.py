@@ -0,0 +1,179 @@
+# backend/app/security/replay_guard.py
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.security.message_schema import MessageHeader
+
+# Αποδεκτή ηλικία μηνύματος (και ανοχή για ρολόγια που πάνε μπροστά)
+REPLAY_WINDOW_SECONDS = float(os.getenv("REPLAY_WINDOW_SECONDS", "30"))
+REPLAY_FUTURE_SKEW_SECONDS = float(os.getenv("REPLAY_FUTURE_SKEW_SECONDS", "5"))
+# Granularity των buckets (όσο μικρότερο, τόσο πιο "σφιχτό" το eviction)
+REPLAY_BUCKET_SECONDS = float(os.getenv("REPLAY_BUCKET_SECONDS", "1"))
+# Πάνω όριο nonces στη μνήμη
+REPLAY_MAX_NONCES = int(os.getenv("REPLAY_MAX_NONCES", "1000000"))
+
+
+class ReplayVerdict(str, Enum):
+    """
+    Αποτέλεσμα ελέγχου:
+    - ACCEPTED: πρώτη φορά που βλέπουμε (node_id, nonce) μέσα στο window.
+    - REPLAY: το ίδιο (node_id, nonce) έχει ήδη γίνει δεκτό.
+    - STALE: timestamp παλαιότερο από το window (ή από buckets που
+      πετάχτηκαν λόγω χωρητικότητας).
+    - FUTURE: timestamp πέρα από την ανοχή του ρολογιού.
+    """
+    ACCEPTED = "accepted"
+    REPLAY = "replay"
+    STALE = "stale"
+    FUTURE = "future"
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    # Naive timestamps θεωρούνται UTC (όπως το assigned_at των placements)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class ReplayGuard:
+    """
+    Anti-replay για (MessageHeader.timestamp, nonce).
+
+    - Τα nonces μπαίνουν σε buckets ανά bucket_seconds του ΔΙΚΟΥ ΤΟΥΣ
+      timestamp. Το timestamp είναι υπογεγραμμένο, άρα ένα replay πέφτει
+      πάντα στο ίδιο bucket: ο έλεγχος είναι ένα dict + set lookup, O(1).
+    - Buckets παλαιότερα από το window πετιούνται ολόκληρα (O(1) amortized)·
+      μηνύματα με τέτοιο timestamp απορρίπτονται ούτως ή άλλως ως STALE.
+    - Αν γεμίσει το max_nonces, πετιέται το παλαιότερο bucket και το
+      κατώφλι του STALE ανεβαίνει πάνω από αυτό, ώστε να μην ανοίξει
+      παράθυρο για replay (fail closed, με φραγμένη μνήμη).
+
+    Καλείται ΜΕΤΑ το verify_hmac, ώστε πλαστά μηνύματα να μη γεμίζουν την cache.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = REPLAY_WINDOW_SECONDS,
+        future_skew_seconds: float = REPLAY_FUTURE_SKEW_SECONDS,
+        bucket_seconds: float = REPLAY_BUCKET_SECONDS,
+        max_nonces: int = REPLAY_MAX_NONCES,
+    ) -> None:
+        self.window = window_seconds
+        self.future_skew = future_skew_seconds
+        self.bucket_seconds = max(bucket_seconds, 1e-3)
+        self.max_nonces = max(1, max_nonces)
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Set[Tuple[str, str]]] = {}
+        self._order: Deque[int] = deque()  # bucket ids σε αύξουσα σειρά
+        self._floor = -1  # buckets <= floor έχουν πεταχτεί λόγω χωρητικότητας
+        self._size = 0
+
+        self.accepted = 0
+        self.replays = 0
+        self.stale = 0
+        self.future = 0
+        self.evicted = 0
+        self.capacity_evictions = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def check(self, header: MessageHeader, now: Optional[float] = None) -> ReplayVerdict:
+        return self.check_nonce(header.node_id, header.nonce, header.timestamp, now)
+
+    def check_nonce(
+        self,
+        node_id: str,
+        nonce: str,
+        timestamp: datetime,
+        now: Optional[float] = None,
+    ) -> ReplayVerdict:
+        if now is None:
+            now = time.time()
+        ts = _epoch_seconds(timestamp)
+
+        if ts > now + self.future_skew:
+            self.future += 1
+            return ReplayVerdict.FUTURE
+
+        bucket_id = int(ts // self.bucket_seconds)
+        with self._lock:
+            self._expire(now)
+            if ts < now - self.window or bucket_id <= self._floor:
+                self.stale += 1
+                return ReplayVerdict.STALE
+
+            key = (node_id, nonce)
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                bucket = self._buckets[bucket_id] = set()
+                self._insert_order(bucket_id)
+            elif key in bucket:
+                self.replays += 1
+                return ReplayVerdict.REPLAY
+
+            bucket.add(key)
+            self._size += 1
+            self.accepted += 1
+
+            while self._size > self.max_nonces:
+                self._drop_oldest(capacity=True)
+
+        return ReplayVerdict.ACCEPTED
+
+    def _insert_order(self, bucket_id: int) -> None:
+        # Σχεδόν πάντα το νέο bucket είναι το νεότερο (append)· μόνο
+        # καθυστερημένα μηνύματα πάνε πιο πίσω (σύντομο σκανάρισμα από δεξιά)
+        if not self._order or bucket_id > self._order[-1]:
+            self._order.append(bucket_id)
+            return
+        pos = len(self._order)
+        while pos > 0 and self._order[pos - 1] > bucket_id:
+            pos -= 1
+        self._order.insert(pos, bucket_id)
+
+    def _expire(self, now: float) -> None:
+        cutoff = int((now - self.window) // self.bucket_seconds)
+        while self._order and self._order[0] < cutoff:
+            self._drop_oldest(capacity=False)
+
+    def _drop_oldest(self, capacity: bool) -> None:
+        bucket_id = self._order.popleft()
+        self._size -= len(self._buckets.pop(bucket_id))
+        self.evicted += 1
+        if capacity:
+            self.capacity_evictions += 1
+            self._floor = max(self._floor, bucket_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self._size,
+                "buckets": len(self._buckets),
+                "max_nonces": self.max_nonces,
+                "window_seconds": self.window,
+                "accepted": self.accepted,
+                "replays": self.replays,
+                "stale": self.stale,
+                "future": self.future,
+                "evicted_buckets": self.evicted,
+                "capacity_evictions": self.capacity_evictions,
+            }
+
+
+# Optional singleton (ένα κοινό window για όλο το process)
+_guard_singleton: Optional[ReplayGuard] = None
+
+
+def get_replay_guard() -> ReplayGuard:
+    global _guard_singleton
+    if _guard_singleton is None:
+        _guard_singleton = ReplayGuard()
+    return _guard_singleton
@@ -0,0 +1,296 @@
+# backend/app/services/ad_cache.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.models.advertisement import Advertisement
+from app.services.advertisement_service import AdvertisementService
+from app.services.ad_change_listener import ad_change_listener
+
+AD_CACHE_TTL = float(os.getenv("AD_CACHE_TTL", "30"))  # 0 = χωρίς cache
+AD_CACHE_MAX = int(os.getenv("AD_CACHE_MAX", "10000"))
+# Πόσο περιμένει ένας follower το load του leader πριν φορτώσει μόνος του
+AD_CACHE_WAIT_TIMEOUT = float(os.getenv("AD_CACHE_WAIT_TIMEOUT", "2.0"))
+
+
+class _Flight:
+    """Ένα load σε εξέλιξη: οι υπόλοιποι callers για το ίδιο key περιμένουν αυτό."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class AdCache:
+    """
+    Read-through cache για διαφημίσεις: ανά id και ολόκληρη η λίστα.
+
+    - TTL ανά εγγραφή + LRU με όριο max_size (OrderedDict).
+    - Κρατάμε και τα "δεν υπάρχει" (None), ώστε ένα λάθος ad_id σε loop
+      να μη χτυπάει κάθε φορά τη βάση.
+    - Single-flight: ταυτόχρονα misses για το ίδιο key κάνουν ΕΝΑ query,
+      οι υπόλοιποι περιμένουν το αποτέλεσμά του (το πολύ wait_timeout·
+      μετά φορτώνουν μόνοι τους, ώστε ένας κολλημένος leader να μην
+      κρατάει όλους τους υπόλοιπους).
+    - Blocking API (βάση στο miss): από async κώδικα καλείται με
+      asyncio.to_thread, ποτέ μέσα στο event loop.
+    - Invalidation από το LISTEN (ανά id, από το payload του trigger) και
+      πλήρες clear μετά από reconnect ή όταν άλλος worker δει αλλαγή.
+      Κάθε invalidation ανεβάζει το generation, ώστε ένα load που ξεκίνησε
+      πριν από αυτή να μη γράψει παλιά δεδομένα στην cache.
+    """
+
+    def __init__(
+        self,
+        ttl: float = AD_CACHE_TTL,
+        max_size: int = AD_CACHE_MAX,
+        wait_timeout: float = AD_CACHE_WAIT_TIMEOUT,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self.wait_timeout = wait_timeout
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Optional[Advertisement]]]" = OrderedDict()
+        self._all: Optional[Tuple[float, List[Advertisement]]] = None
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.wait_timeouts = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # -----------------------------
+    #  READ
+    # -----------------------------
+
+    def get(self, ad_id: int) -> Optional[Advertisement]:
+        if not self.enabled:
+            return AdvertisementService.get_by_id(ad_id)
+
+        ad_id = int(ad_id)
+        found, ad = self._lookup(ad_id)
+        if found:
+            return ad
+        return self._single_flight(("id", ad_id), lambda: self._load_one(ad_id))
+
+    def get_many(self, ad_ids: Iterable[int]) -> Dict[int, Advertisement]:
+        """
+        Όσα λείπουν φορτώνονται με ΕΝΑ query (get_by_ids). Μοιράζεται τα
+        in-flight loads του get(): ids που φορτώνει ήδη άλλος τα περιμένουμε,
+        για τα υπόλοιπα γινόμαστε leader (ένα flight ανά id, όπως στο get()).
+        """
+        ids = {int(ad_id) for ad_id in ad_ids}
+        if not self.enabled:
+            return AdvertisementService.get_by_ids(ids)
+
+        out: Dict[int, Advertisement] = {}
+        leading: Dict[int, _Flight] = {}
+        following: Dict[int, _Flight] = {}
+        now = time.monotonic()
+        with self._lock:
+            for ad_id in ids:
+                entry = self._entries.get(ad_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(ad_id)
+                    self.hits += 1
+                    if entry[1] is not None:
+                        out[ad_id] = entry[1]
+                    continue
+                self.misses += 1
+                flight = self._flights.get(("id", ad_id))
+                if flight is None:
+                    leading[ad_id] = self._flights[("id", ad_id)] = _Flight()
+                else:
+                    following[ad_id] = flight
+                    self.coalesced += 1
+            generation = self._generation
+
+        if leading:
+            try:
+                loaded = AdvertisementService.get_by_ids(list(leading))
+                with self._lock:
+                    self.loads += 1
+                    for ad_id, flight in leading.items():
+                        flight.result = loaded.get(ad_id)
+                        if generation == self._generation:
+                            self._store(ad_id, flight.result)
+            except BaseException as e:
+                for flight in leading.values():
+                    flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    for ad_id in leading:
+                        self._flights.pop(("id", ad_id), None)
+                for flight in leading.values():
+                    flight.done.set()
+            out.update(loaded)
+
+        if following:
+            # Ένα κοινό deadline για όλους τους leaders· όσοι αργούν -> δικό μας load
+            deadline = time.monotonic() + self.wait_timeout
+            late: List[int] = []
+            for ad_id, flight in following.items():
+                if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+                    late.append(ad_id)
+                    continue
+                if flight.error is not None:
+                    raise flight.error
+                if flight.result is not None:
+                    out[ad_id] = flight.result
+            if late:
+                with self._lock:
+                    self.wait_timeouts += len(late)
+                out.update(AdvertisementService.get_by_ids(late))
+        return out
+
+    def get_all(self) -> List[Advertisement]:
+        if not self.enabled:
+            return AdvertisementService.get_all()
+
+        with self._lock:
+            if self._all is not None and self._all[0] > time.monotonic():
+                self.hits += 1
+                return self._all[1]
+            self.misses += 1
+        return self._single_flight("all", self._load_all)
+
+    def _lookup(self, ad_id: int) -> Tuple[bool, Optional[Advertisement]]:
+        with self._lock:
+            entry = self._entries.get(ad_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(ad_id)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    # -----------------------------
+    #  LOAD
+    # -----------------------------
+
+    def _single_flight(self, key: Hashable, loader: Callable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                # Ο leader αργεί (π.χ. checkout από γεμάτο pool): δικό μας load
+                with self._lock:
+                    self.wait_timeouts += 1
+                return loader()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _load_one(self, ad_id: int) -> Optional[Advertisement]:
+        with self._lock:
+            generation = self._generation
+        ad = AdvertisementService.get_by_id(ad_id)
+        with self._lock:
+            self.loads += 1
+            if generation == self._generation:
+                self._store(ad_id, ad)
+        return ad
+
+    def _load_all(self) -> List[Advertisement]:
+        with self._lock:
+            generation = self._generation
+        ads = AdvertisementService.get_all()
+        with self._lock:
+            self.loads += 1
+            if generation == self._generation:
+                self._all = (time.monotonic() + self.ttl, ads)
+                # Warm των ανά-id εγγραφών (μέχρι το όριο του LRU)
+                for ad in ads[: self.max_size]:
+                    self._store(ad.id, ad)
+        return ads
+
+    def _store(self, ad_id: int, ad: Optional[Advertisement]) -> None:
+        # Καλείται με το lock
+        self._entries[ad_id] = (time.monotonic() + self.ttl, ad)
+        self._entries.move_to_end(ad_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # -----------------------------
+    #  INVALIDATION
+    # -----------------------------
+
+    def invalidate(self, ad_id: Optional[int] = None) -> None:
+        """Ένα id (και η λίστα) ή, με ad_id=None, ολόκληρη η cache."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._all = None
+            if ad_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(ad_id), None)
+
+    def on_notify(self, payload: Optional[str]) -> None:
+        """Callback του ad_change_listener: payload {"op": ..., "id": ...} ή None."""
+        ad_id = None
+        if payload:
+            try:
+                ad_id = json.loads(payload).get("id")
+            except (ValueError, AttributeError):
+                ad_id = None
+        self.invalidate(ad_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "list_cached": self._all is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "wait_timeouts": self.wait_timeouts,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# SINGLETON (μία cache ανά process)
+ad_cache = AdCache()
+ad_change_listener.add_callback(ad_cache.on_notify)
@@ -0,0 +1,120 @@
+# backend/app/services/ad_change_listener.py
+
+import asyncio
+import os
+from typing import Callable, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import sql
+
+from app.config import get_db_connection
+
+# ΣΤΑΘΕΡΟ, όχι env: πρέπει να είναι ίδιο με το pg_notify() του trigger στο db/init.sql
+ADS_NOTIFY_CHANNEL = "advertisements_changed"
+ADS_LISTEN_RETRY_MAX = float(os.getenv("ADS_LISTEN_RETRY_MAX", "30.0"))
+
+
+class AdChangeListener:
+    """
+    Async LISTEN πάνω στο κανάλι που γεμίζει ο trigger του init.sql.
+
+    - Κρατάει ΜΙΑ dedicated σύνδεση (όχι από το pool, γιατί το LISTEN
+      θέλει long-lived session).
+    - Το socket της σύνδεσης μπαίνει στο event loop (add_reader),
+      άρα δεν χρειάζεται thread ούτε polling.
+    - Αν πέσει η σύνδεση, ξαναπροσπαθεί με exponential backoff.
+      Όσο είναι πεσμένος, οι καταναλωτές (π.χ. AdsFeed) κάνουν polling.
+    """
+
+    def __init__(self, channel: str = ADS_NOTIFY_CHANNEL) -> None:
+        self.channel = channel
+        self._callbacks: List[Callable[[Optional[str]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._conn = None
+        self._lost: Optional[asyncio.Event] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.closed
+
+    def add_callback(self, callback: Callable[[Optional[str]], None]) -> None:
+        """
+        callback(payload): καλείται μέσα στο event loop για κάθε NOTIFY.
+        Με payload=None καλείται και μετά από (επανα)σύνδεση, επειδή
+        μπορεί να χάσαμε ειδοποιήσεις όσο ήμασταν αποσυνδεδεμένοι.
+        """
+        self._callbacks.append(callback)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+        while True:
+            try:
+                self._conn = await asyncio.to_thread(self._connect)
+            except Exception as e:
+                print(f"[DB] LISTEN {self.channel} connect FAILED: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, ADS_LISTEN_RETRY_MAX)
+                continue
+
+            backoff = 1.0
+            print(f"[DB] LISTEN {self.channel} connected")
+            self._lost = asyncio.Event()
+            fd = self._conn.fileno()
+            loop.add_reader(fd, self._on_readable)
+            try:
+                self._dispatch(None)
+                await self._lost.wait()
+                print(f"[DB] LISTEN {self.channel} lost, falling back to polling")
+            finally:
+                loop.remove_reader(fd)
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+    def _connect(self):
+        conn = get_db_connection()
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        cur = conn.cursor()
+        # Quoted identifier (ακριβώς όπως το pg_notify), όχι f-string στο SQL
+        cur.execute(sql.SQL("LISTEN {};").format(sql.Identifier(self.channel)))
+        cur.close()
+        return conn
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except psycopg2.Error:
+            self._lost.set()
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            self._dispatch(notify.payload)
+
+    def _dispatch(self, payload: Optional[str]) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"[DB] {self.channel} callback FAILED: {e}")
+
+
+# SINGLETON (ένας listener ανά process)
+ad_change_listener = AdChangeListener()
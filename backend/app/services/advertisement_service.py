@@ -1,6 +1,7 @@
 # backend/app/services/advertisement_service.py
-from typing import List, Optional
-from app.config import get_db_connection
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.config import db_connection
+from app.services.streaming import STREAM_BATCH_SIZE
 from app.models.advertisement import Advertisement
 
 
@@ -10,20 +11,19 @@ class AdvertisementService:
         """
         Επιστρέφει ΟΛΕΣ τις διαφημίσεις από τον πίνακα advertisements.
         """
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT id, name, image_url, zone
-            FROM advertisements
-            ORDER BY id;
-            """
-        )
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                ORDER BY id;
+                """
+            )
 
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+            rows = cur.fetchall()
+            cur.close()
 
         ads: List[Advertisement] = []
         for row in rows:
@@ -49,20 +49,19 @@ class AdvertisementService:
         Άρα αγνοούμε το zone_id και επιστρέφουμε όλες τις εγγραφές.
         Κρατάμε όμως την παράμετρο για συμβατότητα με το API.
         """
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT id, name, image_url, zone
-            FROM advertisements
-            ORDER BY id;
-            """
-        )
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                ORDER BY id;
+                """
+            )
 
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+            rows = cur.fetchall()
+            cur.close()
 
         ads: List[Advertisement] = []
         for row in rows:
@@ -82,21 +81,20 @@ class AdvertisementService:
         Επιστρέφει μία διαφήμιση με βάση το id.
         Αν δεν βρεθεί, γυρνάει None.
         """
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT id, name, image_url, zone
-            FROM advertisements
-            WHERE id = %s;
-            """,
-            (ad_id,),
-        )
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                WHERE id = %s;
+                """,
+                (ad_id,),
+            )
 
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+            row = cur.fetchone()
+            cur.close()
 
         if row is None:
             return None
@@ -107,3 +105,97 @@ class AdvertisementService:
             image_url=row[2],
             zone=row[3],
         )
+
+    @staticmethod
+    def get_by_ids(ad_ids: Iterable[int]) -> Dict[int, Advertisement]:
+        """
+        Φέρνει πολλές διαφημίσεις με ΕΝΑ query (WHERE id = ANY(...)).
+        Επιστρέφει dict id -> Advertisement· όσα id δεν βρέθηκαν απλά λείπουν.
+        """
+        ids = sorted({int(ad_id) for ad_id in ad_ids})
+        if not ids:
+            return {}
+
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                WHERE id = ANY(%s);
+                """,
+                (ids,),
+            )
+
+            rows = cur.fetchall()
+            cur.close()
+
+        return {
+            row[0]: Advertisement(
+                id=row[0],
+                name=row[1],
+                image_url=row[2],
+                zone=row[3],
+            )
+            for row in rows
+        }
+
+    @staticmethod
+    def get_page(after_id: int, limit: int) -> List[Advertisement]:
+        """
+        Keyset pagination: οι επόμενες `limit` διαφημίσεις με id > after_id.
+        Κόστος ανάλογο της σελίδας (index στο PK), όχι του OFFSET.
+        """
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s;
+                """,
+                (after_id, limit),
+            )
+
+            rows = cur.fetchall()
+            cur.close()
+
+        return [
+            Advertisement(id=row[0], name=row[1], image_url=row[2], zone=row[3])
+            for row in rows
+        ]
+
+    @staticmethod
+    def iter_batches(after_id: int = 0, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[dict]]:
+        """
+        Streaming ανάγνωση με server-side (named) cursor: η Postgres στέλνει
+        batch_size γραμμές τη φορά, άρα η μνήμη δεν εξαρτάται από το μέγεθος
+        του πίνακα. Κρατάει τη σύνδεση όσο διαρκεί το iteration.
+        """
+        with db_connection() as conn:
+            cur = conn.cursor(name="advertisements_stream")
+            cur.itersize = batch_size
+            cur.execute(
+                """
+                SELECT id, name, image_url, zone
+                FROM advertisements
+                WHERE id > %s
+                ORDER BY id;
+                """,
+                (after_id,),
+            )
+            try:
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [
+                        {"id": row[0], "name": row[1], "image_url": row[2], "zone": row[3]}
+                        for row in rows
+                    ]
+            finally:
+                cur.close()
@@ -1,95 +1,538 @@
 # backend/app/services/layout_service.py
 
-from math import hypot
+import asyncio
+import copy
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from math import floor, inf, isfinite
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+from pydantic import TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
 from app.models.layout_models import Zone, Screen, MultiIndexKey
+from app.services.occupancy import OCCUPANCY_POLICIES, screen_occupancy
+
+# Μέγεθος κελιού (σε μονάδες grid) για τα spatial buckets του index
+LAYOUT_GRID_CELL_SIZE = float(os.getenv("LAYOUT_GRID_CELL_SIZE", "4.0"))
+
+# Αρχείο διάταξης (ένα ανά venue) και κάθε πόσο ελέγχεται για αλλαγές (0 = μόνο POST /layout/reload)
+LAYOUT_FILE = os.getenv(
+    "LAYOUT_FILE",
+    os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "layouts", "default.json")),
+)
+LAYOUT_RELOAD_INTERVAL = float(os.getenv("LAYOUT_RELOAD_INTERVAL", "2.0"))
 
 
 class LayoutService:
     """
     Κεντρική υπηρεσία που ξέρει τη διάταξη των οθονών στο γήπεδο.
-    Προς το παρόν είναι static (in-memory), χωρίς βάση.
+    Η διάταξη διαβάζεται από JSON αρχείο (LAYOUT_FILE), ένα ανά venue.
+
+    Μορφή αρχείου:
+    {
+      "zones": [
+        {"id": "glassfloor", "name": "...", "description": "...", "rows": 4, "cols": 4,
+         "screen_type": "glassfloor_tile", "screen_prefix": "GF"},
+        {"id": "...", ..., "screens": [{"id": "...", "row": 0, "col": 0, ...}]}
+      ]
+    }
+
+    - Με "screen_prefix" (και χωρίς "screens") παράγεται πλήρες grid
+      rows x cols με ids "{prefix}-{row}-{col}".
+    - Με "screens" δίνονται ρητά οι οθόνες (zone_id / screen_type
+      συμπληρώνονται από τη ζώνη αν λείπουν).
+    - "ad_categories" / "time_windows" στη ζώνη: default επιλεξιμότητα
+      των screens της (κενό ή απόν = όλες οι κατηγορίες / πάντα).
     """
 
     @staticmethod
     def get_layout() -> list[Zone]:
-        zones: list[Zone] = []
-
-        # 1️⃣ GlassFloor: 4x4
-        gf_screens: list[Screen] = []
-        for row in range(4):
-            for col in range(4):
-                gf_screens.append(
-                    Screen(
-                        id=f"GF-{row}-{col}",
-                        zone_id="glassfloor",
-                        row=row,
-                        col=col,
-                        screen_type="glassfloor_tile",  # ΝΕΟ
-                    )
-                )
-
-        zones.append(
-            Zone(
-                id="glassfloor",
-                name="GlassFloor",
-                description="Γυάλινο γήπεδο στο κέντρο",
-                rows=4,
-                cols=4,
-                screens=gf_screens,
-            )
-        )
+        """Οι ζώνες του τρέχοντος layout snapshot (materialized)."""
+        return get_layout_snapshot().index.get_zones()
 
-        # 2️⃣ Surrounding: 2x4
-        sur_screens: list[Screen] = []
-        for row in range(2):
-            for col in range(4):
-                sur_screens.append(
-                    Screen(
-                        id=f"SUR-{row}-{col}",
-                        zone_id="surrounding",
-                        row=row,
-                        col=col,
-                        screen_type="surrounding_banner",  # ΝΕΟ
-                    )
-                )
-
-        zones.append(
-            Zone(
-                id="surrounding",
-                name="Surrounding Screens",
-                description="Περιμετρικές οθόνες γύρω από το γήπεδο",
-                rows=2,
-                cols=4,
-                screens=sur_screens,
-            )
-        )
+    @staticmethod
+    def load_layout(path: str) -> "ScreenColumns":
+        """
+        Διαβάζει το αρχείο κατευθείαν σε columnar μορφή (ScreenColumns):
+        κανένα pydantic Screen δεν μένει στη μνήμη μετά το load.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        specs = raw["zones"] if isinstance(raw, dict) else raw
 
-        # 3️⃣ Megatron: 2x2
-        mega_screens: list[Screen] = []
-        for row in range(2):
-            for col in range(2):
-                mega_screens.append(
-                    Screen(
-                        id=f"MEGA-{row}-{col}",
-                        zone_id="megatron",
-                        row=row,
-                        col=col,
-                        screen_type="megatron_panel",  # ΝΕΟ
-                    )
-                )
-
-        zones.append(
-            Zone(
-                id="megatron",
-                name="Megatron Screens",
-                description="Κεντρικές μεγάλες οθόνες (Megatron)",
-                rows=2,
-                cols=2,
-                screens=mega_screens,
-            )
-        )
+        columns = ScreenColumns()
+        zone_ids: set[str] = set()
+        for spec in specs:
+            zone_id = LayoutService._add_zone_spec(columns, spec)
+            if zone_id in zone_ids:
+                raise ValueError(f"duplicate zone id '{zone_id}'")
+            zone_ids.add(zone_id)
+
+        # Μοναδικά screen ids (γρήγορος έλεγχος, σκανάρισμα μόνο αν αποτύχει)
+        if len(set(columns.ids)) != len(columns.ids):
+            seen: set[str] = set()
+            for screen_id in columns.ids:
+                if screen_id in seen:
+                    raise ValueError(f"duplicate screen id '{screen_id}'")
+                seen.add(screen_id)
+        return columns
+
+    @staticmethod
+    def _add_zone_spec(columns: "ScreenColumns", spec: dict) -> str:
+        spec = dict(spec)
+        screen_type = spec.pop("screen_type", "generic")
+        prefix = spec.pop("screen_prefix", None)
+        screens = spec.pop("screens", None)
+        # Defaults επιλεξιμότητας για τα screens της ζώνης (κενό = όλες / πάντα)
+        ad_categories = _STR_LIST_ADAPTER.validate_python(spec.pop("ad_categories", []))
+        time_windows = _STR_LIST_ADAPTER.validate_python(spec.pop("time_windows", []))
 
-        return zones
+        # Validation μόνο των πεδίων της ζώνης (τα screens ξεχωριστά)
+        zone = _ZoneInfo.from_zone(Zone.model_validate({**spec, "screens": []}))
+        if not isinstance(screen_type, str):
+            raise ValueError(f"zone '{zone.id}': screen_type must be a string")
+
+        if screens is None:
+            if not isinstance(prefix, str):
+                raise ValueError(f"zone '{zone.id}': needs 'screens' or 'screen_prefix'")
+            columns.add_grid(zone, prefix, screen_type, ad_categories, time_windows)
+            return zone.id
+
+        # Validation σε απλά dicts (_ScreenSpec), όχι Screen objects: ένα
+        # αντικείμενο ανά screen αντί για ~8 (model, __dict__, λίστες των
+        # defaults), άρα και πολύ λιγότερη δουλειά για τον cyclic GC
+        specs = _SCREEN_SPECS_ADAPTER.validate_python(screens)
+        for screen in specs:
+            if screen.get("zone_id", zone.id) != zone.id:
+                raise ValueError(f"screen '{screen['id']}' has zone_id '{screen['zone_id']}' inside zone '{zone.id}'")
+        columns.add_specs(zone, specs, screen_type, ad_categories, time_windows)
+        return zone.id
+
+
+# ------------------------------------------
+#  SPATIAL INDEX (uniform grid buckets)
+# ------------------------------------------
+
+
+class _ZoneGrid:
+    """
+    Uniform grid buckets για τα screens ΜΙΑΣ ζώνης.
+
+    Κάθε κελί (cell_size x cell_size) κρατάει ένα NumPy array με τις θέσεις
+    (indices στο columnar store του index) των screens που πέφτουν μέσα του,
+    σε σειρά layout. Ένα query ακτίνας r ελέγχει μόνο τα κελιά που τέμνουν
+    το bounding box [x-r, x+r] x [y-r, y+r].
+    """
+
+    def __init__(self, cell_size: float, idx: np.ndarray, xs: np.ndarray, ys: np.ndarray):
+        self.cell_size = cell_size
+        self.idx = idx  # όλα τα screens της ζώνης, αύξουσα σειρά
+
+        zx, zy = xs[idx], ys[idx]
+        self.min_x, self.max_x = float(zx.min()), float(zx.max())
+        self.min_y, self.max_y = float(zy.min()), float(zy.max())
+
+        # Ομαδοποίηση ανά κελί με ένα lexsort (σταθερό ως προς τη σειρά layout)
+        cx = np.floor(zx / cell_size).astype(np.int64)
+        cy = np.floor(zy / cell_size).astype(np.int64)
+        order = np.lexsort((cy, cx))
+        cx, cy, sorted_idx = cx[order], cy[order], idx[order]
+        starts = np.flatnonzero(np.r_[True, (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])])
+        ends = np.r_[starts[1:], len(order)]
+
+        self.cells: dict[tuple[int, int], np.ndarray] = {
+            (int(cx[a]), int(cy[a])): sorted_idx[a:b]
+            for a, b in zip(starts.tolist(), ends.tolist())
+        }
+
+    def _cell(self, value: float) -> int:
+        return floor(value / self.cell_size)
+
+    def candidates(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Indices των screens στα κελιά που τέμνουν το bounding box του query."""
+        # Bounding box κομμένο στα όρια της ζώνης (ασφαλές και για τεράστιο radius)
+        lo_x = max(x - radius, self.min_x)
+        hi_x = min(x + radius, self.max_x)
+        lo_y = max(y - radius, self.min_y)
+        hi_y = min(y + radius, self.max_y)
+        if lo_x > hi_x or lo_y > hi_y:
+            return _EMPTY_IDX
+
+        c0x, c1x = self._cell(lo_x), self._cell(hi_x)
+        c0y, c1y = self._cell(lo_y), self._cell(hi_y)
+
+        # Όλη η ζώνη μέσα στο box: κανένα concat
+        if (
+            c0x <= self._cell(self.min_x) and c1x >= self._cell(self.max_x)
+            and c0y <= self._cell(self.min_y) and c1y >= self._cell(self.max_y)
+        ):
+            return self.idx
+
+        # Αν το box καλύπτει περισσότερα κελιά απ' όσα υπάρχουν, διατρέχουμε τα υπάρχοντα
+        if (c1x - c0x + 1) * (c1y - c0y + 1) > len(self.cells):
+            buckets = [
+                b for (cx, cy), b in self.cells.items()
+                if c0x <= cx <= c1x and c0y <= cy <= c1y
+            ]
+        else:
+            buckets = []
+            for cx in range(c0x, c1x + 1):
+                for cy in range(c0y, c1y + 1):
+                    b = self.cells.get((cx, cy))
+                    if b is not None:
+                        buckets.append(b)
+
+        if not buckets:
+            return _EMPTY_IDX
+        return buckets[0] if len(buckets) == 1 else np.concatenate(buckets)
+
+    def rings(self, x: float, y: float) -> Iterator[tuple[float, np.ndarray]]:
+        """
+        Best-first διάσχιση: δίνει (lower_bound, indices) για κάθε "δακτύλιο"
+        κελιών γύρω από το κελί του (x, y), από μέσα προς τα έξω.
+
+        lower_bound = ελάχιστη δυνατή απόσταση οποιουδήποτε screen του δακτυλίου,
+        οπότε ο καλών μπορεί να σταματήσει μόλις έχει κάτι πιο κοντινό.
+        """
+        cs = self.cell_size
+        qx, qy = self._cell(x), self._cell(y)
+        c0x, c1x = self._cell(self.min_x), self._cell(self.max_x)
+        c0y, c1y = self._cell(self.min_y), self._cell(self.max_y)
+
+        # Απόσταση του (x, y) από τα όρια του δικού του κελιού
+        fx, fy = x - qx * cs, y - qy * cs
+        edge = min(fx, cs - fx, fy, cs - fy)
+
+        # Δακτύλιοι εκτός των ορίων της ζώνης είναι άδειοι: τους παραλείπουμε
+        d_min = max(c0x - qx, qx - c1x, c0y - qy, qy - c1y, 0)
+        d_max = max(qx - c0x, c1x - qx, qy - c0y, c1y - qy)
+
+        for d in range(d_min, d_max + 1):
+            lower_bound = 0.0 if d == 0 else (d - 1) * cs + edge
+            buckets = []
+            lo_x, hi_x = max(qx - d, c0x), min(qx + d, c1x)
+            lo_y, hi_y = max(qy - d + 1, c0y), min(qy + d - 1, c1y)
+            # Πάνω / κάτω σειρά του δακτυλίου
+            for cy in {qy - d, qy + d}:
+                if c0y <= cy <= c1y:
+                    for cx in range(lo_x, hi_x + 1):
+                        b = self.cells.get((cx, cy))
+                        if b is not None:
+                            buckets.append(b)
+            # Αριστερή / δεξιά στήλη (χωρίς τις γωνίες)
+            if d > 0:
+                for cx in (qx - d, qx + d):
+                    if c0x <= cx <= c1x:
+                        for cy in range(lo_y, hi_y + 1):
+                            b = self.cells.get((cx, cy))
+                            if b is not None:
+                                buckets.append(b)
+            if buckets:
+                yield lower_bound, buckets[0] if len(buckets) == 1 else np.concatenate(buckets)
+
+
+_EMPTY_IDX = np.empty(0, dtype=np.int64)
+_EMPTY_DIST = np.empty(0, dtype=np.float64)
+
+
+def _contains(sorted_idx: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Μάσκα: ποια από τα values υπάρχουν στο sorted_idx (binary search)."""
+    if not sorted_idx.size:
+        return np.zeros(values.size, dtype=bool)
+    pos = np.searchsorted(sorted_idx, values)
+    np.minimum(pos, sorted_idx.size - 1, out=pos)
+    return sorted_idx[pos] == values
+
+
+class _Posting:
+    """
+    Inverted list μιας τιμής μιας διάστασης (screen_type, ad_category,
+    time_window): ποια screens περνάνε το φίλτρο. Κρατιέται η μικρότερη
+    από τις δύο μορφές:
+    - include=True: ταξινομημένα indices των screens που περνάνε
+    - include=False: ταξινομημένα indices των screens που ΔΕΝ περνάνε
+    count = πόσα screens περνάνε (με αυτό διαλέγεται η σειρά της τομής).
+    """
+
+    __slots__ = ("idx", "include", "count")
+
+    def __init__(self, idx: np.ndarray, include: bool, n: int) -> None:
+        self.idx = idx
+        self.include = include
+        self.count = idx.size if include else n - idx.size
+
+    def mask(self, cand: np.ndarray) -> np.ndarray:
+        """Ποια από τα cand περνάνε: O(len(cand) * log), όχι O(layout)."""
+        found = _contains(self.idx, cand)
+        return found if self.include else ~found
+
+
+def _group_by_code(col: np.ndarray, n_codes: int) -> list[np.ndarray]:
+    """code -> ταξινομημένα indices των screens με αυτό το code (ένα stable sort)."""
+    order = np.argsort(col, kind="stable")
+    ends = np.cumsum(np.bincount(col, minlength=n_codes))
+    return np.split(order, ends[:-1])
+
+
+def _eligibility_postings(
+    set_col: np.ndarray,
+    sets: list[tuple[str, ...]],
+) -> tuple[dict[str, _Posting], _Posting | None]:
+    """
+    Postings για μια διάσταση-σύνολο (ad_categories / time_windows):
+    value -> _Posting, και το posting για τιμή που δεν αναφέρει κανένα
+    screen. Κενό σύνολο (code 0) = το screen περνάει για κάθε τιμή.
+    Αν κανένα screen δεν έχει περιορισμό, η διάσταση δεν φιλτράρει (None).
+    """
+    n = set_col.size
+    groups = _group_by_code(set_col, len(sets))
+    wildcard = groups[0]
+    restricted = np.flatnonzero(set_col != 0)
+    if not restricted.size:
+        return {}, None
+
+    by_value: dict[str, list[np.ndarray]] = {}
+    for code in range(1, len(sets)):
+        for value in dict.fromkeys(sets[code]):
+            by_value.setdefault(value, []).append(groups[code])
+
+    postings: dict[str, _Posting] = {}
+    for value, parts in by_value.items():
+        listed = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+        # περνάνε: wildcard + όσα την αναφέρουν / δεν περνάνε: οι υπόλοιποι περιορισμένοι
+        if wildcard.size + listed.size <= restricted.size - listed.size:
+            postings[value] = _Posting(np.sort(np.concatenate((wildcard, listed))), True, n)
+        else:
+            postings[value] = _Posting(np.setdiff1d(restricted, listed, assume_unique=True), False, n)
+
+    if wildcard.size <= restricted.size:
+        unknown = _Posting(wildcard, True, n)
+    else:
+        unknown = _Posting(restricted, False, n)
+    return postings, unknown
+
+
+class _BelowCapacity:
+    """
+    Φίλτρο occupancy (policy=skip): περνάνε τα screens με φορτίο < capacity.
+    Ίδιο interface με το _Posting, αλλά διαβάζει το ζωντανό load array του
+    index· δεν είναι ποτέ driver της τομής (include=False) και ελέγχεται
+    τελευταίο (count = όλα τα screens).
+    """
+
+    __slots__ = ("load", "capacity", "count")
+    include = False
+
+    def __init__(self, load: np.ndarray, capacity: int) -> None:
+        self.load = load
+        self.capacity = capacity
+        self.count = load.size
+
+    def mask(self, cand: np.ndarray) -> np.ndarray:
+        return self.load[cand] < self.capacity
+
+
+# Μέχρι τόσους υποψηφίους ένα vectorized scan είναι φθηνότερο από τη διάσχιση του grid
+_SMALL_SCAN_LIMIT = 4096
+
+# Μέγιστο μέγεθος πίνακα αποστάσεων (σημεία x υποψήφια) ανά chunk στο batch
+_BATCH_MATRIX_LIMIT = 1_000_000
+
+
+# ------------------------------------------
+#  COLUMNAR ΑΝΑΠΑΡΑΣΤΑΣΗ (struct-of-arrays)
+# ------------------------------------------
+
+
+class _ZoneInfo:
+    """Τα πεδία μιας ζώνης χωρίς τα screens + το εύρος της [start, end) στα columns."""
+
+    __slots__ = ("id", "name", "description", "rows", "cols", "start", "end")
+
+    def __init__(self, id: str, name: str, description: str, rows: int, cols: int) -> None:
+        self.id = id
+        self.name = name
+        self.description = description
+        self.rows = rows
+        self.cols = cols
+        self.start = 0
+        self.end = 0
+
+    @classmethod
+    def from_zone(cls, zone: Zone) -> "_ZoneInfo":
+        return cls(zone.id, zone.name, zone.description, zone.rows, zone.cols)
+
+    def header(self) -> dict:
+        # Ίδια σειρά πεδίων με το Zone (τα screens είναι το τελευταίο)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "rows": self.rows,
+            "cols": self.cols,
+        }
+
+
+class ScreenColumns:
+    """
+    Builder του MultiDimScreenIndex: τα screens ενός layout σε columnar
+    μορφή, χωρίς ένα pydantic Screen ανά οθόνη.
+
+    - zone_id / screen_type -> int codes (κάθε string κρατιέται μία φορά)
+    - row / col -> NumPy arrays (τα grids παράγονται vectorized)
+    - tags / metadata μόνο για όσα screens έχουν (sparse dict)
+    - ad_categories / time_windows -> code του (interned) συνόλου τιμών,
+      0 = κενό σύνολο = όλες
+    """
+
+    def __init__(self) -> None:
+        self.zones: list[_ZoneInfo] = []
+        self.ids: list[str] = []
+        self.zone_codes: dict[str, int] = {}
+        self.type_codes: dict[str, int] = {}
+        self.category_sets: dict[tuple[str, ...], int] = {(): 0}
+        self.window_sets: dict[tuple[str, ...], int] = {(): 0}
+        self.extras: dict[int, tuple[list[str], dict]] = {}
+        # (zone code, type code, category set, window set, row, col) ανά add_*
+        self._parts: list[tuple[np.ndarray, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add_grid(
+        self,
+        zone: _ZoneInfo,
+        prefix: str,
+        screen_type: str,
+        ad_categories: Iterable[str] = (),
+        time_windows: Iterable[str] = (),
+    ) -> None:
+        """Πλήρες grid rows x cols με ids "{prefix}-{row}-{col}"."""
+        rows, cols = max(zone.rows, 0), max(zone.cols, 0)
+        zone.start = len(self.ids)
+        col_ids = [str(col) for col in range(cols)]
+        for row in range(rows):
+            row_prefix = f"{prefix}-{row}-"
+            self.ids.extend([row_prefix + col_id for col_id in col_ids])
+        n = rows * cols
+        if n:
+            self._parts.append((
+                np.full(n, self.zone_codes.setdefault(zone.id, len(self.zone_codes)), dtype=np.int32),
+                np.full(n, self.type_codes.setdefault(screen_type, len(self.type_codes)), dtype=np.int32),
+                np.full(n, _intern(self.category_sets, ad_categories), dtype=np.int32),
+                np.full(n, _intern(self.window_sets, time_windows), dtype=np.int32),
+                np.repeat(np.arange(rows, dtype=np.int64), cols),
+                np.tile(np.arange(cols, dtype=np.int64), rows),
+            ))
+        zone.end = len(self.ids)
+        self.zones.append(zone)
+
+    def add_specs(
+        self,
+        zone: _ZoneInfo,
+        specs: list["_ScreenSpec"],
+        screen_type: str,
+        ad_categories: Iterable[str] = (),
+        time_windows: Iterable[str] = (),
+    ) -> None:
+        """Ρητά screens του LAYOUT_FILE (validated _ScreenSpec), με τα defaults της ζώνης."""
+        zone.start = start = len(self.ids)
+        for pos, spec in enumerate(specs):
+            if spec.get("tags") or spec.get("metadata"):
+                self.extras[start + pos] = (list(spec.get("tags", ())), spec.get("metadata", {}))
+
+        self.ids.extend([spec["id"] for spec in specs])
+        screen_types = [spec.get("screen_type", screen_type) for spec in specs]
+        for key in dict.fromkeys(screen_types):
+            self.type_codes.setdefault(key, len(self.type_codes))
+        if specs:
+            type_codes = self.type_codes
+            ad_categories, time_windows = tuple(ad_categories), tuple(time_windows)
+            self._parts.append((
+                np.full(len(specs), self.zone_codes.setdefault(zone.id, len(self.zone_codes)), dtype=np.int32),
+                np.asarray([type_codes[key] for key in screen_types], dtype=np.int32),
+                np.asarray(
+                    [_intern(self.category_sets, spec.get("ad_categories", ad_categories)) for spec in specs],
+                    dtype=np.int32,
+                ),
+                np.asarray(
+                    [_intern(self.window_sets, spec.get("time_windows", time_windows)) for spec in specs],
+                    dtype=np.int32,
+                ),
+                np.asarray([spec["row"] for spec in specs], dtype=np.int64),
+                np.asarray([spec["col"] for spec in specs], dtype=np.int64),
+            ))
+        zone.end = len(self.ids)
+        self.zones.append(zone)
+
+    def add_screens(self, zone: _ZoneInfo, screens: Iterable[Screen]) -> None:
+        """Ρητά screens (ήδη validated Screen objects, δεν κρατιούνται)."""
+        screens = list(screens)
+        zone.start = start = len(self.ids)
+        for pos, screen in enumerate(screens):
+            if screen.tags or screen.metadata:
+                self.extras[start + pos] = (list(screen.tags), screen.metadata)
+
+        # Ανά στήλη (list comprehensions), όχι append ανά πεδίο ανά screen
+        self.ids.extend([screen.id for screen in screens])
+        zone_ids = [screen.zone_id for screen in screens]
+        screen_types = [screen.screen_type for screen in screens]
+        for key in dict.fromkeys(zone_ids):
+            self.zone_codes.setdefault(key, len(self.zone_codes))
+        for key in dict.fromkeys(screen_types):
+            self.type_codes.setdefault(key, len(self.type_codes))
+        if screens:
+            zone_codes, type_codes = self.zone_codes, self.type_codes
+            self._parts.append((
+                np.asarray([zone_codes[key] for key in zone_ids], dtype=np.int32),
+                np.asarray([type_codes[key] for key in screen_types], dtype=np.int32),
+                np.asarray([_intern(self.category_sets, s.ad_categories) for s in screens], dtype=np.int32),
+                np.asarray([_intern(self.window_sets, s.time_windows) for s in screens], dtype=np.int32),
+                np.asarray([screen.row for screen in screens], dtype=np.int64),
+                np.asarray([screen.col for screen in screens], dtype=np.int64),
+            ))
+        zone.end = len(self.ids)
+        self.zones.append(zone)
+
+    def arrays(self) -> tuple[np.ndarray, ...]:
+        """
+        (zone codes, type codes, category sets, window sets, rows, cols)
+        για όλα τα screens, σε σειρά layout.
+        """
+        if not self._parts:
+            empty32 = np.empty(0, dtype=np.int32)
+            return empty32, empty32, empty32, empty32, _EMPTY_IDX, _EMPTY_IDX
+        return tuple(np.concatenate(col) for col in zip(*self._parts))
+
+
+def _intern(sets: dict[tuple[str, ...], int], values: Iterable[str]) -> int:
+    return sets.setdefault(tuple(values), len(sets))
+
+
+class _ScreenSpec(TypedDict):
+    """Ένα ρητό screen του LAYOUT_FILE (τα πεδία του Screen, προαιρετικά όσα έχουν default)."""
+
+    id: str
+    row: int
+    col: int
+    zone_id: NotRequired[str]
+    screen_type: NotRequired[str]
+    tags: NotRequired[list[str]]
+    metadata: NotRequired[dict[str, Any]]
+    ad_categories: NotRequired[list[str]]
+    time_windows: NotRequired[list[str]]
+
+
+_SCREENS_ADAPTER = TypeAdapter(list[Screen])
+_SCREEN_SPECS_ADAPTER = TypeAdapter(list[_ScreenSpec])
+_STR_LIST_ADAPTER = TypeAdapter(list[str])
+_KEYS_ADAPTER = TypeAdapter(list[MultiIndexKey])
 
 
 # ------------------------------------------
@@ -106,40 +549,187 @@ class MultiDimScreenIndex:
     - ανά grid (zone_id, row, col)
     - 2D συντεταγμένες (x, y) για κοντινά queries
 
+    Τα screens ζουν ΜΟΝΟ σε columnar μορφή (struct-of-arrays): x, y,
+    zone / screen_type codes σε NumPy arrays, τα ids σε ένα string με
+    offsets, tags / metadata μόνο όπου υπάρχουν. Αποστάσεις και φίλτρα
+    υπολογίζονται vectorized· pydantic Screen / MultiIndexKey φτιάχνονται
+    μόνο για τα αποτελέσματα που επιστρέφονται στο API.
+
     Για αρχή όλα είναι in-memory (single process),
     ώστε αργότερα να το "σπάσουμε" σε distributed nodes.
     """
 
-    def __init__(self, zones: list[Zone]):
-        # 1) Αποθηκεύουμε τις ζώνες
-        self._zones_by_id: dict[str, Zone] = {z.id: z for z in zones}
+    def __init__(self, zones: list[Zone], cell_size: float = LAYOUT_GRID_CELL_SIZE):
+        columns = ScreenColumns()
+        for zone in zones:
+            columns.add_screens(_ZoneInfo.from_zone(zone), zone.screens)
+        self._init_columns(columns, cell_size)
+
+    @classmethod
+    def from_columns(
+        cls,
+        columns: ScreenColumns,
+        cell_size: float = LAYOUT_GRID_CELL_SIZE,
+    ) -> "MultiDimScreenIndex":
+        """Build χωρίς ενδιάμεσα Zone/Screen objects (π.χ. από το LAYOUT_FILE)."""
+        index = cls.__new__(cls)
+        index._init_columns(columns, cell_size)
+        return index
+
+    def _init_columns(self, columns: ScreenColumns, cell_size: float) -> None:
+        zone_col, type_col, category_col, window_col, rows, cols = columns.arrays()
+        n = len(columns)
+        self._n = n
+
+        # 1) Ζώνες (χωρίς screens), με το εύρος τους στα columns
+        self._zones: list[_ZoneInfo] = list(columns.zones)
+
+        # 2) Interned strings: code <-> zone_id / screen_type
+        self._zone_codes: dict[str, int] = dict(columns.zone_codes)
+        self._zone_names: list[str] = list(self._zone_codes)
+        self._type_codes: dict[str, int] = dict(columns.type_codes)
+        self._type_names: list[str] = list(self._type_codes)
+        self._category_sets: list[tuple[str, ...]] = list(columns.category_sets)
+        self._window_sets: list[tuple[str, ...]] = list(columns.window_sets)
 
-        # 2) Flat λίστα με όλα τα screens
-        self._screens: list[Screen] = [s for z in zones for s in z.screens]
+        # 3) Screen ids: ένα string + offsets (όχι ένα str object ανά screen)
+        self._id_blob = "".join(columns.ids)
+        self._id_off = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, columns.ids), dtype=np.int64, count=n), out=self._id_off[1:])
+        self._extras = columns.extras
 
-        # 3) Index ανά ζώνη
-        self._screens_by_zone: dict[str, list[Screen]] = {}
+        # 4) 2D θέση στο "grid space"
+        # Για αρχή: x = col, y = row (απλό μοντέλο)
+        self._xs = cols.astype(np.float64)
+        self._ys = rows.astype(np.float64)
+        self._zone_col = zone_col
+        self._type_col = type_col
+        self._category_col = category_col
+        self._window_col = window_col
 
-        # 4) Index ανά grid (zone_id, row, col)
-        self._screens_by_grid: dict[tuple[str, int, int], Screen] = {}
+        # 5) Index ανά grid (zone_id, row, col): ταξινόμηση + binary search.
+        #    Σταθερό sort -> σε διπλή θέση κερδίζει το τελευταίο (όπως ένα dict).
+        order = np.lexsort((self._xs, self._ys, zone_col))
+        sorted_zones = zone_col[order]
+        self._grid_order = order
+        self._grid_rows = self._ys[order]
+        self._grid_cols = self._xs[order]
+        self._grid_bounds: dict[str, tuple[int, int]] = {
+            zone_id: (
+                int(np.searchsorted(sorted_zones, code, "left")),
+                int(np.searchsorted(sorted_zones, code, "right")),
+            )
+            for zone_id, code in self._zone_codes.items()
+        }
 
-        # 5) Index για 2D κοντινά queries (x, y, screen)
-        #    Προς το παρόν linear scan. Αργότερα μπαίνει R-Tree.
-        self._coords: list[tuple[float, float, Screen]] = []
+        # 6) Spatial index: grid buckets ανά ζώνη,
+        #    ώστε το φίλτρο zone_id να γίνεται ΠΡΙΝ το scan.
+        self._grids: dict[str, _ZoneGrid] = {}
+        for zone_id, code in self._zone_codes.items():
+            idx = np.flatnonzero(self._zone_col == code)
+            self._grids[zone_id] = _ZoneGrid(cell_size, idx, self._xs, self._ys)
 
-        for screen in self._screens:
-            # Ανά ζώνη
-            self._screens_by_zone.setdefault(screen.zone_id, []).append(screen)
+        # 7) Inverted indexes: posting list ανά τιμή κάθε διάστασης, ώστε
+        #    ένα query να τέμνει λίστες ΠΡΙΝ από οποιαδήποτε απόσταση
+        self._all_idx = np.arange(n, dtype=np.int64)
+        self._type_postings = [
+            _Posting(group, True, n)
+            for group in _group_by_code(type_col, len(self._type_names))
+        ]
+        self._category_postings, self._category_unknown = _eligibility_postings(
+            category_col, self._category_sets
+        )
+        self._window_postings, self._window_unknown = _eligibility_postings(
+            window_col, self._window_sets
+        )
 
-            # Ανά grid
-            grid_key = (screen.zone_id, screen.row, screen.col)
-            self._screens_by_grid[grid_key] = screen
+        # 8) Φορτίο ανά screen (αναθέσεις μέσα στο window του occupancy):
+        #    το γράφει ΜΟΝΟ ο ScreenOccupancy (add_load / set_load, με το
+        #    lock του), το διαβάζει το recommendation χωρίς lock (ένα
+        #    "παλιό" κατά μία ανάθεση φορτίο αλλάζει μόνο την προτίμηση)
+        self._load = np.zeros(n, dtype=np.int32)
 
-            # 2D θέση στο "grid space"
-            # Για αρχή: x = col, y = row (απλό μοντέλο)
-            x = float(screen.col)
-            y = float(screen.row)
-            self._coords.append((x, y, screen))
+    def __len__(self) -> int:
+        return self._n
+
+    # -----------------------------
+    #  MATERIALIZATION (API boundary)
+    # -----------------------------
+
+    def _screen_dicts(self, idx) -> list[dict]:
+        """Τα screens idx ως dicts, με τη σειρά πεδίων του Screen."""
+        idx = np.asarray(idx, dtype=np.int64)
+        blob, extras = self._id_blob, self._extras
+        zone_names, type_names = self._zone_names, self._type_names
+        category_sets, window_sets = self._category_sets, self._window_sets
+        out = []
+        for i, a, b, z, t, c, w, row, col in zip(
+            idx.tolist(),
+            self._id_off[idx].tolist(),
+            self._id_off[idx + 1].tolist(),
+            self._zone_col[idx].tolist(),
+            self._type_col[idx].tolist(),
+            self._category_col[idx].tolist(),
+            self._window_col[idx].tolist(),
+            self._ys[idx].tolist(),
+            self._xs[idx].tolist(),
+        ):
+            extra = extras.get(i)
+            out.append({
+                "id": blob[a:b],
+                "zone_id": zone_names[z],
+                "row": int(row),
+                "col": int(col),
+                "screen_type": type_names[t],
+                "tags": list(extra[0]) if extra else [],
+                "metadata": copy.deepcopy(extra[1]) if extra else {},
+                "ad_categories": list(category_sets[c]),
+                "time_windows": list(window_sets[w]),
+            })
+        return out
+
+    def _materialize(self, idx) -> list[Screen]:
+        return _SCREENS_ADAPTER.validate_python(self._screen_dicts(idx))
+
+    def _keys(
+        self,
+        idx,
+        ad_category: str | None,
+        time_window: str | None,
+    ) -> list[MultiIndexKey]:
+        """MultiIndexKey κατευθείαν από τα columns (όπως το from_screen)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        blob, zone_names, type_names = self._id_blob, self._zone_names, self._type_names
+        return _KEYS_ADAPTER.validate_python([
+            {
+                "screen_id": blob[a:b],
+                "zone_id": zone_names[z],
+                "x": x,
+                "y": y,
+                "screen_type": type_names[t],
+                "ad_category": ad_category,
+                "time_window": time_window,
+            }
+            for a, b, z, t, x, y in zip(
+                self._id_off[idx].tolist(),
+                self._id_off[idx + 1].tolist(),
+                self._zone_col[idx].tolist(),
+                self._type_col[idx].tolist(),
+                self._xs[idx].tolist(),
+                self._ys[idx].tolist(),
+            )
+        ])
+
+    def get_zones(self) -> list[Zone]:
+        """Οι ζώνες με τα screens τους (πλήρη pydantic objects, ακριβό για μεγάλα layouts)."""
+        return [
+            Zone.model_validate({**zone.header(), "screens": self._screen_dicts(range(zone.start, zone.end))})
+            for zone in self._zones
+        ]
+
+    @property
+    def zone_ids(self) -> list[str]:
+        return [zone.id for zone in self._zones]
 
     # -----------------------------
     #  ΑΠΛΑ QUERIES (όπως πριν)
@@ -150,49 +740,431 @@ class MultiDimScreenIndex:
         Επιστρέφει όλα τα screens για μια ζώνη.
         Πλήρως συμβατό με το παλιό NaiveScreenIndex.
         """
-        return list(self._screens_by_zone.get(zone_id, []))
+        grid = self._grids.get(zone_id)
+        return self._materialize(grid.idx) if grid is not None else []
 
     def query_by_grid(self, zone_id: str, row: int, col: int) -> Screen | None:
         """
         Επιστρέφει ένα screen με βάση zone + row + col.
         """
-        return self._screens_by_grid.get((zone_id, row, col))
+        a, b = self._grid_range(zone_id, row, col)
+        if a == b:
+            return None
+        # Σε διπλή θέση κερδίζει το τελευταίο (όπως ένα dict)
+        return self._materialize([self._grid_order[b - 1]])[0]
+
+    def _grid_range(self, zone_id: str, row: float, col: float) -> tuple[int, int]:
+        """[a, b) στο _grid_order: τα screens στη θέση (zone_id, row, col)."""
+        bounds = self._grid_bounds.get(zone_id)
+        if bounds is None:
+            return 0, 0
+        a, b = bounds
+        rows = self._grid_rows[a:b]
+        a, b = a + int(rows.searchsorted(row, "left")), a + int(rows.searchsorted(row, "right"))
+        cols = self._grid_cols[a:b]
+        return a + int(cols.searchsorted(col, "left")), a + int(cols.searchsorted(col, "right"))
+
+    def screen_position(self, zone_id: str, row: float, col: float, screen_id: str) -> int | None:
+        """Θέση του screen στα columns (None αν δεν υπάρχει σε αυτό το layout)."""
+        a, b = self._grid_range(zone_id, row, col)
+        blob, off = self._id_blob, self._id_off
+        for pos in self._grid_order[a:b].tolist():
+            if blob[off[pos]:off[pos + 1]] == screen_id:
+                return pos
+        return None
+
+    # -----------------------------
+    #  ΦΟΡΤΙΟ (occupancy)
+    # -----------------------------
+
+    def add_load(self, pos: int, delta: int) -> None:
+        """Φορτίο του screen στη θέση pos += delta (θέση από screen_position)."""
+        self._load[pos] += delta
+
+    def set_load(self, pos: int, count: int) -> None:
+        self._load[pos] = count
 
     # -----------------------------
     #  ΠΟΛΥΔΙΑΣΤΑΤΑ QUERIES
     # -----------------------------
 
+    def _grids_for(self, zone_id: str | None) -> list[_ZoneGrid]:
+        if zone_id is None:
+            return list(self._grids.values())
+        grid = self._grids.get(zone_id)
+        return [grid] if grid is not None else []
+
+    def _filters(
+        self,
+        screen_type: str | None,
+        ad_category: str | None,
+        time_window: str | None,
+    ) -> list[_Posting] | None:
+        """
+        Τα postings των φίλτρων, μικρότερο πρώτο. Διαστάσεις χωρίς
+        περιορισμούς παραλείπονται· None = κανένα screen δεν περνάει.
+        """
+        filters: list[_Posting] = []
+        if screen_type is not None:
+            code = self._type_codes.get(screen_type)
+            if code is None:
+                return None
+            filters.append(self._type_postings[code])
+        for value, postings, unknown in (
+            (ad_category, self._category_postings, self._category_unknown),
+            (time_window, self._window_postings, self._window_unknown),
+        ):
+            if value is None or unknown is None:
+                continue
+            filters.append(postings.get(value, unknown))
+        if any(f.count == 0 for f in filters):
+            return None
+        filters.sort(key=lambda f: f.count)
+        return filters
+
+    def _occupancy(self, filters: list[_Posting], policy: str | None) -> float:
+        """
+        Εφαρμόζει το occupancy policy στο query: policy=skip προσθέτει
+        το φίλτρο _BelowCapacity, policy=penalize γυρνάει το βάρος ανά
+        ανάθεση που προστίθεται στην απόσταση (0 = μόνο γεωμετρία).
+        """
+        policy = screen_occupancy.policy if policy is None else policy
+        if policy not in OCCUPANCY_POLICIES:
+            raise ValueError(f"Unknown occupancy policy '{policy}'")
+        if policy == "off":
+            return 0.0
+        screen_occupancy.expire()
+        if policy == "skip":
+            filters.append(_BelowCapacity(self._load, screen_occupancy.capacity))
+            return 0.0
+        return max(0.0, screen_occupancy.penalty) / screen_occupancy.capacity
+
+    @staticmethod
+    def _apply(idx: np.ndarray, filters: list[_Posting]) -> np.ndarray:
+        for f in filters:
+            if not idx.size:
+                break
+            idx = idx[f.mask(idx)]
+        return idx
+
+    def _candidates(
+        self,
+        zone_id: str | None,
+        filters: list[_Posting],
+        limit: int = _SMALL_SCAN_LIMIT,
+    ) -> np.ndarray | None:
+        """
+        Τομή ζώνης + φίλτρων (αύξουσα σειρά), ξεκινώντας από τη ΜΙΚΡΟΤΕΡΗ
+        include λίστα και ελέγχοντας κάθε υποψήφιο στις υπόλοιπες (binary
+        search): το κόστος ακολουθεί τη μικρότερη λίστα, όχι το layout.
+        None αν ακόμα και η μικρότερη λίστα ξεπερνά το limit
+        (τότε ο καλών πάει στη διάσχιση του grid).
+        """
+        if zone_id is not None:
+            grid = self._grids.get(zone_id)
+            if grid is None:
+                return _EMPTY_IDX
+            driver = grid.idx
+        else:
+            driver = self._all_idx
+        rest = list(filters)
+        for f in filters:
+            if f.include and f.idx.size < driver.size:
+                driver = f.idx
+                rest = [g for g in filters if g is not f]
+                if zone_id is not None:
+                    rest.append(_Posting(self._grids[zone_id].idx, True, self._n))
+                break  # τα filters είναι ήδη ταξινομημένα κατά count
+
+        if driver.size > limit:
+            return None
+        return self._apply(driver, rest)
+
     def query_near(
         self,
         x: float,
         y: float,
         radius: float,
         zone_id: str | None = None,
+        screen_type: str | None = None,
+        ad_category: str | None = None,
+        time_window: str | None = None,
     ) -> list[Screen]:
         """
         Σύνθετο query:
         - Δώσε μου όλα τα screens σε απόσταση <= radius
           από το σημείο (x, y) στο grid.
-        - Προαιρετικά φιλτράρισμα σε συγκεκριμένη ζώνη.
+        - Προαιρετικά φιλτράρισμα σε ζώνη, τύπο οθόνης και
+          επιλεξιμότητα (ad_category / time_window).
 
-        Προς το παρόν:
-        - κάνει απλό O(n) έλεγχο με hypot
-        - αργότερα μπορούμε να το αντικαταστήσουμε με R-Tree.
+        Τα grid buckets δίνουν τους υποψηφίους, οι αποστάσεις και η μάσκα
+        radius υπολογίζονται vectorized. Η σειρά είναι αυτή του layout.
         """
-        results: list[Screen] = []
+        if not (isfinite(x) and isfinite(y)) or not radius >= 0:
+            return []
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None:
+            return []
 
-        for sx, sy, screen in self._coords:
-            if zone_id is not None and screen.zone_id != zone_id:
-                continue
+        # Λίγα επιλέξιμα screens: κατευθείαν η τομή, αλλιώς τα grid buckets
+        idx = self._candidates(zone_id, filters)
+        if idx is None:
+            parts = [grid.candidates(x, y, radius) for grid in self._grids_for(zone_id)]
+            parts = [p for p in parts if p.size]
+            if not parts:
+                return []
+            idx = self._apply(parts[0] if len(parts) == 1 else np.concatenate(parts), filters)
+
+        dist = np.hypot(self._xs[idx] - x, self._ys[idx] - y)
+        return self._materialize(np.sort(idx[dist <= radius]))
+
+    def query_near_many(
+        self,
+        points: list[tuple[float, float]],
+        radius: float,
+        zone_id: str | None = None,
+        screen_type: str | None = None,
+        ad_category: str | None = None,
+        time_window: str | None = None,
+    ) -> list[list[Screen]]:
+        """
+        Batched query_near: ένα αποτέλεσμα ανά σημείο, με την ίδια σειρά.
+
+        Τα φίλτρα τέμνονται ΜΙΑ φορά για όλο το batch. Μικρή τομή: πίνακας
+        αποστάσεων (σημεία x υποψήφια) σε chunks. Αλλιώς οι υποψήφιοι των
+        grid buckets κάθε σημείου ενώνονται σε ένα array (με το σημείο του
+        καθενός), και αποστάσεις, φίλτρα και materialization γίνονται μία
+        φορά για όλα τα σημεία.
+        """
+        if not points:
+            return []
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None or not radius >= 0:
+            return [[] for _ in points]
+
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        found: list[np.ndarray] = [_EMPTY_IDX] * len(pts)
+
+        cand = self._candidates(zone_id, filters)
+        if cand is not None:
+            if cand.size:
+                cx, cy = self._xs[cand], self._ys[cand]
+                chunk = max(1, _BATCH_MATRIX_LIMIT // cand.size)
+                for a in range(0, len(pts), chunk):
+                    b = min(a + chunk, len(pts))
+                    hit = np.hypot(pts[a:b, 0:1] - cx[None, :], pts[a:b, 1:2] - cy[None, :]) <= radius
+                    # nonzero: ανά γραμμή (σημείο), με αύξουσα σειρά layout
+                    rows, cols = np.nonzero(hit)
+                    bounds = np.searchsorted(rows, np.arange(b - a + 1)).tolist()
+                    for r in range(b - a):
+                        found[a + r] = cand[cols[bounds[r]:bounds[r + 1]]]
+        else:
+            grids = self._grids_for(zone_id)
+            idx_parts: list[np.ndarray] = []
+            seg_ids: list[int] = []
+            for p, (x, y) in enumerate(pts.tolist()):
+                if not (isfinite(x) and isfinite(y)):
+                    continue
+                for grid in grids:
+                    part = grid.candidates(x, y, radius)
+                    if part.size:
+                        idx_parts.append(part)
+                        seg_ids.append(p)
+            if idx_parts:
+                idx = np.concatenate(idx_parts)
+                seg = np.repeat(np.asarray(seg_ids, dtype=np.int64), [part.size for part in idx_parts])
+                keep = np.hypot(self._xs[idx] - pts[seg, 0], self._ys[idx] - pts[seg, 1]) <= radius
+                idx, seg = idx[keep], seg[keep]
+                for f in filters:
+                    if not idx.size:
+                        break
+                    keep = f.mask(idx)
+                    idx, seg = idx[keep], seg[keep]
+                # Ένα sort πάνω στο (σημείο, θέση) ως ένα int64 key: ανά σημείο σε σειρά layout
+                key = np.sort(seg * self._n + idx)
+                seg, idx = np.divmod(key, self._n)
+                bounds = np.searchsorted(seg, np.arange(len(pts) + 1)).tolist()
+                for p in range(len(pts)):
+                    found[p] = idx[bounds[p]:bounds[p + 1]]
+
+        screens = self._materialize(np.concatenate(found))
+        ends = np.cumsum([part.size for part in found]).tolist()
+        return [screens[end - part.size:end] for part, end in zip(found, ends)]
 
-            if hypot(sx - x, sy - y) <= radius:
-                results.append(screen)
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        k: int = 1,
+        zone_id: str | None = None,
+        screen_type: str | None = None,
+        max_distance: float = inf,
+        ad_category: str | None = None,
+        time_window: str | None = None,
+    ) -> list[tuple[Screen, float]]:
+        """
+        k-nearest-neighbour: [(screen, distance), ...] ταξινομημένα κατά απόσταση,
+        μόνο ανάμεσα στα screens που δέχονται ad_category / time_window.
+        """
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None:
+            return []
+        idx, dist = self._nearest(x, y, k, zone_id, filters, max_distance)
+        return list(zip(self._materialize(idx), dist.tolist()))
+
+    def _nearest(
+        self,
+        x: float,
+        y: float,
+        k: int,
+        zone_id: str | None,
+        filters: list[_Posting],
+        max_distance: float,
+        weight: float = 0.0,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        k-nearest-neighbour με best-first αναζήτηση πάνω στα grid buckets.
+
+        - Αν τα φίλτρα (postings) αφήνουν λίγα screens, η τομή τους είναι
+          οι υποψήφιοι: ένα vectorized πέρασμα, χωρίς grid.
+        - Αλλιώς τα φίλτρα (zone_id, postings, max_distance) εφαρμόζονται
+          vectorized σε κάθε δακτύλιο, ΠΡΙΝ γίνει κάτι υποψήφιο.
+        - Σταματάει μόλις τα k καλύτερα είναι σίγουρα πιο κοντά από
+          οποιονδήποτε δακτύλιο δεν έχει ακόμα ανοιχτεί.
+        - Σε ισοπαλία απόστασης κερδίζει η σειρά του layout (όπως το min()).
+        - weight > 0 (occupancy=penalize): η κατάταξη γίνεται με
+          απόσταση + weight * φορτίο. Είναι >= της απόστασης, άρα το
+          κριτήριο τερματισμού των δακτυλίων ισχύει αυτούσιο.
+
+        Επιστρέφει (indices, distances) ταξινομημένα κατά κατάταξη.
+        """
+        if k <= 0 or not (isfinite(x) and isfinite(y)) or not max_distance >= 0:
+            return _EMPTY_IDX, _EMPTY_DIST
+        # Λίγοι υποψήφιοι: ένα vectorized πέρασμα χωρίς grid
+        cand = self._candidates(zone_id, filters)
+        if cand is not None:
+            dist = np.hypot(self._xs[cand] - x, self._ys[cand] - y)
+            keep = dist <= max_distance
+            cand, dist = cand[keep], dist[keep]
+            rank = dist + weight * self._load[cand] if weight else dist
+            order = np.lexsort((cand, rank))[:k]
+            return cand[order], dist[order]
+
+        # Ουρά δακτυλίων (lower_bound, grid_no, indices) από όλες τις ζώνες
+        ring_iters = [grid.rings(x, y) for grid in self._grids_for(zone_id)]
+        pending: list = []
+        for i, it in enumerate(ring_iters):
+            first = next(it, None)
+            if first is not None:
+                pending.append((first[0], i, first[1]))
+        heapq.heapify(pending)
+
+        best_idx = _EMPTY_IDX
+        best_dist = _EMPTY_DIST
+        best_rank = _EMPTY_DIST
+
+        while pending:
+            bound, i, cand = heapq.heappop(pending)
+            if bound > max_distance:
+                break
+
+            cand = self._apply(cand, filters)
+            if cand.size:
+                dist = np.hypot(self._xs[cand] - x, self._ys[cand] - y)
+                keep = dist <= max_distance
+                cand, dist = cand[keep], dist[keep]
+                rank = dist + weight * self._load[cand] if weight else dist
+                best_idx = np.concatenate((best_idx, cand))
+                best_dist = np.concatenate((best_dist, dist))
+                best_rank = np.concatenate((best_rank, rank))
+                # Κρατάμε μόνο τα k καλύτερα (κατάταξη, μετά σειρά layout)
+                order = np.lexsort((best_idx, best_rank))[:k]
+                best_idx, best_dist, best_rank = best_idx[order], best_dist[order], best_rank[order]
+
+            nxt = next(ring_iters[i], None)
+            if nxt is not None:
+                heapq.heappush(pending, (nxt[0], i, nxt[1]))
+
+            # Ό,τι είναι αυστηρά πιο κοντά από τον επόμενο δακτύλιο είναι τελικό
+            if best_idx.size >= k and pending and best_rank[-1] < pending[0][0]:
+                break
+
+        return best_idx, best_dist
+
+    def nearest_many(
+        self,
+        points: list[tuple[float, float]],
+        zone_id: str | None = None,
+        screen_type: str | None = None,
+        max_distance: float = inf,
+        ad_category: str | None = None,
+        time_window: str | None = None,
+    ) -> list[tuple[Screen, float] | None]:
+        """Batched nearest (k=1) για πολλά σημεία με τα ίδια φίλτρα."""
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None:
+            return [None] * len(points)
+        found = self._nearest_many(points, zone_id, filters, max_distance)
+        screens = iter(self._materialize([f[0] for f in found if f is not None]))
+        return [(next(screens), f[1]) if f is not None else None for f in found]
+
+    def _nearest_many(
+        self,
+        points: list[tuple[float, float]],
+        zone_id: str | None,
+        filters: list[_Posting],
+        max_distance: float,
+        weight: float = 0.0,
+    ) -> list[tuple[int, float] | None]:
+        """
+        Batched _nearest (k=1): (index, distance) ή None ανά σημείο.
+
+        Για μικρά σύνολα υποψηφίων υπολογίζει τον πίνακα αποστάσεων
+        (σημεία x υποψήφια) vectorized, σε chunks. Για μεγάλα layouts
+        πέφτει στο best-first nearest ανά σημείο.
+        """
+        if not points:
+            return []
 
-        return results
+        if not max_distance >= 0:
+            return [None] * len(points)
+
+        cand = self._candidates(zone_id, filters)
+        if cand is None:
+            out = []
+            for x, y in points:
+                idx, dist = self._nearest(x, y, 1, zone_id, filters, max_distance, weight)
+                out.append((int(idx[0]), float(dist[0])) if idx.size else None)
+            return out
+
+        if not cand.size:
+            return [None] * len(points)
+
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cx, cy = self._xs[cand], self._ys[cand]
+        penalty = weight * self._load[cand][None, :] if weight else None
+        chunk = max(1, _BATCH_MATRIX_LIMIT // cand.size)
+        best_pos = np.empty(len(pts), dtype=np.int64)
+        best_dist = np.empty(len(pts), dtype=np.float64)
+
+        for a in range(0, len(pts), chunk):
+            b = min(a + chunk, len(pts))
+            dist = np.hypot(pts[a:b, 0:1] - cx[None, :], pts[a:b, 1:2] - cy[None, :])
+            dist[~(dist <= max_distance)] = inf
+            rank = dist + penalty if penalty is not None else dist
+            # argmin = πρώτη εμφάνιση, άρα σε ισοπαλία κερδίζει η σειρά layout
+            pos = rank.argmin(axis=1)
+            best_pos[a:b] = pos
+            best_dist[a:b] = dist[np.arange(b - a), pos]
+
+        return [
+            (i, d) if d != inf else None
+            for i, d in zip(cand[best_pos].tolist(), best_dist.tolist())
+        ]
 
     def get_all_screens(self) -> list[Screen]:
         """Χρήσιμο για debugging / testing."""
-        return list(self._screens)
+        return self._materialize(np.arange(self._n))
 
     def build_keys(
         self,
@@ -201,21 +1173,13 @@ class MultiDimScreenIndex:
     ) -> list[MultiIndexKey]:
         """
         Δημιουργεί μια λίστα από MultiIndexKey αντικείμενα
-        για ΟΛΑ τα screens του γηπέδου.
-
-        Προς το παρόν:
-        - βάζουμε ίδια ad_category / time_window σε όλα,
-          όπως τα δώσει το endpoint.
+        για όσα screens δέχονται το ad_category / time_window
+        (χωρίς τιμή: όλα τα screens του γηπέδου).
         """
-        return [
-            MultiIndexKey.from_screen(
-                screen,
-                ad_category=ad_category,
-                time_window=time_window,
-            )
-            for screen in self._screens
-        ]
-
+        filters = self._filters(None, ad_category, time_window)
+        if filters is None:
+            return []
+        return self._keys(self._candidates(None, filters, limit=self._n), ad_category, time_window)
 
     def recommend_screen(
         self,
@@ -226,57 +1190,285 @@ class MultiDimScreenIndex:
         screen_type: str | None = None,
         ad_category: str | None = None,
         time_window: str | None = None,
+        occupancy: str | None = None,
     ) -> tuple[MultiIndexKey, float] | None:
         """
         Βρίσκει την "καλύτερη" οθόνη για μια διαφήμιση γύρω από ένα σημείο (x, y).
 
         Βήματα:
-        1) Παίρνουμε όλα τα κοντινά screens (query_near)
-        2) Αν έχει δοθεί screen_type, φιλτράρουμε
-        3) Επιλέγουμε αυτό με τη μικρότερη απόσταση
-        4) Γυρνάμε (MultiIndexKey, distance)
+        1) Τομή των inverted indexes (screen_type, ad_category, time_window)
+        2) Best-first kNN (k=1) με φίλτρα zone_id / radius πάνω σε αυτήν
+        3) Γυρνάμε (MultiIndexKey, distance)
 
-        Προς το παρόν η "ποιότητα" = μικρότερη γεωμετρική απόσταση.
-        Αργότερα μπορεί να προσθέσω scoring (π.χ. Megatron > GlassFloor).
+        "Ποιότητα" = μικρότερη απόσταση, διορθωμένη με το occupancy policy
+        (None = OCCUPANCY_POLICY): skip παραλείπει τις γεμάτες οθόνες,
+        penalize τις "απομακρύνει" ανάλογα με το φορτίο τους, off = μόνο γεωμετρία.
         """
-        # 1) Κοντινά υποψήφια
-        candidates = self.query_near(x=x, y=y, radius=radius, zone_id=zone_id)
+        # 1) + 2) Το πιο κοντινό (λιγότερο φορτωμένο) screen που περνάει τα φίλτρα
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None:
+            return None
+        weight = self._occupancy(filters, occupancy)
+        idx, dist = self._nearest(x, y, 1, zone_id, filters, radius, weight)
+        if not idx.size:
+            return None
 
-        # 2) Φίλτρο screen_type (αν ζητηθεί)
-        if screen_type is not None:
-            candidates = [s for s in candidates if s.screen_type == screen_type]
+        # 3) Φτιάξε το κλειδί (κατευθείαν από τα columns, χωρίς Screen)
+        key = self._keys(idx, ad_category, time_window)[0]
 
-        if not candidates:
-            return None
+        return key, float(dist[0])
 
-        # 3) Βρες το πιο κοντινό
-        def distance_to_screen(s: Screen) -> float:
-            return hypot(float(s.col) - x, float(s.row) - y)
+    def recommend_screens(
+        self,
+        points: list[tuple[float, float]],
+        radius: float = 10.0,
+        zone_id: str | None = None,
+        screen_type: str | None = None,
+        ad_category: str | None = None,
+        time_window: str | None = None,
+        occupancy: str | None = None,
+    ) -> list[tuple[MultiIndexKey, float] | None]:
+        """
+        Batched recommend_screen: ίδια φίλτρα, πολλά σημεία,
+        ένα αποτέλεσμα (ή None) ανά σημείο με την ίδια σειρά.
+        """
+        filters = self._filters(screen_type, ad_category, time_window)
+        if filters is None:
+            return [None] * len(points)
+        weight = self._occupancy(filters, occupancy)
+        found = self._nearest_many(points, zone_id, filters, radius, weight)
+        keys = iter(self._keys([f[0] for f in found if f is not None], ad_category, time_window))
+        return [(next(keys), f[1]) if f is not None else None for f in found]
 
-        best_screen = min(candidates, key=distance_to_screen)
-        best_distance = distance_to_screen(best_screen)
 
-        # 4) Φτιάξε το κλειδί
-        key = MultiIndexKey.from_screen(
-            best_screen,
-            ad_category=ad_category,
-            time_window=time_window,
-        )
+# ------------------------------------------
+#  LAYOUT SNAPSHOT + HOT RELOAD
+# ------------------------------------------
+
+
+class LayoutSnapshot:
+    """
+    Αμετάβλητο στιγμιότυπο της διάταξης: χτίζεται ΜΙΑ φορά και το
+    μοιράζονται το GET /layout και ο MultiDimScreenIndex.
+
+    - index: ο (columnar) MultiDimScreenIndex
+    - body: το JSON του GET /layout, ήδη serialized (ίδια bytes με το
+      response_model=list[Zone] του FastAPI)
+    - etag: strong ETag του body, για If-None-Match -> 304
+    """
+
+    __slots__ = ("index", "body", "etag")
+
+    def __init__(self, index: MultiDimScreenIndex) -> None:
+        self.index = index
+        self.body: bytes = _encode_layout(index)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("LayoutSnapshot is immutable")
+        object.__setattr__(self, name, value)
+
+
+# Screens ανά chunk του encoder (φραγμένη ενδιάμεση μνήμη)
+_ENCODE_CHUNK = 10_000
+
+# Screen χωρίς tags/metadata, ίδια σειρά πεδίων / separators με το json.dumps
+_SCREEN_JSON = '{"id":%s,"zone_id":%s,"row":%d,"col":%d,%s'
+_SCREEN_JSON_TAIL = '"screen_type":%s,"tags":[],"metadata":{},"ad_categories":%s,"time_windows":%s}'
+
+
+def _dumps(obj) -> str:
+    # Οι ρυθμίσεις του JSONResponse του FastAPI
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def _encode_layout(index: MultiDimScreenIndex) -> bytes:
+    """
+    list[Zone] -> JSON κατευθείαν από τα columns (ίδια bytes με το
+    response_model του FastAPI), χωρίς Zone/Screen ή dict ανά screen:
+    τα strings γίνονται escape με τον encoder του json (ensure_ascii=False),
+    zone_id / screen_type μία φορά ανά code.
+    """
+    encode_str = json.encoder.encode_basestring
+    zone_json = [encode_str(name) for name in index._zone_names]
+    # screen_type + ad_categories + time_windows: ένα έτοιμο κομμάτι ανά
+    # συνδυασμό codes (είναι ελάχιστοι), με key (t * n_cat + c) * n_win + w
+    n_cat, n_win = len(index._category_sets), len(index._window_sets)
+    tail_json = [
+        _SCREEN_JSON_TAIL % (encode_str(type_name), _dumps(list(categories)), _dumps(list(windows)))
+        for type_name in index._type_names
+        for categories in index._category_sets
+        for windows in index._window_sets
+    ]
+    blob, off, extras = index._id_blob, index._id_off, index._extras
+
+    parts: list[str] = []
+    for zone in index._zones:
+        screens: list[str] = []
+        for a in range(zone.start, zone.end, _ENCODE_CHUNK):
+            b = min(a + _ENCODE_CHUNK, zone.end)
+            rows = index._ys[a:b].astype(np.int64).tolist()
+            cols = index._xs[a:b].astype(np.int64).tolist()
+            tails = (
+                (index._type_col[a:b].astype(np.int64) * n_cat + index._category_col[a:b]) * n_win
+                + index._window_col[a:b]
+            ).tolist()
+            for i, s, e, z, row, col, tail in zip(
+                range(a, b),
+                off[a:b].tolist(),
+                off[a + 1:b + 1].tolist(),
+                index._zone_col[a:b].tolist(),
+                rows,
+                cols,
+                tails,
+            ):
+                if i in extras:
+                    screens.append(_dumps(index._screen_dicts([i])[0]))
+                else:
+                    screens.append(_SCREEN_JSON % (
+                        encode_str(blob[s:e]), zone_json[z], row, col, tail_json[tail],
+                    ))
+        parts.append(_dumps(zone.header())[:-1] + ',"screens":[' + ",".join(screens) + "]}")
+    return ("[" + ",".join(parts) + "]").encode("utf-8")
+
+
+_LAYOUT_ERRORS = (OSError, ValueError, KeyError, TypeError, AttributeError)
+
+
+class LayoutStore:
+    """
+    Κρατάει το τρέχον LayoutSnapshot του LAYOUT_FILE.
+
+    - reload(): διαβάζει το αρχείο, χτίζει ΝΕΟ snapshot (zones + index + body)
+      και κάνει atomic swap της αναφοράς. Όποιο request έχει ήδη πάρει το
+      παλιό snapshot (ή τον index του) συνεχίζει πάνω σε αυτό, συνεπές.
+      Άκυρο αρχείο δεν αγγίζει το τρέχον layout.
+    - Watcher (asyncio task): κοιτάει το mtime κάθε reload_interval
+      δευτερόλεπτα και, αν άλλαξε, κάνει το build σε thread (to_thread),
+      ώστε το event loop να μην μπλοκάρει σε μεγάλα layouts.
+    """
+
+    def __init__(
+        self,
+        path: str = LAYOUT_FILE,
+        reload_interval: float = LAYOUT_RELOAD_INTERVAL,
+        cell_size: float = LAYOUT_GRID_CELL_SIZE,
+    ) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self.cell_size = cell_size
+
+        self._snapshot: LayoutSnapshot | None = None
+        self._mtime: float | None = None
+        self._lock = threading.Lock()  # ένα build τη φορά
+        self._task: asyncio.Task | None = None
+
+        self.version = 0
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_build_ms: float | None = None
+        self.last_error: str | None = None
+
+    def current(self) -> LayoutSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Πρώτο load: χωρίς παλιό layout, το λάθος ανεβαίνει στον caller
+            snapshot = self.reload()
+        return snapshot
+
+    def reload(self) -> LayoutSnapshot:
+        """Ξαναδιαβάζει το αρχείο και αντικαθιστά ατομικά το snapshot."""
+        with self._lock:
+            t0 = time.perf_counter()
+            try:
+                mtime = os.stat(self.path).st_mtime
+                # Και σε αποτυχία: το ίδιο (χαλασμένο) αρχείο δεν ξαναδοκιμάζεται
+                self._mtime = mtime
+                snapshot = self._build()
+            except _LAYOUT_ERRORS as e:
+                self.reload_failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[LAYOUT] reload FAILED ({self.path}): {self.last_error}")
+                raise
+
+            # Το τρέχον φορτίο των οθονών περνάει στον νέο index ΠΡΙΝ το swap
+            screen_occupancy.attach(snapshot.index)
+            self._snapshot = snapshot
+            self.version += 1
+            self.reloads += 1
+            self.last_error = None
+            self.last_build_ms = round((time.perf_counter() - t0) * 1000, 1)
+            print(
+                f"[LAYOUT] loaded {self.path} (v{self.version}): {len(snapshot.index.zone_ids)} zones, "
+                f"{len(snapshot.index)} screens in {self.last_build_ms} ms"
+            )
+            return snapshot
+
+    def _build(self) -> LayoutSnapshot:
+        columns = LayoutService.load_layout(self.path)
+        return LayoutSnapshot(MultiDimScreenIndex.from_columns(columns, self.cell_size))
+
+    # -----------------------------
+    #  WATCHER
+    # -----------------------------
+
+    async def start(self) -> None:
+        if self.reload_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                try:
+                    await asyncio.to_thread(self.reload)
+                except _LAYOUT_ERRORS:
+                    pass  # ήδη logged, μένει το παλιό layout
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "path": self.path,
+            "version": self.version,
+            "etag": snapshot.etag if snapshot is not None else None,
+            "zones": len(snapshot.index.zone_ids) if snapshot is not None else 0,
+            "screens": len(snapshot.index) if snapshot is not None else 0,
+            "watching": self._task is not None and not self._task.done(),
+            "reload_interval": self.reload_interval,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_build_ms": self.last_build_ms,
+            "last_error": self.last_error,
+        }
+
 
-        return key, best_distance
+# SINGLETON (ένα layout ανά process)
+layout_store = LayoutStore()
 
 
-# SINGLETON (ένα index για όλο το backend)
-_INDEX: MultiDimScreenIndex | None = None
+def get_layout_snapshot() -> LayoutSnapshot:
+    return layout_store.current()
 
 
 def get_screen_index() -> MultiDimScreenIndex:
     """
-    Lazy δημιουργία του index.
+    Ο index του τρέχοντος layout snapshot.
     Καλείται από τα endpoints του main.py.
+    Κάθε request τον παίρνει ΜΙΑ φορά, ώστε ένα reload στη μέση
+    να μη δώσει ανάμεικτα αποτελέσματα.
     """
-    global _INDEX
-    if _INDEX is None:
-        zones = LayoutService.get_layout()
-        _INDEX = MultiDimScreenIndex(zones)
-    return _INDEX
+    return get_layout_snapshot().index
@@ -0,0 +1,167 @@
+# backend/app/services/occupancy.py
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Optional, Tuple
+
+from app.models.placement_models import AdPlacement
+
+# Πώς λαμβάνει υπόψη το recommendation τις "γεμάτες" οθόνες:
+# - skip: οθόνες με >= capacity αναθέσεις μέσα στο window δεν προτείνονται
+# - penalize: απόσταση + penalty * (αναθέσεις / capacity), πιο κοντινή "φθηνότερη"
+# - off: μόνο γεωμετρία (όπως πριν)
+OCCUPANCY_POLICIES = ("skip", "penalize", "off")
+OCCUPANCY_POLICY = os.getenv("OCCUPANCY_POLICY", "penalize").lower()
+# Sliding window: μια ανάθεση "βαραίνει" την οθόνη τόσα δευτερόλεπτα
+OCCUPANCY_WINDOW_SECONDS = float(os.getenv("OCCUPANCY_WINDOW_SECONDS", "300"))
+# Αναθέσεις ανά window που "χωράει" μια οθόνη
+OCCUPANCY_CAPACITY = int(os.getenv("OCCUPANCY_CAPACITY", "1"))
+# Grid units που προστίθενται στην απόσταση ανά γεμάτο capacity (policy=penalize)
+OCCUPANCY_PENALTY = float(os.getenv("OCCUPANCY_PENALTY", "2.0"))
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    # Το assigned_at είναι naive UTC (datetime.utcnow())
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class ScreenOccupancy:
+    """
+    Πόσες αναθέσεις έχει κάθε οθόνη μέσα στο τελευταίο window.
+
+    - record(): O(1) — ένα append στο deque των γεγονότων και +1 στο
+      counter της οθόνης (dict) ΚΑΙ στο load array του index.
+    - expire(): τα γεγονότα βγαίνουν από αριστερά μόλις παλιώσουν
+      (O(1) amortized), με -1 στα ίδια counters.
+    - Το load array ζει στον MultiDimScreenIndex (ίδιες θέσεις με τα
+      columns του), ώστε το recommendation να το διαβάζει vectorized
+      για τους υποψηφίους, χωρίς να σκανάρει τη λίστα των placements.
+      Σε hot reload, attach() ξαναγεμίζει το array του νέου index από
+      τα counters (O(οθόνες με φορτίο)).
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = OCCUPANCY_WINDOW_SECONDS,
+        capacity: int = OCCUPANCY_CAPACITY,
+        penalty: float = OCCUPANCY_PENALTY,
+        policy: str = OCCUPANCY_POLICY,
+    ) -> None:
+        if policy not in OCCUPANCY_POLICIES:
+            raise ValueError(f"OCCUPANCY_POLICY must be one of {OCCUPANCY_POLICIES}, got '{policy}'")
+        self.window = window_seconds
+        self.capacity = max(1, capacity)
+        self.penalty = penalty
+        self.policy = policy
+
+        self._lock = threading.Lock()
+        self._events: Deque[Tuple[float, str]] = deque()  # (epoch, screen_id), μη φθίνουσα σειρά
+        self._counts: Dict[str, int] = {}
+        self._where: Dict[str, Tuple[str, float, float]] = {}  # screen_id -> (zone_id, x, y)
+
+        # Ο index στον οποίο γράφουμε + cache screen_id -> θέση (-1 = άγνωστη)
+        self._index = None
+        self._positions: Dict[str, int] = {}
+
+        self.recorded = 0
+        self.expired = 0
+
+    # -----------------------------
+    #  WRITE
+    # -----------------------------
+
+    def attach(self, index) -> None:
+        """Νέο layout snapshot: το φορτίο μεταφέρεται στο load array του."""
+        with self._lock:
+            self._index = index
+            self._positions = {}
+            for screen_id, count in self._counts.items():
+                pos = self._position(screen_id)
+                if pos >= 0:
+                    index.set_load(pos, count)
+
+    def record(self, placement: AdPlacement) -> None:
+        if self.window <= 0:
+            return
+        ts = _epoch_seconds(placement.assigned_at)
+        screen_id = placement.screen_id
+        with self._lock:
+            # Το expire θέλει μη φθίνουσα σειρά (π.χ. placements από άλλο worker)
+            if self._events and ts < self._events[-1][0]:
+                ts = self._events[-1][0]
+            self._events.append((ts, screen_id))
+            self._counts[screen_id] = self._counts.get(screen_id, 0) + 1
+            self._where[screen_id] = (placement.zone_id, placement.x, placement.y)
+            self.recorded += 1
+
+            pos = self._position(screen_id)
+            if pos >= 0:
+                self._index.add_load(pos, 1)
+
+            self._expire(time.time())
+
+    def expire(self, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+
+    def _expire(self, now: float) -> None:
+        # Καλείται με το lock
+        cutoff = now - self.window
+        events = self._events
+        while events and events[0][0] < cutoff:
+            _ts, screen_id = events.popleft()
+            self.expired += 1
+            pos = self._position(screen_id)
+            if pos >= 0:
+                self._index.add_load(pos, -1)
+            count = self._counts[screen_id] - 1
+            if count:
+                self._counts[screen_id] = count
+            else:
+                del self._counts[screen_id]
+                del self._where[screen_id]
+                self._positions.pop(screen_id, None)
+
+    def _position(self, screen_id: str) -> int:
+        # Καλείται με το lock· ένα binary search ανά οθόνη και index, μετά O(1)
+        pos = self._positions.get(screen_id)
+        if pos is None:
+            pos = -1
+            if self._index is not None:
+                zone_id, x, y = self._where[screen_id]
+                found = self._index.screen_position(zone_id, y, x, screen_id)
+                if found is not None:
+                    pos = found
+            self._positions[screen_id] = pos
+        return pos
+
+    # -----------------------------
+    #  READ
+    # -----------------------------
+
+    def load(self, screen_id: str) -> int:
+        with self._lock:
+            return self._counts.get(screen_id, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "window_seconds": self.window,
+                "capacity": self.capacity,
+                "penalty": self.penalty,
+                "events": len(self._events),
+                "busy_screens": sum(1 for count in self._counts.values() if count >= self.capacity),
+                "loaded_screens": len(self._counts),
+                "recorded": self.recorded,
+                "expired": self.expired,
+            }
+
+
+# SINGLETON (ένα view ανά process· τα placements άλλων workers έρχονται από το bus)
+screen_occupancy = ScreenOccupancy()
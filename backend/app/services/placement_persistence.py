@@ -0,0 +1,218 @@
+# backend/app/services/placement_persistence.py
+
+import asyncio
+import os
+from collections import deque
+from typing import Deque, List, Optional
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.config import DBPoolTimeout, db_connection
+from app.models.placement_models import AdPlacement
+
+PLACEMENTS_FLUSH_INTERVAL = float(os.getenv("PLACEMENTS_FLUSH_INTERVAL", "0.5"))
+PLACEMENTS_FLUSH_BATCH = int(os.getenv("PLACEMENTS_FLUSH_BATCH", "500"))
+# Αν η βάση είναι down, κρατάμε μέχρι τόσες εκκρεμείς εγγραφές (μετά drop των παλαιότερων)
+PLACEMENTS_MAX_PENDING = int(os.getenv("PLACEMENTS_MAX_PENDING", "100000"))
+# Ένα batch που αποτυγχάνει για λόγο ΕΚΤΟΣ σύνδεσης (π.χ. constraint) πετιέται μετά από τόσες προσπάθειες
+PLACEMENTS_MAX_RETRIES = int(os.getenv("PLACEMENTS_MAX_RETRIES", "5"))
+
+# Η βάση είναι απλά unreachable: ξαναδοκιμάζουμε χωρίς όριο προσπαθειών (μόνο max_pending)
+_TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, DBPoolTimeout)
+
+_COLUMNS = (
+    "ad_id",
+    "screen_id",
+    "zone_id",
+    "x",
+    "y",
+    "screen_type",
+    "ad_category",
+    "time_window",
+    "assigned_at",
+)
+
+
+class PlacementWriteBehind:
+    """
+    Write-behind ουρά για τον πίνακα placements.
+
+    - enqueue(): O(1), χωρίς I/O, ώστε το assign_ad να μένει in-memory γρήγορο.
+    - Ένα background task αδειάζει την ουρά κάθε flush_interval (ή νωρίτερα
+      όταν μαζευτεί ένα batch) με multi-row INSERT σε worker thread.
+    - Αν αποτύχει το INSERT, το batch ξαναμπαίνει μπροστά στην ουρά
+      και ξαναδοκιμάζουμε στο επόμενο flush· το max_pending ισχύει και
+      μετά το requeue (drop των παλαιότερων).
+    - Αποτυχίες που δεν είναι θέμα σύνδεσης (π.χ. μια "δηλητηριώδης"
+      γραμμή που σπάει constraint) μετράνε ανά batch: μετά από
+      max_retries το batch γίνεται dead-letter (log των γραμμών + drop),
+      ώστε να μη μπλοκάρει για πάντα την ουρά πίσω του.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = PLACEMENTS_FLUSH_INTERVAL,
+        batch_size: int = PLACEMENTS_FLUSH_BATCH,
+        max_pending: int = PLACEMENTS_MAX_PENDING,
+        max_retries: int = PLACEMENTS_MAX_RETRIES,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_retries = max(1, max_retries)
+
+        self._pending: Deque[AdPlacement] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+        # Τα πρώτα _retry_rows στοιχεία του _pending είναι ένα batch που έχει
+        # ήδη αποτύχει _retry_attempts φορές (το επόμενο flush τα ξαναπαίρνει πρώτα)
+        self._retry_rows = 0
+        self._retry_attempts = 0
+
+        self._written = 0
+        self._dropped = 0
+        self._failures = 0
+        self._dead_lettered = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, placement: AdPlacement) -> None:
+        # ΜΟΝΟ από το event loop (assign_ad): το _pending το αλλάζουν και τα
+        # flush/requeue του writer task χωρίς lock.
+        # Χωρίς lifespan (π.χ. script) δεν υπάρχει writer: μένουμε μόνο in-memory
+        if not self.running:
+            return
+
+        if len(self._pending) >= self.max_pending:
+            self._drop_oldest(len(self._pending) - self.max_pending + 1)
+        self._pending.append(placement)
+
+        if len(self._pending) >= self.batch_size:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Σταματάει το task και κάνει ένα τελικό flush."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            # Το batch ξεκινάει πάντα από τις γραμμές του προηγούμενου αποτυχημένου
+            attempts = self._retry_attempts if self._retry_rows else 0
+            self._retry_rows = self._retry_attempts = 0
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                self._failures += 1
+                self._requeue(batch, attempts, e)
+                return
+            self._written += len(batch)
+
+    def _requeue(self, batch: List[AdPlacement], attempts: int, error: Exception) -> None:
+        if not isinstance(error, _TRANSIENT_ERRORS):
+            attempts += 1
+
+        if attempts >= self.max_retries:
+            self._dead_letter(batch, attempts, error)
+            return
+
+        retry = f", attempt {attempts}/{self.max_retries}" if attempts else ""
+        print(f"[DB] placements flush FAILED ({len(batch)} rows{retry}): {error}")
+        self._pending.extendleft(reversed(batch))
+        self._retry_rows = len(batch)
+        self._retry_attempts = attempts
+        if len(self._pending) > self.max_pending:
+            self._drop_oldest(len(self._pending) - self.max_pending)
+
+    def _dead_letter(self, batch: List[AdPlacement], attempts: int, error: Exception) -> None:
+        self._dead_lettered += len(batch)
+        print(
+            f"[DB] placements batch DROPPED after {attempts} attempts "
+            f"({len(batch)} rows): {error}"
+        )
+        for p in batch:
+            print(f"[DB]   dropped placement {tuple(getattr(p, col) for col in _COLUMNS)}")
+
+    def _drop_oldest(self, count: int) -> None:
+        for _ in range(count):
+            self._pending.popleft()
+        self._dropped += count
+        self._retry_rows = max(0, self._retry_rows - count)
+
+    @staticmethod
+    def _write_batch(batch: List[AdPlacement]) -> None:
+        rows = [tuple(getattr(p, col) for col in _COLUMNS) for p in batch]
+        with db_connection() as conn:
+            cur = conn.cursor()
+            execute_values(
+                cur,
+                f"INSERT INTO placements ({', '.join(_COLUMNS)}) VALUES %s",
+                rows,
+                page_size=len(rows),
+            )
+            cur.close()
+            conn.commit()
+
+    @staticmethod
+    def load_active() -> List[AdPlacement]:
+        """Η τελευταία ανάθεση ανά οθόνη από τη βάση (για warm-load στην εκκίνηση)."""
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT DISTINCT ON (screen_id) {', '.join(_COLUMNS)}
+                FROM placements
+                ORDER BY screen_id, assigned_at DESC, id DESC;
+                """
+            )
+            rows = cur.fetchall()
+            cur.close()
+
+        placements = [AdPlacement(**dict(zip(_COLUMNS, row))) for row in rows]
+        placements.sort(key=lambda p: p.assigned_at)
+        return placements
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "written": self._written,
+            "dropped": self._dropped,
+            "failures": self._failures,
+            "dead_lettered": self._dead_lettered,
+        }
+
+
+# SINGLETON (ένας writer ανά process, τον ξεκινάει το lifespan)
+placement_writer = PlacementWriteBehind()
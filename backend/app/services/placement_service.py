@@ -1,25 +1,196 @@
 # backend/app/services/placement_service.py
 
-from datetime import datetime
-from typing import List
+import os
+import threading
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
 
 from app.models.placement_models import AdPlacement
 from app.models.layout_models import MultiIndexKey
+from app.services.occupancy import ScreenOccupancy, screen_occupancy
+from app.services.placement_persistence import placement_writer
+
+# Retention του ιστορικού (το "active ανά οθόνη" view δεν γίνεται ποτέ evict)
+PLACEMENTS_MAX_HISTORY = int(os.getenv("PLACEMENTS_MAX_HISTORY", "200000"))
+PLACEMENTS_RETENTION_SECONDS = float(os.getenv("PLACEMENTS_RETENTION_SECONDS", "0"))  # 0 = χωρίς χρονικό όριο
+
+
+class PlacementStore:
+    """
+    In-memory αποθήκη αναθέσεων με secondary indexes.
+
+    - _log: όλες οι αναθέσεις σε χρονική σειρά (list + head offset,
+      ώστε το eviction από την αρχή να είναι O(1) amortized)
+    - _by_screen / _by_zone / _by_ad: deques ανά κλειδί, στην ίδια σειρά
+      με το _log, άρα το παλαιότερο στοιχείο είναι πάντα αριστερά
+    - _times: assigned_at του _log για range queries με bisect
+    - _active: η τελευταία ανάθεση ανά οθόνη
+
+    Η μνήμη φράσσεται από max_history (πλήθος) και retention_seconds (ηλικία).
+    """
+
+    def __init__(
+        self,
+        max_history: int = PLACEMENTS_MAX_HISTORY,
+        retention_seconds: float = PLACEMENTS_RETENTION_SECONDS,
+    ) -> None:
+        self.max_history = max_history
+        self.retention = timedelta(seconds=retention_seconds) if retention_seconds > 0 else None
+
+        self._lock = threading.Lock()
+        self._log: List[AdPlacement] = []
+        self._times: List[datetime] = []
+        self._head = 0
+
+        self._by_screen: Dict[str, Deque[AdPlacement]] = {}
+        self._by_zone: Dict[str, Deque[AdPlacement]] = {}
+        self._by_ad: Dict[int, Deque[AdPlacement]] = {}
+        self._active: Dict[str, AdPlacement] = {}
+
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._log) - self._head
+
+    # -----------------------------
+    #  WRITE
+    # -----------------------------
+
+    def add(self, placement: AdPlacement) -> None:
+        with self._lock:
+            # Το time index θέλει μη φθίνουσα σειρά (π.χ. αν γυρίσει πίσω το ρολόι)
+            ts = placement.assigned_at
+            if self._times and ts < self._times[-1]:
+                ts = self._times[-1]
+
+            self._log.append(placement)
+            self._times.append(ts)
+            self._by_screen.setdefault(placement.screen_id, deque()).append(placement)
+            self._by_zone.setdefault(placement.zone_id, deque()).append(placement)
+            self._by_ad.setdefault(placement.ad_id, deque()).append(placement)
+            self._active[placement.screen_id] = placement
+
+            self._evict(ts)
+
+    def _evict(self, now: datetime) -> None:
+        cutoff = now - self.retention if self.retention is not None else None
+        while len(self) > 0 and (
+            len(self) > self.max_history
+            or (cutoff is not None and self._times[self._head] < cutoff)
+        ):
+            old = self._log[self._head]
+            self._log[self._head] = None  # type: ignore[assignment]
+            self._head += 1
+            self._evicted += 1
+            self._pop_index(self._by_screen, old.screen_id)
+            self._pop_index(self._by_zone, old.zone_id)
+            self._pop_index(self._by_ad, old.ad_id)
+
+        # Συμπίεση όταν τα "νεκρά" slots είναι πάνω από τα μισά
+        if self._head > 1024 and self._head * 2 > len(self._log):
+            del self._log[: self._head]
+            del self._times[: self._head]
+            self._head = 0
+
+    @staticmethod
+    def _pop_index(index: dict, key) -> None:
+        bucket = index[key]
+        bucket.popleft()
+        if not bucket:
+            del index[key]
+
+    # -----------------------------
+    #  READ
+    # -----------------------------
+
+    def all(self) -> List[AdPlacement]:
+        with self._lock:
+            return self._log[self._head:]
+
+    def by_screen(self, screen_id: str) -> List[AdPlacement]:
+        with self._lock:
+            return list(self._by_screen.get(screen_id, ()))
+
+    def by_zone(self, zone_id: str) -> List[AdPlacement]:
+        with self._lock:
+            return list(self._by_zone.get(zone_id, ()))
+
+    def by_ad(self, ad_id: int) -> List[AdPlacement]:
+        with self._lock:
+            return list(self._by_ad.get(ad_id, ()))
+
+    def between(self, since: datetime, until: Optional[datetime] = None) -> List[AdPlacement]:
+        """Αναθέσεις με since <= assigned_at < until (O(log n) + μέγεθος αποτελέσματος)."""
+        with self._lock:
+            lo = bisect_left(self._times, since, lo=self._head)
+            hi = len(self._log) if until is None else bisect_left(self._times, until, lo=lo)
+            return self._log[lo:hi]
+
+    def page(
+        self,
+        after: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple[List[AdPlacement], int]:
+        """
+        Keyset pagination πάνω στη θέση στο log.
+
+        Κάθε ανάθεση έχει σταθερή θέση 1, 2, 3, ... (δεν αλλάζει με το
+        eviction)· επιστρέφει τις επόμενες `limit` με θέση > after (και
+        προαιρετικά μέσα στο [since, until)) μαζί με τη θέση της τελευταίας.
+        """
+        with self._lock:
+            lo = self._head + max(0, after - self._evicted)
+            if since is not None:
+                lo = max(lo, bisect_left(self._times, since, lo=self._head))
+            hi = len(self._log) if until is None else bisect_left(self._times, until, lo=self._head)
+            end = min(hi, lo + limit)
+            items = self._log[lo:end] if lo < end else []
+            return items, self._evicted + (max(lo, end) - self._head)
+
+    def active(self) -> List[AdPlacement]:
+        with self._lock:
+            return list(self._active.values())
+
+    def active_for_screen(self, screen_id: str) -> Optional[AdPlacement]:
+        return self._active.get(screen_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "history": len(self),
+                "active_screens": len(self._active),
+                "evicted": self._evicted,
+                "max_history": self.max_history,
+                "retention_seconds": self.retention.total_seconds() if self.retention else None,
+            }
 
 
 class PlacementService:
     """
-    Απλός in-memory πίνακας αναθέσεων.
-    Δεν ακουμπάει βάση – όλα ζουν στη RAM του backend.
+    In-memory πίνακας αναθέσεων (PlacementStore) με write-behind
+    persistence στον πίνακα placements.
+
+    Τα reads δεν ακουμπάνε ποτέ βάση. Τα writes μπαίνουν σε ουρά
+    (placement_writer) και γράφονται batched στο background.
+    Κάθε ανάθεση (τοπική, warm-load ή από άλλο worker) ενημερώνει και
+    το occupancy των οθονών που διαβάζει το recommendation.
     """
 
-    _placements: List[AdPlacement] = []
+    _store: PlacementStore = PlacementStore()
+    _occupancy: ScreenOccupancy = screen_occupancy
 
     @classmethod
     def assign_ad(cls, ad_id: int, key: MultiIndexKey) -> AdPlacement:
         """
         Δημιουργεί μια νέα ανάθεση διαφήμισης σε οθόνη,
-        την αποθηκεύει στη λίστα και την επιστρέφει.
+        την αποθηκεύει στο store και την επιστρέφει.
+
+        Καλείται από το event loop (όχι από worker thread): ενημερώνει
+        και το occupancy και την ουρά του write-behind.
         """
         placement = AdPlacement(
             ad_id=ad_id,
@@ -32,15 +203,75 @@ class PlacementService:
             time_window=key.time_window,
             assigned_at=datetime.utcnow(),
         )
-        cls._placements.append(placement)
+        cls._store.add(placement)
+        cls._occupancy.record(placement)
+        placement_writer.enqueue(placement)
         return placement
 
+    @classmethod
+    def warm_load(cls, placements: List[AdPlacement]) -> None:
+        """
+        Γεμίζει το store με ήδη αποθηκευμένες αναθέσεις (π.χ. στην εκκίνηση),
+        χωρίς να τις ξαναγράψει στη βάση.
+        """
+        for placement in placements:
+            cls._store.add(placement)
+            cls._occupancy.record(placement)
+
+    @classmethod
+    def apply_remote(cls, placement: AdPlacement) -> None:
+        """
+        Ανάθεση που έγινε σε ΑΛΛΟ worker (ήρθε από το event bus):
+        μπαίνει στο store, αλλά τη γράφει στη βάση μόνο ο worker που την έκανε.
+        """
+        cls._store.add(placement)
+        cls._occupancy.record(placement)
+
     @classmethod
     def list_all(cls) -> List[AdPlacement]:
-        """Επιστρέφει όλες τις αναθέσεις."""
-        return list(cls._placements)
+        """Επιστρέφει όλες τις αναθέσεις (όσες κρατάει το retention)."""
+        return cls._store.all()
 
     @classmethod
     def list_by_screen(cls, screen_id: str) -> List[AdPlacement]:
         """Επιστρέφει όλες τις αναθέσεις για συγκεκριμένη οθόνη."""
-        return [p for p in cls._placements if p.screen_id == screen_id]
+        return cls._store.by_screen(screen_id)
+
+    @classmethod
+    def list_by_zone(cls, zone_id: str) -> List[AdPlacement]:
+        """Επιστρέφει όλες τις αναθέσεις για συγκεκριμένη ζώνη."""
+        return cls._store.by_zone(zone_id)
+
+    @classmethod
+    def list_by_ad(cls, ad_id: int) -> List[AdPlacement]:
+        """Επιστρέφει όλες τις αναθέσεις μιας διαφήμισης."""
+        return cls._store.by_ad(ad_id)
+
+    @classmethod
+    def list_between(cls, since: datetime, until: Optional[datetime] = None) -> List[AdPlacement]:
+        """Αναθέσεις σε χρονικό παράθυρο [since, until)."""
+        return cls._store.between(since, until)
+
+    @classmethod
+    def list_page(
+        cls,
+        after: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple[List[AdPlacement], int]:
+        """Σελίδα αναθέσεων (keyset στη θέση του log) + cursor της τελευταίας."""
+        return cls._store.page(after, limit, since, until)
+
+    @classmethod
+    def list_active(cls) -> List[AdPlacement]:
+        """Η τρέχουσα (τελευταία) ανάθεση ανά οθόνη."""
+        return cls._store.active()
+
+    @classmethod
+    def get_active(cls, screen_id: str) -> Optional[AdPlacement]:
+        return cls._store.active_for_screen(screen_id)
+
+    @classmethod
+    def stats(cls) -> dict:
+        return cls._store.stats()
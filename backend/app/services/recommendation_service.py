@@ -0,0 +1,127 @@
+# backend/app/services/recommendation_service.py
+
+import os
+from typing import Mapping, Sequence, Union
+
+from app.models.advertisement import Advertisement
+from app.models.layout_models import MultiIndexKey, RecommendationRequest
+from app.models.placement_models import AdPlacement
+from app.services.ad_cache import ad_cache
+from app.services.layout_service import get_screen_index
+from app.services.placement_service import PlacementService
+
+# Πάνω όριο στοιχείων ανά batch (HTTP και /ws/recommendation)
+RECOMMENDATION_BATCH_MAX = int(os.getenv("RECOMMENDATION_BATCH_MAX", "1000"))
+# Στοιχεία του batch recommend_and_assign ανά "βήμα" στο event loop
+RECOMMENDATION_ASSIGN_CHUNK = max(1, int(os.getenv("RECOMMENDATION_ASSIGN_CHUNK", "100")))
+
+ERR_AD_NOT_FOUND = "Advertisement not found"
+ERR_NO_SCREEN = "No suitable screen found"
+
+
+class RecommendationService:
+    """
+    Batch recommendations: πολλά (ad, σημείο) σε μία κλήση.
+
+    - Όλες οι διαφημίσεις έρχονται από την ad cache (τα misses με ΕΝΑ query).
+    - Τα στοιχεία ομαδοποιούνται ανά ίδια φίλτρα και κάθε ομάδα
+      περνάει από τον index ως ένα batch (recommend_screens).
+    - Τα αποτελέσματα επιστρέφονται με τη σειρά του request.
+    """
+
+    @staticmethod
+    def recommend_batch(
+        items: Sequence[RecommendationRequest],
+    ) -> list[Union[tuple[MultiIndexKey, float], str]]:
+        """
+        Για κάθε στοιχείο γυρνάει (MultiIndexKey, distance)
+        ή ένα μήνυμα λάθους (str), στην ίδια θέση.
+        """
+        results: list = [None] * len(items)
+
+        ads = ad_cache.get_many(
+            item.ad_id for item in items if item.ad_id is not None
+        )
+
+        # (zone_id, screen_type, radius, ad_category, time_window, occupancy) -> [(θέση, (x, y))]
+        groups: dict[tuple, list[tuple[int, tuple[float, float]]]] = {}
+        for pos, item in enumerate(items):
+            zone_id = item.zone_id
+            if item.ad_id is not None:
+                ad = ads.get(item.ad_id)
+                if ad is None:
+                    results[pos] = ERR_AD_NOT_FOUND
+                    continue
+                zone_id = ad.zone
+
+            group_key = (
+                zone_id,
+                item.screen_type,
+                item.radius,
+                item.ad_category,
+                item.time_window,
+                item.occupancy,
+            )
+            groups.setdefault(group_key, []).append((pos, (item.x, item.y)))
+
+        index = get_screen_index()
+        for (zone_id, screen_type, radius, ad_category, time_window, occupancy), members in groups.items():
+            found = index.recommend_screens(
+                [point for _pos, point in members],
+                radius=radius,
+                zone_id=zone_id,
+                screen_type=screen_type,
+                ad_category=ad_category,
+                time_window=time_window,
+                occupancy=occupancy,
+            )
+            for (pos, _point), result in zip(members, found):
+                results[pos] = result if result is not None else ERR_NO_SCREEN
+
+        return results
+
+    @staticmethod
+    def recommend_and_assign_batch(
+        items: Sequence[RecommendationRequest],
+        ads: Mapping[int, Advertisement],
+    ) -> list[Union[AdPlacement, str]]:
+        """
+        Batch recommend_and_assign (κάθε στοιχείο με ad_id): ένα placement
+        ή ένα μήνυμα λάθους (str) ανά στοιχείο, στην ίδια θέση.
+
+        Εδώ ΔΕΝ γίνεται ομαδοποίηση: κάθε στοιχείο προτείνεται και
+        ανατίθεται πριν από το επόμενο, ώστε το occupancy να βλέπει τις
+        αναθέσεις των προηγούμενων (ίδια συμπεριφορά με διαδοχικά single calls).
+
+        Οι διαφημίσεις (ads) έρχονται από την ad_cache.get_many ΠΡΙΝ (εκτός
+        event loop). Η ίδια η κλήση τρέχει ΣΤΟ event loop, όπως το single
+        recommend_and_assign: το assign γράφει το placement store, το
+        φορτίο του index και την ουρά του write-behind, που τα διαβάζουν
+        οι loop tasks χωρίς lock. Ο caller τη σπάει σε κομμάτια των
+        RECOMMENDATION_ASSIGN_CHUNK στοιχείων, για να μην κρατάει το loop.
+        """
+        index = get_screen_index()
+
+        results: list = []
+        for item in items:
+            ad = ads.get(item.ad_id)
+            if ad is None:
+                results.append(ERR_AD_NOT_FOUND)
+                continue
+            found = index.recommend_screen(
+                x=item.x,
+                y=item.y,
+                radius=item.radius,
+                zone_id=ad.zone,
+                screen_type=item.screen_type,
+                ad_category=item.ad_category,
+                time_window=item.time_window,
+                occupancy=item.occupancy,
+            )
+            if found is None:
+                results.append(ERR_NO_SCREEN)
+                continue
+            key, _distance = found
+            results.append(PlacementService.assign_ad(ad_id=ad.id, key=key))
+
+        return results
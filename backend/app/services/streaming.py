@@ -0,0 +1,31 @@
+# backend/app/services/streaming.py
+
+import json
+import os
+from typing import Any, Callable, Iterable, Iterator
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Πόσες γραμμές φέρνει ο server-side cursor / γράφονται ανά chunk
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+# Keyset pagination (after_id + limit)
+PAGE_LIMIT_DEFAULT = int(os.getenv("PAGE_LIMIT_DEFAULT", "100"))
+PAGE_LIMIT_MAX = int(os.getenv("PAGE_LIMIT_MAX", "1000"))
+
+# Header με τον cursor της επόμενης σελίδας (λείπει όταν δεν υπάρχει άλλη)
+NEXT_CURSOR_HEADER = "X-Next-After"
+
+
+def encode_line(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def ndjson_chunks(batches: Iterable[list], encode: Callable[[Any], str] = encode_line) -> Iterator[bytes]:
+    """
+    batches: iterator από λίστες (π.χ. fetchmany ή σελίδες του store)
+    -> ένα bytes chunk ανά batch, μία JSON γραμμή (encode(item)) ανά στοιχείο.
+    Στη μνήμη υπάρχει κάθε φορά μόνο ένα batch.
+    """
+    for batch in batches:
+        if batch:
+            yield "".join(encode(item) + "\n" for item in batch).encode("utf-8")
@@ -0,0 +1,313 @@
+# backend/app/websockets/bus.py
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from app.config import db_connection
+from app.services.ad_change_listener import AdChangeListener
+
+# inprocess (default, 1 worker) | postgres (πολλά hosts) | unix (πολλά workers στο ίδιο host)
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "inprocess").lower()
+EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "geo_ads_events")
+EVENT_BUS_DIR = os.getenv("EVENT_BUS_DIR", "/tmp/geo-ads-bus")
+EVENT_BUS_FLUSH_BATCH = int(os.getenv("EVENT_BUS_FLUSH_BATCH", "200"))
+# Στο shutdown: πόσο περιμένουμε να φύγουν τα εκκρεμή NOTIFY πριν τα πετάξουμε
+EVENT_BUS_DRAIN_TIMEOUT = float(os.getenv("EVENT_BUS_DRAIN_TIMEOUT", "2.0"))
+
+# Topics
+TOPIC_PLACEMENTS = "placements"
+TOPIC_ADS = "ads"
+
+# Όριο payload του NOTIFY στην Postgres (8000 bytes)
+_PG_NOTIFY_MAX = 7900
+
+Handler = Callable[[object], None]
+
+
+class EventBus:
+    """
+    Pub/sub ανάμεσα σε workers/nodes.
+
+    - publish(topic, data): sync και non-blocking· το τοπικό process έχει
+      ήδη εφαρμόσει το event, άρα το bus το πηγαίνει ΜΟΝΟ στους υπόλοιπους.
+    - subscribe(topic, handler): handler(data) μέσα στο event loop για
+      κάθε event που ήρθε από ΑΛΛΟ process (τα δικά μας αγνοούνται μέσω origin).
+
+    Η βάση κλάση είναι το in-process backend: ένας worker, τίποτα να μεταφερθεί.
+    """
+
+    backend = "inprocess"
+
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: Dict[str, List[Handler]] = {}
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, data) -> None:
+        self.published += 1
+        self._send(self._encode(topic, data))
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def _send(self, message: str) -> None:
+        pass
+
+    def _encode(self, topic: str, data) -> str:
+        return json.dumps({"o": self.origin, "t": topic, "d": data}, separators=(",", ":"))
+
+    def _deliver(self, message: Optional[str]) -> None:
+        if not message:
+            return
+        try:
+            envelope = json.loads(message)
+        except ValueError:
+            self.failed += 1
+            return
+        if envelope.get("o") == self.origin:
+            return
+
+        self.received += 1
+        for handler in self._handlers.get(envelope.get("t"), ()):
+            try:
+                handler(envelope.get("d"))
+            except Exception as e:
+                self.failed += 1
+                print(f"[BUS] {envelope.get('t')} handler FAILED: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed,
+        }
+
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY πάνω σε ένα κανάλι της βάσης (δουλεύει και ανάμεσα σε hosts).
+
+    - Receive: ο ίδιος async listener με τα ads (dedicated σύνδεση, add_reader,
+      reconnect με backoff), σε δικό του κανάλι.
+    - Send: τα μηνύματα μαζεύονται σε ουρά και ένα background task τα στέλνει
+      batched, με ΕΝΑ pg_notify query ανά batch από το pool.
+    - stop(): πρώτα αδειάζει η ουρά (το πολύ drain_timeout, με τη σειρά που
+      μπήκαν) και μετά σταματάει το task· ό,τι δεν πρόλαβε μετράει στα failed.
+    """
+
+    backend = "postgres"
+
+    def __init__(
+        self,
+        channel: str = EVENT_BUS_CHANNEL,
+        batch_size: int = EVENT_BUS_FLUSH_BATCH,
+        drain_timeout: float = EVENT_BUS_DRAIN_TIMEOUT,
+    ) -> None:
+        super().__init__()
+        self.channel = channel
+        self.batch_size = batch_size
+        self.drain_timeout = drain_timeout
+        self._listener = AdChangeListener(channel)
+        self._listener.add_callback(self._deliver)
+        self._pending: Deque[str] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sending = False  # ένα batch είναι στον worker thread (εκτός _pending)
+
+    def _send(self, message: str) -> None:
+        if self._task is None:
+            return
+        if len(message.encode("utf-8")) > _PG_NOTIFY_MAX:
+            self.failed += 1
+            print(f"[BUS] message too large for NOTIFY ({len(message)} chars), dropped")
+            return
+        self._pending.append(message)
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self._listener.start()
+
+    async def stop(self) -> None:
+        await self._listener.stop()
+        if self._task is None:
+            return
+
+        # Τα τελευταία events (π.χ. assigns λίγο πριν το shutdown) φεύγουν από
+        # το ίδιο task, άρα με τη σειρά τους· όχι cancel πάνω σε batch στη μέση
+        try:
+            await asyncio.wait_for(self._drain(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        task, self._task = self._task, None  # νέα publish δεν μπαίνουν πια στην ουρά
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        if self._pending:
+            self.failed += len(self._pending)
+            print(f"[BUS] stop: {len(self._pending)} messages not sent within {self.drain_timeout}s, dropped")
+            self._pending.clear()
+
+    async def _drain(self) -> None:
+        while (self._pending or self._sending) and not self._task.done():
+            self._wake.set()
+            await asyncio.sleep(0.01)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._pending:
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.batch_size, len(self._pending)))
+                ]
+                self._sending = True
+                try:
+                    await asyncio.to_thread(self._notify_batch, batch)
+                except Exception as e:
+                    # Τα events είναι best-effort (οι clients έχουν resync)
+                    self.failed += len(batch)
+                    print(f"[BUS] NOTIFY FAILED ({len(batch)} messages): {e}")
+                finally:
+                    self._sending = False
+
+    def _notify_batch(self, batch: List[str]) -> None:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT pg_notify(%s, m) FROM unnest(%s::text[]) WITH ORDINALITY AS t(m, n) ORDER BY n;",
+                (self.channel, batch),
+            )
+            cur.close()
+            conn.commit()
+
+    def stats(self) -> dict:
+        out = super().stats()
+        out.update({"connected": self._listener.connected, "pending": len(self._pending)})
+        return out
+
+
+class UnixSocketEventBus(EventBus):
+    """
+    Unix datagram sockets για workers στο ΙΔΙΟ host (χωρίς βάση στη μέση).
+
+    Κάθε worker κάνει bind ένα <origin>.sock στο EVENT_BUS_DIR και στέλνει
+    κάθε μήνυμα σε όλα τα υπόλοιπα .sock του καταλόγου. Sockets που δεν
+    απαντούν (νεκρός worker) σβήνονται. Το receive μπαίνει στο event loop
+    με add_reader, όπως ο LISTEN listener.
+    """
+
+    backend = "unix"
+
+    def __init__(self, directory: str = EVENT_BUS_DIR) -> None:
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.origin}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        if self._sock is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+        print(f"[BUS] unix socket bound at {self.path}")
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _peers(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith(".sock") and name != f"{self.origin}.sock"
+        ]
+
+    def _send(self, message: str) -> None:
+        if self._sock is None:
+            return
+        data = message.encode("utf-8")
+        for peer in self._peers():
+            try:
+                self._sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Κανείς δεν ακούει πια: socket από worker που πέθανε
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                # Γεμάτος buffer του peer: best-effort, ο client κάνει resync
+                self.failed += 1
+            except OSError as e:
+                self.failed += 1
+                print(f"[BUS] send to {peer} FAILED: {e}")
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._deliver(data.decode("utf-8", errors="replace"))
+
+    def stats(self) -> dict:
+        out = super().stats()
+        out.update({"path": self.path, "peers": len(self._peers())})
+        return out
+
+
+def create_event_bus(backend: str = EVENT_BUS_BACKEND) -> EventBus:
+    if backend == "postgres":
+        return PostgresEventBus()
+    if backend == "unix":
+        return UnixSocketEventBus()
+    if backend != "inprocess":
+        print(f"[BUS] unknown EVENT_BUS_BACKEND={backend!r}, using inprocess")
+    return EventBus()
+
+
+# SINGLETON (ένα bus ανά process, το ξεκινάει το lifespan)
+event_bus = create_event_bus()
@@ -0,0 +1,145 @@
+# backend/app/websockets/fanout.py
+
+import asyncio
+import os
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Optional
+
+from fastapi import WebSocket
+
+
+class OverflowPolicy(str, Enum):
+    """
+    Τι γίνεται όταν γεμίσει η ουρά αποστολής ενός client:
+    - DROP_OLDEST: πετάμε το παλαιότερο frame και κρατάμε το νέο.
+    - COALESCE: πετάμε όλη την ουρά και στέλνουμε ένα φρέσκο snapshot
+      (ή μόνο το τελευταίο frame, αν τα frames είναι ήδη snapshots).
+    - DISCONNECT: κλείνουμε τον αργό client (θα ξανασυνδεθεί και θα πάρει snapshot).
+    """
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+def _resolve_policy_from_env() -> OverflowPolicy:
+    raw = os.getenv("WS_OVERFLOW_POLICY", OverflowPolicy.COALESCE.value)
+    try:
+        return OverflowPolicy(raw)
+    except ValueError:
+        return OverflowPolicy.COALESCE
+
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "2.0"))
+WS_OVERFLOW_POLICY = _resolve_policy_from_env()
+
+
+class ClientChannel:
+    """
+    Bounded ουρά αποστολής + writer task για ΕΝΑΝ WebSocket client.
+
+    - offer(): sync και non-blocking, άρα όποιος κάνει broadcast
+      (π.χ. ένα HTTP handler) δεν περιμένει ποτέ network I/O.
+    - Ο writer task στέλνει τα frames με τη σειρά, με timeout ανά αποστολή·
+      αν αποτύχει ή αργήσει, το κανάλι κλείνει.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        maxsize: int = WS_SEND_QUEUE_SIZE,
+        policy: OverflowPolicy = WS_OVERFLOW_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT,
+        snapshot: Optional[Callable[[], str]] = None,
+        on_close: Optional[Callable[["ClientChannel"], None]] = None,
+    ) -> None:
+        self.ws = ws
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._snapshot = snapshot
+        self._on_close = on_close
+
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def room(self) -> int:
+        """Πόσα frames χωράνε ακόμα πριν ενεργοποιηθεί το overflow policy."""
+        return self.maxsize - len(self._queue)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._writer())
+
+    def offer(self, frame: str) -> None:
+        if self.closed:
+            return
+
+        if len(self._queue) >= self.maxsize:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                print("[WS] slow consumer, disconnecting")
+                self.close()
+                return
+            if self.policy == OverflowPolicy.DROP_OLDEST:
+                self._queue.popleft()
+                self.dropped += 1
+            else:
+                self.dropped += len(self._queue)
+                self.coalesced += 1
+                self._queue.clear()
+                if self._snapshot is not None:
+                    # Το snapshot ήδη περιέχει και το τρέχον event
+                    frame = self._snapshot()
+
+        self._queue.append(frame)
+        self._ready.set()
+
+    async def _writer(self) -> None:
+        while True:
+            while not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+
+            frame = self._queue.popleft()
+            try:
+                await asyncio.wait_for(self.ws.send_text(frame), timeout=self.send_timeout)
+            except Exception as e:
+                print(f"[WS] send FAILED: {e!r}")
+                self.close()
+                return
+            self.sent += 1
+
+    def close(self) -> None:
+        """Κλείνει το κανάλι (idempotent): σταματάει τον writer και το socket."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        asyncio.ensure_future(self._close_socket())
+
+        if self._on_close is not None:
+            self._on_close(self)
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
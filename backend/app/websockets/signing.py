@@ -0,0 +1,96 @@
+# backend/app/websockets/signing.py
+
+import json
+import os
+import secrets
+from datetime import datetime, timezone
+from typing import Any, Collection, Dict, Optional, Tuple
+
+from app.security.crypto_engine import get_crypto_engine
+from app.security.keyring import get_keyring
+from app.security.message_schema import MessageHeader, NodeRole, SignedMessage
+from app.security.replay_guard import ReplayVerdict, get_replay_guard
+
+# Opt-in zero-trust mode: όλα τα WS frames (in/out) είναι SignedMessage envelopes
+WS_SIGNED_MODE = os.getenv("WS_SIGNED_MODE", "off").lower() in ("1", "true", "on", "yes")
+# Με ποιο node_id (κλειδί του keyring) υπογράφει ο backend τα outbound frames
+WS_NODE_ID = os.getenv("WS_NODE_ID", "backend")
+
+ERR_INVALID_ENVELOPE = "Invalid signed envelope"
+ERR_UNKNOWN_NODE = "Unknown node"
+ERR_ROLE = "Role not allowed"
+ERR_ALG = "Algorithm mismatch"
+ERR_SIGNATURE = "Bad signature"
+
+
+def init_ws_signing() -> None:
+    """Στο startup: φόρτωμα keyring και έλεγχος ότι υπάρχει το κλειδί του backend."""
+    if not WS_SIGNED_MODE:
+        return
+    keyring = get_keyring()
+    keyring.reload()
+    if keyring.get(WS_NODE_ID) is None:
+        raise RuntimeError(
+            f"WS_SIGNED_MODE is on but node '{WS_NODE_ID}' has no key in NODE_KEYS_FILE"
+        )
+    print(f"[SEC] WS signed mode ON (node_id={WS_NODE_ID})")
+
+
+def sign_frame(obj: Dict[str, Any]) -> str:
+    """
+    Τυλίγει ένα (ήδη JSON-friendly) frame σε SignedMessage και το γυρνάει
+    ως text. Το envelope χτίζεται πάνω στα canonical bytes που υπογράφηκαν
+    (+ "hmac"), άρα ΕΝΑ serialize ανά frame, όσοι clients κι αν το πάρουν.
+    """
+    key = get_keyring().get(WS_NODE_ID)
+    if key is None:
+        raise RuntimeError(f"No key for node '{WS_NODE_ID}'")
+
+    msg = SignedMessage(
+        header=MessageHeader(
+            node_id=key.node_id,
+            role=key.role,
+            msg_type=str(obj.get("type", "frame")),
+            timestamp=datetime.now(timezone.utc),
+            nonce=secrets.token_hex(16),
+            alg=get_crypto_engine().algorithm_name,
+        ),
+        payload=obj,
+        hmac="",
+    )
+    canonical = msg._to_canonical_bytes()
+    signature = key.signer.sign(canonical)
+    return (canonical[:-1] + b',"hmac":"' + signature.encode("ascii") + b'"}').decode("utf-8")
+
+
+def verify_frame(
+    raw: str,
+    allowed_roles: Optional[Collection[NodeRole]] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Inbound envelope -> (payload, None) ή (None, λόγος απόρριψης).
+
+    Σειρά ελέγχων: schema -> γνωστός node + ρόλος -> alg -> HMAC (cached
+    keyed state του keyring) -> ReplayGuard. Το anti-replay μπαίνει τελευταίο,
+    ώστε πλαστά μηνύματα να μη γεμίζουν την cache των nonces.
+    """
+    try:
+        msg = SignedMessage(**json.loads(raw))
+    except Exception:
+        return None, ERR_INVALID_ENVELOPE
+
+    header = msg.header
+    key = get_keyring().get(header.node_id)
+    if key is None:
+        return None, ERR_UNKNOWN_NODE
+    if header.role != key.role or (allowed_roles is not None and key.role not in allowed_roles):
+        return None, ERR_ROLE
+    if header.alg != get_crypto_engine().algorithm_name:
+        return None, ERR_ALG
+    if not msg.hmac or not key.signer.verify(msg._to_canonical_bytes(), msg.hmac):
+        return None, ERR_SIGNATURE
+
+    verdict = get_replay_guard().check(header)
+    if verdict != ReplayVerdict.ACCEPTED:
+        return None, f"Rejected ({verdict.value})"
+    return msg.payload, None
@@ -0,0 +1,138 @@
+# backend/app/websockets/subscriptions.py
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, List, Mapping, Optional, Set, Tuple
+
+from app.models.placement_models import AdPlacement
+
+
+def _parse_set(raw: Optional[str]) -> Optional[FrozenSet[str]]:
+    """'a,b, c' -> {'a', 'b', 'c'}· κενό/None -> None (χωρίς φίλτρο)."""
+    if raw is None:
+        return None
+    values = frozenset(v.strip() for v in raw.split(",") if v.strip())
+    return values or None
+
+
+@dataclass(frozen=True)
+class PlacementSubscription:
+    """
+    Φίλτρο συνδρομής ενός /ws/placements client.
+
+    Κάθε πεδίο είναι σύνολο τιμών (OR μέσα στο πεδίο) ή None για "όλα".
+    Τα πεδία συνδυάζονται με AND, π.χ. zone_id=Megatron&screen_type=panel.
+    """
+
+    zone_ids: Optional[FrozenSet[str]] = None
+    screen_ids: Optional[FrozenSet[str]] = None
+    screen_types: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_query(cls, params: Mapping[str, str]) -> "PlacementSubscription":
+        # ?zone_id=A,B&screen_id=S1,S2&screen_type=panel
+        return cls(
+            zone_ids=_parse_set(params.get("zone_id")),
+            screen_ids=_parse_set(params.get("screen_id")),
+            screen_types=_parse_set(params.get("screen_type")),
+        )
+
+    @property
+    def is_all(self) -> bool:
+        return self.zone_ids is None and self.screen_ids is None and self.screen_types is None
+
+    def matches(self, placement: AdPlacement) -> bool:
+        return (
+            (self.zone_ids is None or placement.zone_id in self.zone_ids)
+            and (self.screen_ids is None or placement.screen_id in self.screen_ids)
+            and (self.screen_types is None or placement.screen_type in self.screen_types)
+        )
+
+    def topics(self) -> List[Tuple[str, str]]:
+        """
+        Τα topics κάτω από τα οποία μπαίνει ο client στο routing index.
+        Διαλέγουμε το πιο επιλεκτικό πεδίο (screen > zone > type)·
+        τα υπόλοιπα ελέγχονται με matches() μόνο για τους υποψήφιους.
+        """
+        if self.screen_ids is not None:
+            return [("screen", v) for v in self.screen_ids]
+        if self.zone_ids is not None:
+            return [("zone", v) for v in self.zone_ids]
+        if self.screen_types is not None:
+            return [("type", v) for v in self.screen_types]
+        return []
+
+    def describe(self) -> dict:
+        return {
+            "zone_id": sorted(self.zone_ids) if self.zone_ids is not None else None,
+            "screen_id": sorted(self.screen_ids) if self.screen_ids is not None else None,
+            "screen_type": sorted(self.screen_types) if self.screen_types is not None else None,
+        }
+
+
+ALL_PLACEMENTS = PlacementSubscription()
+
+
+class SubscriptionIndex:
+    """
+    Topic-indexed routing: για ένα placement βρίσκει ΜΟΝΟ τους
+    ενδιαφερόμενους subscribers, χωρίς να περνάει από όλους.
+
+    - _wildcard: subscribers χωρίς φίλτρο (παίρνουν τα πάντα)
+    - _topics: (dimension, value) -> subscribers
+    Κόστος ανά event ~ O(#ενδιαφερόμενων), όχι O(#clients).
+    """
+
+    def __init__(self) -> None:
+        self._subs: Dict[Hashable, PlacementSubscription] = {}
+        self._wildcard: Set[Hashable] = set()
+        self._topics: Dict[Tuple[str, str], Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def get(self, subscriber: Hashable) -> PlacementSubscription:
+        return self._subs.get(subscriber, ALL_PLACEMENTS)
+
+    def add(self, subscriber: Hashable, sub: PlacementSubscription) -> None:
+        self.remove(subscriber)
+        self._subs[subscriber] = sub
+        if sub.is_all:
+            self._wildcard.add(subscriber)
+            return
+        for topic in sub.topics():
+            self._topics.setdefault(topic, set()).add(subscriber)
+
+    def remove(self, subscriber: Hashable) -> None:
+        sub = self._subs.pop(subscriber, None)
+        if sub is None:
+            return
+        self._wildcard.discard(subscriber)
+        for topic in sub.topics():
+            bucket = self._topics.get(topic)
+            if bucket is None:
+                continue
+            bucket.discard(subscriber)
+            if not bucket:
+                del self._topics[topic]
+
+    def route(self, placement: AdPlacement) -> List[Hashable]:
+        """Οι subscribers που ενδιαφέρονται για το placement."""
+        targets = list(self._wildcard)
+        for topic in (
+            ("screen", placement.screen_id),
+            ("zone", placement.zone_id),
+            ("type", placement.screen_type),
+        ):
+            bucket = self._topics.get(topic)
+            if not bucket:
+                continue
+            # Κάθε subscriber είναι σε ΕΝΑ dimension, άρα δεν έχουμε διπλότυπα
+            targets.extend(s for s in bucket if self._subs[s].matches(placement))
+        return targets
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subs),
+            "wildcard": len(self._wildcard),
+            "topics": len(self._topics),
+        }
@@ -3,99 +3,553 @@
 import asyncio
 import json
 import hashlib
-from typing import Optional, Set, Tuple
+import os
+import secrets
+from collections import deque
+from typing import Deque, Dict, List, Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.encoders import jsonable_encoder
 
 from app.services.advertisement_service import AdvertisementService
+from app.services.ad_change_listener import ad_change_listener
+from app.services.ad_cache import ad_cache
 from app.services.placement_service import PlacementService
 from app.services.layout_service import get_screen_index
+from app.services.occupancy import OCCUPANCY_POLICIES
+from app.services.recommendation_service import RecommendationService, RECOMMENDATION_BATCH_MAX
+from app.models.layout_models import RecommendationRequest
+from app.models.placement_models import AdPlacement
+from app.websockets.bus import TOPIC_ADS, TOPIC_PLACEMENTS, event_bus
+from app.websockets.fanout import ClientChannel
+from app.websockets.subscriptions import ALL_PLACEMENTS, PlacementSubscription, SubscriptionIndex
+from app.websockets.signing import WS_SIGNED_MODE, sign_frame, verify_frame
+from app.security.message_schema import NodeRole
 
 router = APIRouter()
 
 
-def _hash_payload(obj) -> str:
-    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
-    return hashlib.sha256(raw).hexdigest()
+ADS_POLL_INTERVAL = float(os.getenv("ADS_POLL_INTERVAL", "2.0"))
+# Όταν το LISTEN/NOTIFY είναι ενεργό, το polling μένει μόνο ως δίχτυ ασφαλείας
+ADS_SAFETY_POLL_INTERVAL = float(os.getenv("ADS_SAFETY_POLL_INTERVAL", "30.0"))
 
 
-class WSManager:
-    def __init__(self) -> None:
-        self.placements_clients: Set[WebSocket] = set()
+def _encode_frame(obj) -> str:
+    # Ίδιο encoding με το WebSocket.send_json του Starlette
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _seal(obj) -> str:
+    """Outbound frame: SignedMessage envelope σε signed mode, αλλιώς σκέτο JSON."""
+    return sign_frame(obj) if WS_SIGNED_MODE else _encode_frame(obj)
+
+
+def _open(raw: str, allowed_roles=None):
+    """
+    Inbound frame -> (dict, None) ή (None, error).
+    Σε signed mode δεχόμαστε μόνο επαληθευμένα envelopes (payload = το μήνυμα).
+    """
+    if WS_SIGNED_MODE:
+        return verify_frame(raw, allowed_roles)
+    try:
+        return json.loads(raw), None
+    except ValueError:
+        return None, "Invalid JSON"
+
+
+async def _send(ws: WebSocket, obj) -> None:
+    await ws.send_text(_seal(obj))
+
+
+class _CachedFrame:
+    """
+    Frame που ξαναστέλνεται (event log, snapshots, ads_list).
+
+    Cache-άρεται ΜΟΝΟ το unsigned μέρος: χωρίς signing το ίδιο text
+    μοιράζεται σε όλους. Σε signed mode κάθε seal() είναι νέο envelope
+    (νέο nonce + timestamp): ένα live fan-out σφραγίζει ΜΙΑ φορά για όλους
+    τους παραλήπτες της στιγμής, ενώ ό,τι ξαναστέλνεται αργότερα (resync,
+    snapshot σε νέο client) σφραγίζεται ξανά, αλλιώς θα έβλεπε REPLAY
+    και, μετά το REPLAY_WINDOW_SECONDS, STALE.
+    """
+
+    __slots__ = ("payload", "_text")
+
+    def __init__(self, payload) -> None:
+        self.payload = payload
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Το unsigned frame (για hash / σύγκριση)."""
+        if self._text is None:
+            self._text = _encode_frame(self.payload)
+        return self._text
+
+    def seal(self) -> str:
+        return sign_frame(self.payload) if WS_SIGNED_MODE else self.text
+
+
+def _hash_frame(frame: str) -> str:
+    return hashlib.sha256(frame.encode("utf-8")).hexdigest()
+
+
+def _filter(placements: List, sub: PlacementSubscription) -> List:
+    return [p for p in placements if sub.matches(p)]
 
-    async def register_placements(self, ws: WebSocket) -> None:
+
+WS_EVENT_LOG_SIZE = int(os.getenv("WS_EVENT_LOG_SIZE", "10000"))
+
+
+class _Event:
+    """Εγγραφή του event log: το frame κωδικοποιείται lazily (μόνο αν κάποιος το θέλει)."""
+
+    __slots__ = ("seq", "placement", "frame")
+
+    def __init__(self, seq: int, placement) -> None:
+        self.seq = seq
+        self.placement = placement
+        self.frame: Optional[_CachedFrame] = None
+
+    def encode(self) -> str:
+        """Ένα frame ανά κλήση (σε signed mode νέο envelope κάθε φορά)."""
+        if self.frame is None:
+            self.frame = _CachedFrame(
+                {
+                    "v": 1,
+                    "type": "placement_assigned",
+                    "seq": self.seq,
+                    "data": jsonable_encoder(self.placement),
+                }
+            )
+        return self.frame.seal()
+
+
+class WSManager:
+    """
+    Διαχείριση των /ws/placements clients.
+
+    Κάθε client έχει δικό του ClientChannel (bounded ουρά + writer task),
+    άρα το broadcast απλά βάζει το ήδη κωδικοποιημένο frame στις ουρές
+    και επιστρέφει αμέσως, χωρίς να περιμένει κανένα socket.
+
+    Incremental resync:
+    - κάθε placement_assigned έχει αύξοντα seq και μένει (κωδικοποιημένο)
+      σε ένα bounded event log
+    - ένας client που ξανασυνδέεται στέλνει since=<seq>&epoch=<epoch>
+      και παίρνει μόνο τα deltas που έχασε
+    - αν το κενό είναι παλαιότερο από το log (ή άλλαξε το epoch, π.χ.
+      restart), ή αν τα deltas δεν χωράνε στην ουρά του client, παίρνει
+      compacted snapshot: την τελευταία ανάθεση ανά οθόνη
+    - epoch/seq είναι ΑΝΑ worker (τα events των άλλων workers έρχονται από
+      το event bus και παίρνουν τοπικό seq): ένας client που ξανασυνδέεται
+      σε άλλο worker βλέπει άλλο epoch και παίρνει πάντα compacted snapshot
+
+    Συνδρομές: κάθε client μπορεί να ζητήσει στο connect φίλτρο
+    (zone_id / screen_id / screen_type). Το broadcast περνάει από το
+    SubscriptionIndex, άρα ένα event κωδικοποιείται και στέλνεται μόνο
+    αν υπάρχει ενδιαφερόμενος. Snapshots και deltas φιλτράρονται επίσης.
+    """
+
+    def __init__(self, event_log_size: int = WS_EVENT_LOG_SIZE) -> None:
+        self.placements_clients: Dict[WebSocket, ClientChannel] = {}
+        # Ταυτότητα της ακολουθίας seq (αλλάζει σε κάθε restart)
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        self._events: Deque[_Event] = deque(maxlen=max(1, event_log_size))
+        self._subscriptions = SubscriptionIndex()
+        self._encoded = 0
+        self._skipped = 0
+        # Cache των (unsigned) snapshot frames (άκυρα μετά από κάθε νέο event)
+        self._snapshot_frame: Optional[_CachedFrame] = None
+        self._compacted_frame: Optional[_CachedFrame] = None
+
+    def _snapshot(self, data, compacted: bool) -> _CachedFrame:
+        return _CachedFrame(
+            {
+                "v": 1,
+                "type": "placements_snapshot",
+                "seq": self.seq,
+                "epoch": self.epoch,
+                "compacted": compacted,
+                "data": jsonable_encoder(data),
+            }
+        )
+
+    def _placements_snapshot(self, sub: PlacementSubscription = ALL_PLACEMENTS) -> str:
+        if not sub.is_all:
+            return self._snapshot(_filter(PlacementService.list_all(), sub), compacted=False).seal()
+        if self._snapshot_frame is None:
+            self._snapshot_frame = self._snapshot(PlacementService.list_all(), compacted=False)
+        return self._snapshot_frame.seal()
+
+    def _compacted_snapshot(self, sub: PlacementSubscription = ALL_PLACEMENTS) -> str:
+        if not sub.is_all:
+            return self._snapshot(_filter(PlacementService.list_active(), sub), compacted=True).seal()
+        if self._compacted_frame is None:
+            self._compacted_frame = self._snapshot(PlacementService.list_active(), compacted=True)
+        return self._compacted_frame.seal()
+
+    async def register_placements(
+        self,
+        ws: WebSocket,
+        since: Optional[int] = None,
+        epoch: Optional[str] = None,
+        subscription: PlacementSubscription = ALL_PLACEMENTS,
+    ) -> None:
         await ws.accept()
-        self.placements_clients.add(ws)
+        channel = ClientChannel(
+            ws,
+            snapshot=lambda: self._compacted_snapshot(subscription),
+            on_close=lambda ch: self.unregister_placements(ch.ws),
+        )
+        self.placements_clients[ws] = channel
+        self._subscriptions.add(ws, subscription)
         print(f"[WS] placements client connected ({len(self.placements_clients)})")
 
-        # REAL snapshot από RAM
-        snapshot = jsonable_encoder(PlacementService.list_all())
-        await ws.send_json({"v": 1, "type": "placements_snapshot", "data": snapshot})
+        if since is None:
+            # REAL snapshot από RAM, πρώτο στην ουρά του client
+            channel.offer(self._placements_snapshot(subscription))
+        else:
+            self._resync(channel, since, epoch)
+        channel.start()
+
+    def resync(self, ws: WebSocket, since: int, epoch: Optional[str] = None) -> None:
+        """Resync κατ' απαίτηση ({"type": "resync", "since": N}) σε ήδη ανοιχτό socket."""
+        channel = self.placements_clients.get(ws)
+        if channel is not None:
+            self._resync(channel, since, epoch)
+
+    def _resync(self, channel: ClientChannel, since: int, epoch: Optional[str]) -> None:
+        sub = self._subscriptions.get(channel.ws)
+        oldest = self._events[0].seq if self._events else self.seq + 1
+        if (epoch is not None and epoch != self.epoch) or since > self.seq or since < oldest - 1:
+            channel.offer(self._compacted_snapshot(sub))
+            return
+
+        missed = [
+            event
+            for event in self._events
+            if event.seq > since and sub.matches(event.placement)
+        ]
+        # deltas + resync_complete πρέπει να χωρέσουν στην ουρά του client: αλλιώς
+        # το overflow policy θα έχανε deltas (drop_oldest), θα έκλεινε το κανάλι
+        # πριν καν ξεκινήσει (disconnect) ή θα έτρωγε το resync_complete (coalesce)
+        if len(missed) + 1 > channel.room:
+            channel.offer(self._compacted_snapshot(sub))
+            return
+
+        # Τα frames του log κωδικοποιούνται το πολύ μία φορά, όσοι κι αν τα ζητήσουν
+        # (σε signed mode σφραγίζονται ανά παράδοση)
+        for event in missed:
+            channel.offer(event.encode())
+        channel.offer(
+            _seal({"v": 1, "type": "resync_complete", "seq": self.seq, "epoch": self.epoch})
+        )
+
+    def reply(self, ws: WebSocket, obj) -> None:
+        """Απάντηση σε έναν client, μέσα από την ουρά του (σειρά με τα events)."""
+        channel = self.placements_clients.get(ws)
+        if channel is not None:
+            channel.offer(_seal(obj))
 
     def unregister_placements(self, ws: WebSocket) -> None:
-        self.placements_clients.discard(ws)
+        channel = self.placements_clients.pop(ws, None)
+        if channel is None:
+            return
+        self._subscriptions.remove(ws)
+        channel.close()
         print(f"[WS] placements client disconnected ({len(self.placements_clients)})")
 
-    async def broadcast_placement_assigned(self, placement) -> None:
-        payload = {"v": 1, "type": "placement_assigned", "data": jsonable_encoder(placement)}
-        dead = []
-        for ws in list(self.placements_clients):
-            try:
-                await ws.send_json(payload)
-            except Exception as e:
-                print(f"[WS] send FAILED: {e}")
-                dead.append(ws)
-
-        for ws in dead:
-            self.unregister_placements(ws)
+    def broadcast_placement_assigned(self, placement) -> None:
+        """Non-blocking: seq, log, και encode ΜΙΑ φορά μόνο αν υπάρχει ενδιαφερόμενος."""
+        self.seq += 1
+        self._snapshot_frame = None
+        self._compacted_frame = None
+
+        event = _Event(self.seq, placement)
+        self._events.append(event)
+
+        targets = self._subscriptions.route(placement)
+        if not targets:
+            self._skipped += 1
+            return
+
+        # Ένα frame (σε signed mode ένα envelope) για όλους τους live παραλήπτες
+        self._encoded += 1
+        frame = event.encode()
+        for ws in targets:
+            channel = self.placements_clients.get(ws)
+            if channel is not None:
+                channel.offer(frame)
+
+    def stats(self) -> dict:
+        return {
+            "placements_clients": len(self.placements_clients),
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "event_log": len(self._events),
+            "encoded": self._encoded,
+            "skipped": self._skipped,
+            "subscriptions": self._subscriptions.stats(),
+            "channels": [ch.stats() for ch in self.placements_clients.values()],
+        }
 
 
 ws_manager = WSManager()
 
 
+def publish_placement_assigned(placement: AdPlacement) -> None:
+    """Τοπικό broadcast + δημοσίευση στο event bus για τους υπόλοιπους workers."""
+    ws_manager.broadcast_placement_assigned(placement)
+    event_bus.publish(TOPIC_PLACEMENTS, jsonable_encoder(placement))
+
+
+def _on_remote_placement(data) -> None:
+    placement = AdPlacement(**data)
+    PlacementService.apply_remote(placement)
+    ws_manager.broadcast_placement_assigned(placement)
+
+
+event_bus.subscribe(TOPIC_PLACEMENTS, _on_remote_placement)
+
+
+class AdsFeed:
+    """
+    Ένα κοινό change feed για το /ws/ads.
+
+    Ένα background task κάνει poll τη βάση (μία φορά για όλους),
+    υπολογίζει hash και κωδικοποιεί το ads_list frame ΜΙΑ φορά,
+    και το βάζει στην ουρά κάθε subscriber (ClientChannel).
+    Έτσι το κόστος ακολουθεί τις αλλαγές των ads, όχι τους clients.
+
+    Με ενεργό LISTEN (ad_change_listener) το refresh γίνεται αμέσως
+    μόλις αλλάξει μια γραμμή· το polling πέφτει στο safety interval
+    και επιστρέφει στο κανονικό αν πέσει ο listener.
+    """
+
+    def __init__(
+        self,
+        interval: float = ADS_POLL_INTERVAL,
+        safety_interval: float = ADS_SAFETY_POLL_INTERVAL,
+    ) -> None:
+        self.interval = interval
+        self.safety_interval = safety_interval
+        self.clients: Dict[WebSocket, ClientChannel] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._last_hash: Optional[str] = None
+        self._last_frame: Optional[_CachedFrame] = None
+
+    def invalidate(self, _payload: Optional[str] = None) -> None:
+        """Callback του listener: ξύπνα το feed για άμεσο refresh."""
+        self._wake.set()
+
+    def on_remote_change(self, data) -> None:
+        """Άλλος worker είδε νέα ads: refresh μόνο αν δεν τα έχουμε ήδη."""
+        if not isinstance(data, dict) or data.get("hash") != self._last_hash:
+            self._wake.set()
+
+    async def subscribe(self, ws: WebSocket) -> None:
+        await ws.accept()
+        # Κάθε ads_list είναι πλήρες snapshot: στο coalesce κρατάμε μόνο το τελευταίο
+        channel = ClientChannel(ws, on_close=lambda ch: self.unsubscribe(ch.ws))
+        self.clients[ws] = channel
+        print(f"[WS] ads client connected ({len(self.clients)})")
+
+        # Νέος client: παίρνει αμέσως το τελευταίο γνωστό frame
+        if self._last_frame is not None:
+            channel.offer(self._last_frame.seal())
+        channel.start()
+        self.start()
+
+    def unsubscribe(self, ws: WebSocket) -> None:
+        channel = self.clients.pop(ws, None)
+        if channel is None:
+            return
+        channel.close()
+        print(f"[WS] ads client disconnected ({len(self.clients)})")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while self.clients:
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                # π.χ. βάση down: κρατάμε το τελευταίο frame και ξαναδοκιμάζουμε
+                print(f"[WS] ads poll FAILED: {e}")
+
+            timeout = self.safety_interval if ad_change_listener.connected else self.interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self) -> None:
+        """Ένα poll: αν άλλαξαν τα ads, fan-out του νέου frame."""
+        ads = await asyncio.to_thread(AdvertisementService.get_all)
+        # Hash πάνω στο unsigned frame (το envelope έχει νέο nonce κάθε φορά)
+        frame = _CachedFrame({"v": 1, "type": "ads_list", "data": [ad.dict() for ad in ads]})
+        h = _hash_frame(frame.text)
+        if h == self._last_hash:
+            return
+
+        changed = self._last_hash is not None
+        self._last_hash = h
+        self._last_frame = frame
+        if changed:
+            # Polling είδε αλλαγή (π.χ. LISTEN πεσμένο): και η ad cache είναι πια παλιά
+            ad_cache.invalidate()
+            # Οι υπόλοιποι workers κάνουν refresh αμέσως, χωρίς να περιμένουν το poll τους
+            event_bus.publish(TOPIC_ADS, {"hash": h})
+        sealed = frame.seal()
+        for channel in list(self.clients.values()):
+            channel.offer(sealed)
+
+
+ads_feed = AdsFeed()
+ad_change_listener.add_callback(ads_feed.invalidate)
+event_bus.subscribe(TOPIC_ADS, ads_feed.on_remote_change)
+event_bus.subscribe(TOPIC_ADS, lambda _data: ad_cache.invalidate())
+
+
 @router.websocket("/ws/ads")
 async def websocket_ads(ws: WebSocket):
-    await ws.accept()
-    last_hash = None
+    await ads_feed.subscribe(ws)
     try:
+        # Τα frames τα στέλνει το κοινό AdsFeed· εδώ απλά κρατάμε open
         while True:
-            ads = AdvertisementService.get_all()
-            payload = {"v": 1, "type": "ads_list", "data": [ad.dict() for ad in ads]}
+            await _receive_text(ws)
+    except (WebSocketDisconnect, RuntimeError):
+        ads_feed.unsubscribe(ws)
 
-            h = _hash_payload(payload)
-            if h != last_hash:
-                await ws.send_json(payload)
-                last_hash = h
 
-            await asyncio.sleep(2)
-    except WebSocketDisconnect:
-        return
+async def _receive_text(ws: WebSocket) -> Optional[str]:
+    """
+    Ένα frame από τον client: το text του, ή None για binary frame
+    (τα αγνοούμε, όπως το ws.receive() πριν). Το disconnect γίνεται
+    WebSocketDisconnect, όπως στο receive_text().
+    """
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    return message.get("text")
+
+
+def _parse_seq(raw) -> Optional[int]:
+    try:
+        return int(raw) if raw is not None else None
+    except (TypeError, ValueError):
+        return None
 
 
 @router.websocket("/ws/placements")
 async def websocket_placements(ws: WebSocket):
-    await ws_manager.register_placements(ws)
+    # ?since=<seq>&epoch=<epoch>: μόνο τα deltas μετά το seq
+    # ?zone_id=&screen_id=&screen_type= (comma lists): μόνο ό,τι ταιριάζει
+    await ws_manager.register_placements(
+        ws,
+        since=_parse_seq(ws.query_params.get("since")),
+        epoch=ws.query_params.get("epoch"),
+        subscription=PlacementSubscription.from_query(ws.query_params),
+    )
     try:
         # κρατάμε open + πιάνουμε disconnect σωστά
         while True:
-            await ws.receive()
-    except WebSocketDisconnect:
+            raw = await _receive_text(ws)
+            if raw is None:
+                continue
+            msg, error = _open(raw)
+            if error is not None:
+                ws_manager.reply(ws, {"error": error})
+                continue
+            if isinstance(msg, dict) and msg.get("type") == "resync":
+                since = _parse_seq(msg.get("since"))
+                if since is not None:
+                    ws_manager.resync(ws, since, msg.get("epoch"))
+    except (WebSocketDisconnect, RuntimeError):
         ws_manager.unregister_placements(ws)
 
 
+async def _handle_recommendation_batch(ws: WebSocket, raw_items) -> None:
+    """
+    Μήνυμα {"type": "batch", "items": [{ad_id?, x, y, radius?, ...}, ...]}
+    -> {"v": 1, "type": "screen_recommendation_batch", "data": [...]}
+    με ένα αποτέλεσμα ανά item, στην ίδια σειρά ({...} ή {"error": ...}).
+    """
+    if not isinstance(raw_items, list):
+        await _send(ws, {"error": "Missing items"})
+        return
+    if len(raw_items) > RECOMMENDATION_BATCH_MAX:
+        await _send(ws, {"error": f"Batch too large (max {RECOMMENDATION_BATCH_MAX} items)"})
+        return
+
+    data: list = [None] * len(raw_items)
+    valid: list[tuple[int, RecommendationRequest]] = []
+    for pos, raw in enumerate(raw_items):
+        try:
+            valid.append((pos, RecommendationRequest(**raw)))
+        except Exception:
+            data[pos] = {"error": "Invalid item"}
+
+    results = await asyncio.to_thread(
+        RecommendationService.recommend_batch, [item for _pos, item in valid]
+    )
+    for (pos, _item), result in zip(valid, results):
+        if isinstance(result, str):
+            data[pos] = {"error": result}
+            continue
+        key, distance = result
+        data[pos] = {
+            "screen_id": key.screen_id,
+            "zone_id": key.zone_id,
+            "x": key.x,
+            "y": key.y,
+            "screen_type": key.screen_type,
+            "ad_category": key.ad_category,
+            "time_window": key.time_window,
+            "distance": distance,
+        }
+
+    await _send(ws, {"v": 1, "type": "screen_recommendation_batch", "data": data})
+
+
+# Σε signed mode: ποιοι ρόλοι μπορούν να ζητούν recommendations
+_RECOMMENDATION_ROLES = (NodeRole.CONTROLLER, NodeRole.SYSTEM)
+
+
 @router.websocket("/ws/recommendation")
 async def websocket_recommendation(ws: WebSocket):
     await ws.accept()
-    index = get_screen_index()
 
     try:
         while True:
-            raw = await ws.receive_text()
-            try:
-                payload = json.loads(raw)
-            except Exception:
-                await ws.send_json({"error": "Invalid JSON"})
+            raw = await _receive_text(ws)
+            if raw is None:
+                continue
+            payload, error = _open(raw, _RECOMMENDATION_ROLES)
+            if error is not None:
+                await _send(ws, {"error": error})
+                continue
+            if not isinstance(payload, dict):
+                await _send(ws, {"error": "Invalid JSON"})
+                continue
+
+            if isinstance(payload, dict) and payload.get("type") == "batch":
+                await _handle_recommendation_batch(ws, payload.get("items"))
                 continue
 
             ad_id = payload.get("ad_id")
@@ -106,36 +560,52 @@ async def websocket_recommendation(ws: WebSocket):
             screen_type = payload.get("screen_type")
             ad_category = payload.get("ad_category")
             time_window = payload.get("time_window")
+            occupancy = payload.get("occupancy")
 
             if x is None or y is None:
-                await ws.send_json({"error": "Missing x/y"})
+                await _send(ws, {"error": "Missing x/y"})
+                continue
+            if occupancy is not None and occupancy not in OCCUPANCY_POLICIES:
+                await _send(ws, {"error": "Invalid occupancy"})
+                continue
+            try:
+                ad_id = int(ad_id) if ad_id is not None else None
+                x, y, radius = float(x), float(y), float(radius)
+            except (TypeError, ValueError, OverflowError):
+                await _send(ws, {"error": "Invalid number"})
                 continue
 
             zone_id: Optional[str] = None
             if ad_id is not None:
-                ad = AdvertisementService.get_by_id(int(ad_id))
+                # Σε miss η ad cache πάει στη βάση: εκτός event loop
+                ad = await asyncio.to_thread(ad_cache.get, ad_id)
                 if ad is None:
-                    await ws.send_json({"error": "Advertisement not found"})
+                    await _send(ws, {"error": "Advertisement not found"})
                     continue
                 zone_id = ad.zone
 
+            # Ο index του ΤΡΕΧΟΝΤΟΣ snapshot ανά μήνυμα: ένα socket που μένει
+            # ανοιχτό δεν κολλάει στο layout (και στο occupancy) πριν από ένα reload
+            index = get_screen_index()
             result = index.recommend_screen(
-                x=float(x),
-                y=float(y),
-                radius=float(radius),
+                x=x,
+                y=y,
+                radius=radius,
                 zone_id=zone_id,
                 screen_type=screen_type,
                 ad_category=ad_category,
                 time_window=time_window,
+                occupancy=occupancy,
             )
 
             if result is None:
-                await ws.send_json({"error": "No suitable screen found"})
+                await _send(ws, {"error": "No suitable screen found"})
                 continue
 
             key, distance = result
 
-            await ws.send_json(
+            await _send(
+                ws,
                 {
                     "v": 1,
                     "type": "screen_recommendation",
@@ -149,8 +619,8 @@ async def websocket_recommendation(ws: WebSocket):
                         "time_window": key.time_window,
                         "distance": distance,
                     },
-                }
+                },
             )
 
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
         return
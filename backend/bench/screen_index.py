@@ -0,0 +1,326 @@
+# backend/bench/screen_index.py
+"""
+Benchmarks του MultiDimScreenIndex σε συνθετικά layouts.
+
+Τρέχει από το backend/:
+
+    python bench/screen_index.py grid          # query_near: grid vs γραμμικό scan
+    python bench/screen_index.py nearest       # recommend_screen(s): kNN vs query_near + min
+    python bench/screen_index.py batch         # query_near_many vs loop από query_near
+    python bench/screen_index.py eligibility   # επιλεκτικά φίλτρα (ad_category / time_window)
+    python bench/screen_index.py build         # build / RSS / body ενός layout 1M οθονών
+                                 [--layout grid-spec|explicit]
+    python bench/screen_index.py all
+
+Το "baseline" είναι αντίγραφο του γραμμικού query_near / recommend_screen
+του αρχικού index (λίστα (x, y, Screen) + hypot). Οι χρόνοι είναι ανά
+query (median από 5 επαναλήψεις) και εξαρτώνται από το μηχάνημα· ό,τι
+μετράει είναι η σχέση ανάμεσα στις στήλες.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from math import hypot
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.layout_models import MultiIndexKey, Screen  # noqa: E402
+from app.services.layout_service import (  # noqa: E402
+    LayoutService,
+    LayoutSnapshot,
+    MultiDimScreenIndex,
+)
+
+ZONES = (
+    ("glassfloor", "glassfloor_tile"),
+    ("surrounding", "surrounding_banner"),
+    ("megatron", "megatron_panel"),
+)
+
+
+# -----------------------------
+#  BASELINE (γραμμικό scan)
+# -----------------------------
+
+class BaselineIndex:
+    """Ο αρχικός index: ένα πέρασμα σε όλα τα screens ανά query."""
+
+    def __init__(self, screens: list[Screen]) -> None:
+        self._coords = [(float(s.col), float(s.row), s) for s in screens]
+
+    def query_near(self, x, y, radius, zone_id=None) -> list[Screen]:
+        results = []
+        for sx, sy, screen in self._coords:
+            if zone_id is not None and screen.zone_id != zone_id:
+                continue
+            if hypot(sx - x, sy - y) <= radius:
+                results.append(screen)
+        return results
+
+    def recommend_screen(self, x, y, radius=10.0, zone_id=None, screen_type=None):
+        candidates = self.query_near(x, y, radius, zone_id)
+        if screen_type is not None:
+            candidates = [s for s in candidates if s.screen_type == screen_type]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda s: hypot(float(s.col) - x, float(s.row) - y))
+        return MultiIndexKey.from_screen(best), hypot(float(best.col) - x, float(best.row) - y)
+
+
+# -----------------------------
+#  ΣΥΝΘΕΤΙΚΑ LAYOUTS
+# -----------------------------
+
+def write_layout(zones: list[dict]) -> str:
+    fd, path = tempfile.mkstemp(prefix="bench-layout-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"zones": zones}, f)
+    return path
+
+
+def square_zones(side: int, mixed_types: bool = False) -> list[dict]:
+    """
+    3 τετράγωνες ζώνες side x side (n = 3 * side^2). mixed_types: ρητά
+    screens, με τύπο "special" σε κάθε τρίτη θέση (για φίλτρο screen_type).
+    """
+    zones = []
+    for zone_id, screen_type in ZONES:
+        zone = {"id": zone_id, "name": zone_id, "description": "", "rows": side, "cols": side,
+                "screen_type": screen_type}
+        if mixed_types:
+            zone["screens"] = [
+                {"id": f"{zone_id}-{r}-{c}", "row": r, "col": c,
+                 **({"screen_type": "special"} if (r + c) % 3 == 0 else {})}
+                for r in range(side) for c in range(side)
+            ]
+        else:
+            zone["screen_prefix"] = zone_id
+        zones.append(zone)
+    return zones
+
+
+def venue_zones(side: int, count: int, explicit: bool = False) -> list[dict]:
+    """count ζώνες side x side με επιλεξιμότητα· η z3 είναι η μόνη megatron/tech/halftime."""
+    rng = random.Random(7)
+    zones = []
+    for z in range(count):
+        zone = {
+            "id": f"z{z}", "name": f"Z{z}", "description": "", "rows": side, "cols": side,
+            "screen_type": "megatron_panel" if z == 3 else "led",
+            "ad_categories": ["tech"] if z in (3, 7) else rng.sample(["food", "auto", "sports"], 2),
+            "time_windows": ["halftime"] if z in (3, 5) else ["pre", "post"],
+        }
+        if explicit:
+            zone["screens"] = [
+                {"id": f"Z{z}-{r}-{c}", "row": r, "col": c} for r in range(side) for c in range(side)
+            ]
+        else:
+            zone["screen_prefix"] = f"Z{z}"
+        zones.append(zone)
+    return zones
+
+
+def build_index(zones: list[dict]) -> MultiDimScreenIndex:
+    path = write_layout(zones)
+    try:
+        return MultiDimScreenIndex.from_columns(LayoutService.load_layout(path))
+    finally:
+        os.unlink(path)
+
+
+def points(count: int, side: float, seed: int = 1) -> list[tuple[float, float]]:
+    rng = random.Random(seed)
+    return [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(count)]
+
+
+def per_query_us(fn, pts, repeat: int = 5) -> float:
+    """Median χρόνος ανά σημείο (us) από `repeat` περάσματα."""
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x, y in pts:
+            fn(x, y)
+        runs.append((time.perf_counter() - t0) / len(pts) * 1e6)
+    return statistics.median(runs)
+
+
+def per_batch_us(fn, pts, repeat: int = 5) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(pts)
+        runs.append((time.perf_counter() - t0) / len(pts) * 1e6)
+    return statistics.median(runs)
+
+
+def fmt(us: float) -> str:
+    return f"{us / 1000:.2f}ms" if us >= 1000 else f"{us:.0f}us"
+
+
+def rss_mb() -> int:
+    with open("/proc/self/status") as f:
+        return int(f.read().split("VmRSS:")[1].split()[0]) // 1024
+
+
+# -----------------------------
+#  BENCHMARKS
+# -----------------------------
+
+def bench_grid() -> None:
+    """query_near με φίλτρο ζώνης: γραμμικό scan vs grid buckets."""
+    print("query_near, zone=glassfloor")
+    for side in (10, 32, 100, 316):
+        index = build_index(square_zones(side))
+        baseline = BaselineIndex(index.get_all_screens())
+        for radius in (1.5, 10):
+            pts = points(200 if side < 316 else 20, side)
+            lin = per_query_us(lambda x, y: baseline.query_near(x, y, radius, "glassfloor"), pts,
+                               repeat=5 if side < 316 else 1)
+            grid = per_query_us(lambda x, y: index.query_near(x, y, radius, "glassfloor"), pts)
+            print(f"  n={len(index):>7} r={radius:<4} linear {fmt(lin):>8}   index {fmt(grid):>8}")
+
+
+def bench_nearest() -> None:
+    """recommend_screen(r=10, screen_type): query_near + min vs best-first kNN (και batched)."""
+    print("recommend_screen r=10, screen_type=special")
+    for side in (32, 100, 316):
+        index = build_index(square_zones(side, mixed_types=True))
+        baseline = BaselineIndex(index.get_all_screens())
+        pts = points(200 if side < 316 else 20, side)
+        lin = per_query_us(lambda x, y: baseline.recommend_screen(x, y, 10.0, None, "special"), pts,
+                           repeat=5 if side < 316 else 1)
+        pts = points(500, side)
+        one = per_query_us(lambda x, y: index.recommend_screen(x, y, 10.0, None, "special", occupancy="off"), pts)
+        many = per_batch_us(lambda p: index.recommend_screens(p, 10.0, None, "special", occupancy="off"), pts)
+        print(f"  n={len(index):>7} baseline {fmt(lin):>8}   index {fmt(one):>8}   batched {fmt(many):>6}/point")
+
+
+def bench_batch() -> None:
+    """
+    query_near_many vs ένα query_near ανά σημείο (500 σημεία, r=3), σε
+    layout 100k οθονών. "query" = χωρίς το materialization των Screen
+    (αντικαθίσταται με no-op), "total" = όπως το καλεί το API. Και το
+    loop κρατάει όλα τα αποτελέσματα ζωντανά (όπως ο καλών του batch):
+    αλλιώς μετράει λιγότερη δουλειά για τον GC.
+    """
+    index = build_index(venue_zones(100, 10))
+    pts = points(500, 100, seed=3)
+    print(f"query_near_many, n={len(index)}, 500 points, r=3 (us/point)")
+    for label, zone_id in (("zone z1  ", "z1"), ("all zones", None)):
+        total_batch = per_batch_us(lambda p: index.query_near_many(p, 3, zone_id), pts)
+        total_loop = per_batch_us(lambda p: [index.query_near(x, y, 3, zone_id) for x, y in p], pts)
+        materialize = index._materialize
+        index._materialize = lambda idx: [None] * len(idx)
+        try:
+            query_batch = per_batch_us(lambda p: index.query_near_many(p, 3, zone_id), pts)
+            query_loop = per_batch_us(lambda p: [index.query_near(x, y, 3, zone_id) for x, y in p], pts)
+        finally:
+            index._materialize = materialize
+        print(
+            f"  {label} query: batch {query_batch:5.0f}  loop {query_loop:5.0f}   "
+            f"total: batch {total_batch:5.0f}  loop {total_loop:5.0f}"
+        )
+
+
+def bench_eligibility() -> None:
+    """Επιλεκτικό query (megatron_panel + tech + halftime) σε 100k και 1M οθόνες."""
+    selective = dict(screen_type="megatron_panel", ad_category="tech", time_window="halftime")
+    print("selective filters: megatron_panel + tech + halftime")
+    for side in (100, 316):
+        index = build_index(venue_zones(side, 10))
+        pts = points(300, side, seed=7)
+        rec = per_query_us(
+            lambda x, y: index.recommend_screen(x, y, 10, None, occupancy="off", **selective), pts)
+        knn = per_query_us(
+            lambda x, y: index.nearest(x, y, k=10, max_distance=10, **selective), pts)
+        line = f"  n={len(index):>7} recommend_screen {fmt(rec):>7}   nearest k=10 {fmt(knn):>7}"
+        if side <= 100:
+            screens = index.get_all_screens()
+
+            def naive(x, y):
+                best = None
+                for s in screens:
+                    if s.screen_type != "megatron_panel":
+                        continue
+                    if s.ad_categories and "tech" not in s.ad_categories:
+                        continue
+                    if s.time_windows and "halftime" not in s.time_windows:
+                        continue
+                    d = hypot(s.col - x, s.row - y)
+                    if d <= 10 and (best is None or d < best[1]):
+                        best = (s, d)
+                return best
+
+            line += f"   naive scan {fmt(per_query_us(naive, pts[:10], repeat=3)):>7}"
+        print(line)
+
+
+def bench_build(kinds=("grid-spec", "explicit")) -> None:
+    """
+    Layout 1M οθονών (100 ζώνες 100x100): build του index, /layout body,
+    lookups. Για καθαρά νούμερα RSS: ένα είδος ανά process (--layout).
+    """
+    for kind in kinds:
+        label, explicit = f"{kind} file", kind == "explicit"
+        path = write_layout(venue_zones(100, 100, explicit=explicit))
+        try:
+            gc.collect()
+            before = rss_mb()
+            t0 = time.perf_counter()
+            index = MultiDimScreenIndex.from_columns(LayoutService.load_layout(path))
+            build = time.perf_counter() - t0
+            gc.collect()
+            index_mb = rss_mb() - before
+            t0 = time.perf_counter()
+            snapshot = LayoutSnapshot(index)
+            encode = time.perf_counter() - t0
+            gc.collect()
+            total_mb = rss_mb() - before
+        finally:
+            os.unlink(path)
+
+        grid = per_query_us(lambda x, y: index.query_by_grid(f"z{int(x)}", int(y), int(x)), points(2000, 99))
+        t0 = time.perf_counter()
+        index.query_by_zone("z1")
+        zone_ms = (time.perf_counter() - t0) * 1000
+        print(
+            f"  {label:16s} n={len(index)}: index {build:.1f}s +{index_mb} MB | "
+            f"+ /layout body ({len(snapshot.body) / 1e6:.0f} MB) {encode:.1f}s, +{total_mb} MB total | "
+            f"query_by_grid {grid:.0f}us, query_by_zone(10k) {zone_ms:.0f}ms"
+        )
+        del snapshot, index
+    print(f"  peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB")
+
+
+BENCHMARKS = {
+    "grid": bench_grid,
+    "nearest": bench_nearest,
+    "batch": bench_batch,
+    "eligibility": bench_eligibility,
+    "build": bench_build,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("which", choices=[*BENCHMARKS, "all"])
+    parser.add_argument("--layout", choices=["grid-spec", "explicit"], help="build: μόνο αυτό το είδος layout")
+    args = parser.parse_args()
+    for name, fn in BENCHMARKS.items():
+        if args.which in (name, "all"):
+            if name == "build" and args.layout:
+                fn((args.layout,))
+            else:
+                fn()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,46 @@ INSERT INTO advertisements (name, image_url, zone) VALUES
     ('Adidas Predator', '/static/ads/predator.png', 'surrounding'),
     ('Coca Cola', '/static/ads/cocacola.png', 'megatron')
 ON CONFLICT (name, zone) DO NOTHING;
+
+-- Ειδοποίηση του backend (LISTEN advertisements_changed) σε κάθε αλλαγή,
+-- ώστε το /ws/ads να μην περιμένει το επόμενο poll.
+-- Το όνομα του καναλιού είναι σταθερό και στο backend (ADS_NOTIFY_CHANNEL
+-- στο app/services/ad_change_listener.py): αλλάζει μόνο μαζί στα δύο σημεία.
+CREATE OR REPLACE FUNCTION notify_advertisements_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'advertisements_changed',
+        json_build_object(
+            'op', TG_OP,
+            'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS advertisements_changed_trg ON advertisements;
+CREATE TRIGGER advertisements_changed_trg
+    AFTER INSERT OR UPDATE OR DELETE ON advertisements
+    FOR EACH ROW EXECUTE FUNCTION notify_advertisements_changed();
+
+-- Μόνιμο ιστορικό αναθέσεων (write-behind από το PlacementService).
+-- assigned_at σε UTC (naive), όπως το AdPlacement.assigned_at.
+CREATE TABLE IF NOT EXISTS placements (
+    id BIGSERIAL PRIMARY KEY,
+    ad_id INTEGER NOT NULL,
+    screen_id TEXT NOT NULL,
+    zone_id TEXT NOT NULL,
+    x DOUBLE PRECISION NOT NULL,
+    y DOUBLE PRECISION NOT NULL,
+    screen_type TEXT,
+    ad_category TEXT,
+    time_window TEXT,
+    assigned_at TIMESTAMP NOT NULL
+);
+
+-- Warm-load της τελευταίας ανάθεσης ανά οθόνη + replay ανά χρόνο
+CREATE INDEX IF NOT EXISTS placements_screen_assigned_idx
+    ON placements (screen_id, assigned_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS placements_assigned_idx
+    ON placements (assigned_at);
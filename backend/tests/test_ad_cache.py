@@ -0,0 +1,176 @@
+# backend/tests/test_ad_cache.py
+
+import threading
+import time
+
+import pytest
+
+from app.models.advertisement import Advertisement
+from app.services import ad_cache as ad_cache_module
+from app.services.ad_cache import AdCache
+
+
+def make_ad(ad_id: int, title: str = "ad") -> Advertisement:
+    return Advertisement(id=ad_id, name=f"{title}-{ad_id}", zone="glassfloor-1")
+
+
+class FakeService:
+    """AdvertisementService χωρίς βάση: μετράει τα queries, μπορεί να "κρατήσει" ένα load."""
+
+    def __init__(self) -> None:
+        self.ads = {i: make_ad(i) for i in range(1, 6)}
+        self.calls = []
+        self.gate = None          # threading.Event: το load περιμένει μέχρι set()
+        self.entered = threading.Event()
+
+    def _block(self) -> None:
+        self.entered.set()
+        if self.gate is not None:
+            assert self.gate.wait(5)
+
+    def get_by_id(self, ad_id):
+        self.calls.append(("id", ad_id))
+        ad = self.ads.get(ad_id)   # τα rows διαβάζονται στην αρχή του query
+        self._block()
+        return ad
+
+    def get_by_ids(self, ids):
+        ids = sorted(ids)
+        self.calls.append(("ids", ids))
+        rows = {i: self.ads[i] for i in ids if i in self.ads}
+        self._block()
+        return rows
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = FakeService()
+    monkeypatch.setattr(ad_cache_module.AdvertisementService, "get_by_id", fake.get_by_id)
+    monkeypatch.setattr(ad_cache_module.AdvertisementService, "get_by_ids", fake.get_by_ids)
+    return fake
+
+
+def wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def run_in_thread(fn, *args):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("result", fn(*args)))
+    t.start()
+    return t, out
+
+
+def test_get_many_loads_misses_once_and_caches_absent_ids(service):
+    cache = AdCache(ttl=60)
+    assert set(cache.get_many([1, 2, 99])) == {1, 2}
+    assert set(cache.get_many([1, 2, 99])) == {1, 2}
+    assert service.calls == [("ids", [1, 2, 99])]
+    assert cache.stats()["loads"] == 1
+
+
+def test_get_many_waits_for_inflight_get(service):
+    cache = AdCache(ttl=60)
+    service.gate = threading.Event()
+    t, _ = run_in_thread(cache.get, 1)
+    assert service.entered.wait(5)
+
+    t2, out = run_in_thread(cache.get_many, [1, 2])
+    # το id 2 δεν είναι in flight: φορτώνεται αμέσως, το 1 περιμένει τον leader
+    wait_until(lambda: cache.coalesced == 1)
+    service.gate.set()
+    t.join(5)
+    t2.join(5)
+
+    assert set(out["result"]) == {1, 2}
+    assert service.calls == [("id", 1), ("ids", [2])]
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_get_waits_for_inflight_get_many(service):
+    cache = AdCache(ttl=60)
+    service.gate = threading.Event()
+    t, _ = run_in_thread(cache.get_many, [1, 2])
+    assert service.entered.wait(5)
+
+    t2, out = run_in_thread(cache.get, 2)
+    wait_until(lambda: cache.coalesced == 1)
+    service.gate.set()
+    t.join(5)
+    t2.join(5)
+
+    assert out["result"].id == 2
+    assert service.calls == [("ids", [1, 2])]
+
+
+def test_get_many_falls_back_when_leader_is_slow(service):
+    cache = AdCache(ttl=60, wait_timeout=0.05)
+    service.gate = threading.Event()
+    t, _ = run_in_thread(cache.get, 3)
+    assert service.entered.wait(5)
+
+    # ο follower δεν περιμένει πάνω από wait_timeout: δικό του load
+    gate, service.gate = service.gate, None
+    assert set(cache.get_many([3])) == {3}
+    assert cache.stats()["wait_timeouts"] == 1
+    gate.set()
+    t.join(5)
+
+
+def test_get_many_does_not_store_rows_loaded_before_invalidation(service):
+    cache = AdCache(ttl=60)
+    service.gate = threading.Event()
+    t, out = run_in_thread(cache.get_many, [4])
+    assert service.entered.wait(5)
+
+    # αλλαγή στη βάση ενώ το query τρέχει: τα παλιά rows δεν μπαίνουν στην cache
+    cache.invalidate(4)
+    service.ads[4] = make_ad(4, "new")
+    service.gate.set()
+    t.join(5)
+
+    assert out["result"][4].name == "ad-4"
+    service.gate = None
+    assert cache.get_many([4])[4].name == "new-4"
+    assert len(service.calls) == 2
+
+
+def test_leader_error_reaches_followers(service, monkeypatch):
+    cache = AdCache(ttl=60)
+    service.gate = threading.Event()
+
+    def broken(ids):
+        service.entered.set()
+        assert service.gate.wait(5)
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(ad_cache_module.AdvertisementService, "get_by_ids", broken)
+    errors = []
+
+    def leader():
+        try:
+            cache.get_many([5])
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=leader)
+    t.start()
+    assert service.entered.wait(5)
+
+    def follower():
+        try:
+            cache.get(5)
+        except RuntimeError as e:
+            errors.append(e)
+
+    t2 = threading.Thread(target=follower)
+    t2.start()
+    wait_until(lambda: cache.coalesced == 1)
+    service.gate.set()
+    t.join(5)
+    t2.join(5)
+    assert len(errors) == 2
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,208 @@
+# backend/tests/test_batch_assign.py
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+import app.main as main
+from app.models.advertisement import Advertisement
+from app.models.layout_models import RecommendationRequest
+from app.models.placement_models import AdPlacement
+from app.services import layout_service, recommendation_service
+from app.services.layout_service import LayoutService, MultiDimScreenIndex
+from app.services.occupancy import ScreenOccupancy
+from app.services.placement_service import PlacementService, PlacementStore
+
+ADS = {
+    1: Advertisement(id=1, name="a", zone="z0"),
+    2: Advertisement(id=2, name="b", zone="z0"),
+}
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    """Δικό του index (3x3 grid στη z0), occupancy (skip, capacity 1) και store."""
+    path = tmp_path / "layout.json"
+    path.write_text(
+        json.dumps(
+            {
+                "zones": [
+                    {
+                        "id": "z0",
+                        "name": "Zone 0",
+                        "description": "",
+                        "rows": 3,
+                        "cols": 3,
+                        "screen_type": "tile",
+                        "screen_prefix": "P",
+                    }
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    index = MultiDimScreenIndex.from_columns(LayoutService.load_layout(str(path)))
+    occ = ScreenOccupancy(window_seconds=3600, capacity=1, policy="skip")
+    occ.attach(index)
+
+    monkeypatch.setattr(layout_service, "screen_occupancy", occ)
+    monkeypatch.setattr(PlacementService, "_occupancy", occ)
+    monkeypatch.setattr(PlacementService, "_store", PlacementStore())
+    monkeypatch.setattr(recommendation_service, "get_screen_index", lambda: index)
+
+    # ad cache: ΕΝΑ get_many, από worker thread
+    calls = []
+
+    def get_many(ad_ids):
+        calls.append((list(ad_ids), threading.current_thread() is threading.main_thread()))
+        return {ad_id: ADS[ad_id] for ad_id in ad_ids if ad_id in ADS}
+
+    monkeypatch.setattr(main.ad_cache, "get_many", get_many)
+
+    published = []
+    monkeypatch.setattr(main, "publish_placement_assigned", published.append)
+
+    # Το assign πρέπει να τρέχει στο event loop (get_running_loop σκάει σε thread)
+    assign = PlacementService.assign_ad.__func__
+    on_loop = []
+
+    def checked_assign(cls, ad_id, key):
+        asyncio.get_running_loop()
+        on_loop.append(threading.current_thread() is threading.main_thread())
+        return assign(cls, ad_id, key)
+
+    monkeypatch.setattr(PlacementService, "assign_ad", classmethod(checked_assign))
+    return index, occ, calls, published, on_loop
+
+
+def run_batch(items):
+    return asyncio.run(main.recommend_and_assign_batch(items))
+
+
+# -----------------------------
+#  ENDPOINT
+# -----------------------------
+
+def test_batch_assigns_on_the_loop_and_sees_earlier_assignments(env):
+    index, occ, calls, published, on_loop = env
+    items = [RecommendationRequest(ad_id=1, x=1, y=1, radius=1, occupancy="skip") for _ in range(3)]
+    out = run_batch(items)
+
+    screens = [r.placement.screen_id for r in out]
+    # skip + capacity 1: κάθε ανάθεση "γεμίζει" την οθόνη για την επόμενη
+    assert len(set(screens)) == 3
+    assert screens[0] == index.recommend_screen(1, 1, 0, occupancy="off")[0].screen_id
+    assert all(occ.load(screen_id) == 1 for screen_id in screens)
+
+    assert on_loop == [True, True, True]
+    assert calls == [([1, 1, 1], False)]
+    assert published == [r.placement for r in out]
+    assert PlacementService.list_all() == published
+
+
+def test_batch_errors_keep_their_position(env):
+    _, _, _, published, _ = env
+    items = [
+        RecommendationRequest(ad_id=99, x=1, y=1),
+        RecommendationRequest(ad_id=2, x=1, y=1, radius=0, occupancy="skip"),
+        RecommendationRequest(ad_id=2, x=1, y=1, radius=0, occupancy="skip"),
+        RecommendationRequest(ad_id=2, x=1, y=1, radius=0, occupancy="off"),
+    ]
+    out = run_batch(items)
+    assert out[0].error == recommendation_service.ERR_AD_NOT_FOUND
+    assert out[1].placement.screen_id == out[3].placement.screen_id
+    # η μόνη οθόνη στο radius 0 γέμισε από το προηγούμενο στοιχείο
+    assert out[2].error == recommendation_service.ERR_NO_SCREEN
+    assert published == [out[1].placement, out[3].placement]
+
+
+def test_batch_runs_in_chunks_and_yields_between_them(env, monkeypatch):
+    monkeypatch.setattr(main, "RECOMMENDATION_ASSIGN_CHUNK", 2)
+    _, _, _, _, on_loop = env
+    ticks = []
+
+    async def scenario():
+        async def ticker():
+            while True:
+                ticks.append(len(on_loop))
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        out = await main.recommend_and_assign_batch(
+            [RecommendationRequest(ad_id=1, x=1, y=1, radius=5, occupancy="off") for _ in range(5)]
+        )
+        task.cancel()
+        return out
+
+    out = asyncio.run(scenario())
+    assert all(r.placement is not None for r in out)
+    # άλλα tasks τρέχουν ανάμεσα στα chunks (2, 2, 1), ποτέ μέσα σε ένα
+    assert {2, 4} <= set(ticks)
+    assert not {1, 3} & set(ticks)
+
+
+# -----------------------------
+#  ScreenOccupancy -> index: μόνο δημόσιο API
+# -----------------------------
+
+class FakeIndex:
+    """Μόνο screen_position / add_load / set_load: χωρίς _load ή άλλα private."""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.load = [0] * len(positions)
+        self.lookups = []
+
+    def screen_position(self, zone_id, row, col, screen_id):
+        self.lookups.append((zone_id, row, col, screen_id))
+        return self.positions.get(screen_id)
+
+    def add_load(self, pos, delta):
+        self.load[pos] += delta
+
+    def set_load(self, pos, count):
+        self.load[pos] = count
+
+
+def test_occupancy_uses_only_the_public_index_api():
+    occ = ScreenOccupancy(window_seconds=60, capacity=1, policy="skip")
+    index = FakeIndex({"s0": 0, "s1": 1})
+    occ.attach(index)
+
+    now = datetime.utcnow()
+    for screen_id, x in (("s0", 1.0), ("s1", 2.0), ("s1", 2.0), ("gone", 3.0)):
+        occ.record(AdPlacement(ad_id=1, screen_id=screen_id, zone_id="z", x=x, y=5.0, assigned_at=now))
+    assert index.load == [1, 2]
+    # μία αναζήτηση θέσης ανά οθόνη (row = y, col = x), μετά από cache
+    assert index.lookups == [("z", 5.0, 1.0, "s0"), ("z", 5.0, 2.0, "s1"), ("z", 5.0, 3.0, "gone")]
+
+    # νέο snapshot: το φορτίο μεταφέρεται με set_load
+    moved = FakeIndex({"s1": 0, "gone": 1})
+    occ.attach(moved)
+    assert moved.load == [2, 1]
+
+    occ.expire(now.timestamp() + 3600)
+    assert moved.load == [0, 0]
+    assert index.load == [1, 2]
+
+
+def test_index_load_follows_occupancy(env):
+    index, occ, _, _, _ = env
+    key, _ = index.recommend_screen(0, 0, 0, occupancy="off")
+    pos = index.screen_position(key.zone_id, key.y, key.x, key.screen_id)
+    assert pos is not None
+    assert index.screen_position(key.zone_id, key.y, key.x, "missing") is None
+
+    occ.record(
+        AdPlacement(
+            ad_id=1, screen_id=key.screen_id, zone_id=key.zone_id, x=key.x, y=key.y,
+            assigned_at=datetime.utcnow(),
+        )
+    )
+    assert index._load[pos] == 1
+    assert index.recommend_screen(0, 0, 0, occupancy="skip") is None
+    occ.expire(datetime.utcnow().timestamp() + occ.window + 1)
+    assert index.recommend_screen(0, 0, 0, occupancy="skip")[0].screen_id == key.screen_id
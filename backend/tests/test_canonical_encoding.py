@@ -0,0 +1,248 @@
+# backend/tests/test_canonical_encoding.py
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from enum import IntEnum
+
+import pytest
+
+from app.security import canonical
+from app.security.canonical import (
+    JsonCanonicalEncoder,
+    OrjsonCanonicalEncoder,
+    _orjson_safe,
+    get_canonical_encoder,
+    set_canonical_encoder,
+)
+from app.security.message_schema import MessageHeader, NodeRole, SignedMessage
+
+
+# -----------------------------
+#  REFERENCE
+# -----------------------------
+
+def reference_bytes(obj) -> bytes:
+    """
+    Το format που υπέγραφε πάντα το SignedMessage: json.dumps με sorted keys,
+    χωρίς κενά, χωρίς ASCII escaping, datetimes σε isoformat().
+    """
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        raise TypeError(type(o).__name__)
+
+    return json.dumps(
+        obj,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=default,
+    ).encode("utf-8")
+
+
+def reference_message_bytes(msg: SignedMessage) -> bytes:
+    return reference_bytes({"header": msg.header.model_dump(), "payload": msg.payload})
+
+
+_needs_orjson = pytest.mark.skipif(canonical.orjson is None, reason="orjson not installed")
+
+ENCODERS = [
+    pytest.param(JsonCanonicalEncoder, id="json"),
+    pytest.param(OrjsonCanonicalEncoder, id="orjson", marks=_needs_orjson),
+]
+
+
+@pytest.fixture(params=ENCODERS)
+def encoder(request):
+    previous = get_canonical_encoder()
+    enc = request.param()
+    set_canonical_encoder(enc)
+    yield enc
+    set_canonical_encoder(previous)
+
+
+# -----------------------------
+#  CASES
+# -----------------------------
+
+class Priority(IntEnum):
+    LOW = 1
+
+
+class Ratio(float):
+    pass
+
+
+AWARE_TS = datetime(2025, 3, 9, 21, 45, 7, 123456, tzinfo=timezone.utc)
+
+NON_ASCII = {
+    "greek": "Οθόνη ζώνης Α",
+    "emoji": "⚽🏟️",
+    "accents": "Café Müller",
+    "cjk": "屏幕",
+    "escapes": 'quote " backslash \\ tab \t newline \n',
+    "control": "\x00\x1f\x7f",
+    "separators": "\u2028\u2029",
+    "surrogate_pair": "\U0001F600",
+    "Ωmega": ["άλφα", "βήτα"],
+}
+
+FLOATS = {
+    "zero": 0.0,
+    "neg_zero": -0.0,
+    "tenth": 0.1,
+    "third": 1 / 3,
+    "coords": [12.5, -7.25, 103.999],
+    "plain_min": 1e-4,
+    "below_plain_min": 9.99e-5,
+    "tiny": 1e-5,
+    "subnormal": 5e-324,
+    "plain_max_edge": 9999999999999998.0,
+    "plain_max": 1e16,
+    "huge": 1.7976931348623157e308,
+    "neg_big": -1.5e20,
+    "int_like": 3.0,
+}
+
+DATETIMES = {
+    "aware": AWARE_TS,
+    "naive": datetime(2025, 1, 1, 10, 0),
+    "offset": datetime(2025, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=2))),
+    "micro": datetime(2025, 1, 1, 10, 0, 0, 1),
+    "date": date(2025, 12, 31),
+    "nested": [{"at": AWARE_TS}],
+}
+
+# Ό,τι το orjson γράφει διαφορετικά: το _orjson_safe πρέπει να τα στείλει στο json
+FALLBACKS = {
+    "float_exponent_small": 1e-5,
+    "float_exponent_large": 1e16,
+    "nan": float("nan"),
+    "inf": float("inf"),
+    "neg_inf": float("-inf"),
+    "int_above_uint64": 2 ** 64,
+    "int_below_int64": -(2 ** 63) - 1,
+    "int_enum": Priority.LOW,
+    "float_subclass": Ratio(0.5),
+    "int_keys": {1: "a", 2: "b"},
+    "nested_in_list": [{"ok": 1, "bad": 1e300}],
+    "nested_in_tuple": ("x", (2 ** 70,)),
+}
+
+PAYLOADS = [
+    pytest.param({"ad_id": 7, "screens": ["s-1", "s-2"], "active": True, "note": None}, id="plain"),
+    pytest.param(NON_ASCII, id="non_ascii"),
+    pytest.param(FLOATS, id="floats"),
+    pytest.param(DATETIMES, id="datetimes"),
+    pytest.param({"ints": [0, -1, 2 ** 63 - 1, -(2 ** 63), 2 ** 64 - 1]}, id="int64_bounds"),
+    pytest.param({"b": {"d": 1, "c": [{"z": 1, "a": 2}]}, "a": ()}, id="key_order"),
+] + [pytest.param({name: value}, id=f"fallback_{name}") for name, value in FALLBACKS.items()]
+
+
+def make_message(payload, **header) -> SignedMessage:
+    fields = dict(
+        node_id="controller-1",
+        zone_id="glassfloor-1",
+        role=NodeRole.CONTROLLER,
+        msg_type="PLACEMENT_UPDATE",
+        timestamp=AWARE_TS,
+        nonce="0" * 32,
+        alg="HMAC_SHA256",
+    )
+    fields.update(header)
+    return SignedMessage(header=MessageHeader(**fields), payload=payload, hmac="")
+
+
+# -----------------------------
+#  ENCODER
+# -----------------------------
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_encoder_matches_reference(encoder, payload):
+    assert encoder.encode(payload) == reference_bytes(payload)
+
+
+@pytest.mark.parametrize("value", list(FALLBACKS.values()), ids=list(FALLBACKS))
+def test_orjson_safe_rejects_divergent_values(value):
+    assert not _orjson_safe(value)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Οθόνη",
+        None,
+        True,
+        0.0,
+        1e-4,
+        9999999999999998.0,
+        2 ** 64 - 1,
+        -(2 ** 63),
+        AWARE_TS,
+        NodeRole.SYSTEM,
+        {"a": [1, 0.5, ("x", None)]},
+    ],
+)
+def test_orjson_safe_accepts_identical_values(value):
+    assert _orjson_safe(value)
+
+
+# -----------------------------
+#  SIGNED MESSAGE
+# -----------------------------
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_signed_message_canonical_bytes(encoder, payload):
+    msg = make_message(payload)
+    assert msg._to_canonical_bytes() == reference_message_bytes(msg)
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        pytest.param({}, id="default"),
+        pytest.param({"zone_id": None, "alg": None}, id="nulls"),
+        pytest.param({"node_id": "οθόνη-Α", "msg_type": "ΤΥΠΟΣ"}, id="non_ascii"),
+        pytest.param({"timestamp": datetime(2025, 1, 1, 10, 0)}, id="naive_ts"),
+        pytest.param(
+            {"timestamp": datetime(2025, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))},
+            id="offset_ts",
+        ),
+        pytest.param({"role": NodeRole.ZONE_DISPLAY, "version": "2.0"}, id="role"),
+    ],
+)
+def test_signed_message_header_fields(encoder, header):
+    msg = make_message({"x": 1.5}, **header)
+    assert msg._to_canonical_bytes() == reference_message_bytes(msg)
+
+
+def test_canonical_bytes_follow_field_assignment(encoder):
+    msg = make_message({"x": 1})
+    msg._to_canonical_bytes()
+
+    msg.payload = {"x": "Ωmega", "y": 1e-7}
+    assert msg._to_canonical_bytes() == reference_message_bytes(msg)
+
+    msg.header.timestamp = AWARE_TS + timedelta(seconds=1)
+    msg.header.zone_id = "ζώνη-2"
+    assert msg._to_canonical_bytes() == reference_message_bytes(msg)
+
+    msg.payload["z"] = 2
+    msg.invalidate_canonical()
+    assert msg._to_canonical_bytes() == reference_message_bytes(msg)
+
+
+@_needs_orjson
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_hmac_identical_across_encoders(payload):
+    previous = get_canonical_encoder()
+    try:
+        digests = []
+        for enc in (JsonCanonicalEncoder(), OrjsonCanonicalEncoder()):
+            set_canonical_encoder(enc)
+            msg = make_message(payload)
+            digests.append(msg.compute_hmac("s3cret"))
+            assert msg.verify_hmac("s3cret")
+    finally:
+        set_canonical_encoder(previous)
+    assert digests[0] == digests[1]
@@ -0,0 +1,128 @@
+# backend/tests/test_event_bus.py
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.websockets.bus import PostgresEventBus
+
+
+class FakeNotify:
+    """Στη θέση του _notify_batch: κρατάει τα batches, προαιρετικά αργό ή "σπασμένο"."""
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0) -> None:
+        self.delay = delay
+        self.fail_first = fail_first
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        with self._lock:
+            if self.fail_first:
+                self.fail_first -= 1
+                raise RuntimeError("db down")
+            self.batches.append([json.loads(m)["d"] for m in batch])
+
+
+def make_bus(monkeypatch, notify: FakeNotify, **kwargs) -> PostgresEventBus:
+    bus = PostgresEventBus(channel="test_bus", **kwargs)
+
+    async def noop():
+        return None
+
+    # Χωρίς LISTEN: μόνο η πλευρά του send
+    monkeypatch.setattr(bus._listener, "start", noop)
+    monkeypatch.setattr(bus._listener, "stop", noop)
+    monkeypatch.setattr(bus, "_notify_batch", notify)
+    return bus
+
+
+def test_stop_drains_pending_messages_in_order(monkeypatch):
+    notify = FakeNotify(delay=0.01)
+    bus = make_bus(monkeypatch, notify, batch_size=2, drain_timeout=5.0)
+
+    async def scenario():
+        await bus.start()
+        for n in range(7):
+            bus.publish("placements", n)
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert [n for batch in notify.batches for n in batch] == list(range(7))
+    assert all(len(batch) <= 2 for batch in notify.batches)
+    assert bus.stats()["pending"] == 0
+    assert bus.failed == 0
+
+
+def test_stop_waits_for_the_batch_in_flight(monkeypatch):
+    notify = FakeNotify(delay=0.2)
+    bus = make_bus(monkeypatch, notify, batch_size=10, drain_timeout=5.0)
+
+    async def scenario():
+        await bus.start()
+        bus.publish("placements", "first")
+        await asyncio.sleep(0.05)          # το batch είναι ήδη στον worker thread
+        bus.publish("placements", "second")
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert notify.batches == [["first"], ["second"]]
+
+
+def test_stop_gives_up_after_drain_timeout(monkeypatch):
+    notify = FakeNotify(delay=0.3)
+    bus = make_bus(monkeypatch, notify, batch_size=1, drain_timeout=0.1)
+
+    async def scenario():
+        await bus.start()
+        for n in range(5):
+            bus.publish("placements", n)
+        started = time.monotonic()
+        await bus.stop()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed < 1.0
+    # ό,τι δεν στάλθηκε μετράει ως failed, δεν μένει στην ουρά
+    assert bus.stats()["pending"] == 0
+    assert bus.failed == 4  # το 1ο ήταν ήδη στον worker thread
+
+
+def test_failed_batch_is_counted_and_drain_continues(monkeypatch):
+    notify = FakeNotify(fail_first=1)
+    bus = make_bus(monkeypatch, notify, batch_size=2, drain_timeout=5.0)
+
+    async def scenario():
+        await bus.start()
+        for n in range(4):
+            bus.publish("placements", n)
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert bus.failed == 2
+    assert [n for batch in notify.batches for n in batch] == [2, 3]
+
+
+def test_publish_after_stop_is_ignored(monkeypatch):
+    notify = FakeNotify()
+    bus = make_bus(monkeypatch, notify, drain_timeout=1.0)
+
+    async def scenario():
+        await bus.start()
+        await bus.stop()
+        bus.publish("placements", "late")
+
+    asyncio.run(scenario())
+    assert notify.batches == []
+    assert bus.stats()["pending"] == 0
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 200])
+def test_stop_without_start_is_a_noop(monkeypatch, batch_size):
+    bus = make_bus(monkeypatch, FakeNotify(), batch_size=batch_size)
+    asyncio.run(bus.stop())
+    assert bus.failed == 0
@@ -0,0 +1,257 @@
+# backend/tests/test_placement_persistence.py
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import psycopg2
+import pytest
+
+from app.models.placement_models import AdPlacement
+from app.services import placement_persistence
+from app.services.placement_persistence import PlacementWriteBehind
+
+
+class FakeDB:
+    """
+    Ψεύτικη βάση για το _write_batch (περνάει από το πραγματικό execute_values):
+    - down=True: η σύνδεση αποτυγχάνει (OperationalError, όπως με πεσμένη βάση)
+    - γραμμή με ad_id < 0: το INSERT σκάει με IntegrityError ("δηλητηριώδης" γραμμή)
+    - fail_times: τα επόμενα τόσα INSERT σκάνε με IntegrityError, μετά περνάνε
+    - gate: το INSERT περιμένει μέχρι set() (batch "in flight")
+    """
+
+    def __init__(self) -> None:
+        self.down = False
+        self.fail_times = 0
+        self.gate = None
+        self.entered = threading.Event()
+        self.rows = []
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            self.attempts += 1
+        if self.down:
+            raise psycopg2.OperationalError("could not connect to server")
+        yield FakeConnection(self)
+
+
+class FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self, db: FakeDB) -> None:
+        self.db = db
+        self.staged = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        with self.db._lock:
+            self.db.rows.extend(self.staged)
+
+
+class FakeCursor:
+    def __init__(self, conn: FakeConnection) -> None:
+        self.connection = conn
+        self.args = []
+
+    def mogrify(self, template, args):
+        self.args.append(args)
+        return b"(row)"
+
+    def execute(self, sql) -> None:
+        db = self.connection.db
+        db.entered.set()
+        if db.gate is not None:
+            assert db.gate.wait(5)
+        with db._lock:
+            if db.fail_times:
+                db.fail_times -= 1
+                raise psycopg2.IntegrityError("violates foreign key constraint")
+        if any(args[0] < 0 for args in self.args):
+            raise psycopg2.IntegrityError("violates check constraint")
+        self.connection.staged.extend(self.args)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(placement_persistence, "db_connection", fake.connection)
+    return fake
+
+
+def placement(ad_id: int) -> AdPlacement:
+    return AdPlacement(
+        ad_id=ad_id,
+        screen_id=f"s-{abs(ad_id)}",
+        zone_id="glassfloor-1",
+        x=1.0,
+        y=2.0,
+        assigned_at=datetime(2025, 1, 1, 10, 0),
+    )
+
+
+async def wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+def written_ids(db: FakeDB):
+    return [row[0] for row in db.rows]
+
+
+def make_writer(**kwargs) -> PlacementWriteBehind:
+    kwargs.setdefault("flush_interval", 0.01)
+    return PlacementWriteBehind(**kwargs)
+
+
+# -----------------------------
+#  RETRIES / DEAD LETTER
+# -----------------------------
+
+def test_poison_batch_is_dead_lettered_after_max_retries(db, capsys):
+    writer = make_writer(batch_size=3, max_retries=3)
+
+    async def scenario():
+        await writer.start()
+        for ad_id in (1, -2, 3):
+            writer.enqueue(placement(ad_id))
+        await wait_until(lambda: writer.stats()["dead_lettered"] == 3)
+        # η ουρά δεν μπλοκάρει πια: τα επόμενα γράφονται κανονικά
+        for ad_id in (4, 5):
+            writer.enqueue(placement(ad_id))
+        await wait_until(lambda: writer.stats()["written"] == 2)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert db.attempts == 3 + 1
+    assert written_ids(db) == [4, 5]
+    stats = writer.stats()
+    assert stats["failures"] == 3
+    assert stats["pending"] == 0
+    assert stats["dropped"] == 0
+
+    out = capsys.readouterr().out
+    assert "attempt 1/3" in out and "attempt 2/3" in out
+    assert "placements batch DROPPED after 3 attempts (3 rows)" in out
+    # κάθε πεταμένη γραμμή καταγράφεται (dead letter)
+    assert out.count("dropped placement (") == 3
+    assert "dropped placement (-2, 's-2'" in out
+
+
+def test_retry_count_resets_after_a_successful_write(db, capsys):
+    writer = make_writer(batch_size=2, max_retries=3)
+
+    async def scenario():
+        await writer.start()
+        # 2 αποτυχίες < max_retries: η 3η προσπάθεια γράφει το batch
+        db.fail_times = 2
+        writer.enqueue(placement(1))
+        await wait_until(lambda: writer.stats()["written"] == 1)
+        # το επόμενο batch ξεκινάει από 0 προσπάθειες
+        db.fail_times = 1
+        writer.enqueue(placement(2))
+        await wait_until(lambda: writer.stats()["written"] == 2)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert written_ids(db) == [1, 2]
+    assert writer.stats()["dead_lettered"] == 0
+    out = capsys.readouterr().out.splitlines()
+    attempts = [
+        line.split("attempt ")[1].split(")")[0]
+        for line in out
+        if "placements flush FAILED" in line
+    ]
+    assert attempts == ["1/3", "2/3", "1/3"]
+
+
+def test_connection_errors_retry_without_limit(db):
+    writer = make_writer(batch_size=2, max_retries=2)
+    db.down = True
+
+    async def scenario():
+        await writer.start()
+        for ad_id in (1, 2, 3):
+            writer.enqueue(placement(ad_id))
+        # πολύ περισσότερες αποτυχίες από το max_retries: τίποτα δεν πετιέται
+        await wait_until(lambda: writer.stats()["failures"] >= 10)
+        assert writer.stats()["dead_lettered"] == 0
+        assert writer.stats()["pending"] == 3
+
+        db.down = False
+        await wait_until(lambda: writer.stats()["written"] == 3)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert written_ids(db) == [1, 2, 3]
+
+
+# -----------------------------
+#  max_pending
+# -----------------------------
+
+def test_max_pending_applies_after_requeue(db):
+    writer = make_writer(batch_size=3, max_pending=4, max_retries=100)
+    db.gate = threading.Event()
+
+    async def scenario():
+        await writer.start()
+        for ad_id in (-1, 2, 3, 4):
+            writer.enqueue(placement(ad_id))
+        await asyncio.to_thread(db.entered.wait, 5)
+
+        # όσο το batch [-1, 2, 3] γράφεται, έρχονται 3 νέες αναθέσεις (χωράνε: 1 + 3 <= 4)
+        for ad_id in (5, 6, 7):
+            writer.enqueue(placement(ad_id))
+        assert writer.stats()["dropped"] == 0
+
+        db.gate.set()
+        # requeue: [-1, 2, 3, 4, 5, 6, 7] -> τα 3 παλαιότερα πετιούνται
+        await wait_until(lambda: writer.stats()["written"] == 4)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert written_ids(db) == [4, 5, 6, 7]
+    stats = writer.stats()
+    assert stats["failures"] == 1
+    assert stats["dropped"] == 3
+    assert stats["dead_lettered"] == 0
+    assert stats["pending"] == 0
+
+
+def test_enqueue_drops_oldest_when_full(db):
+    writer = make_writer(batch_size=100, max_pending=3)
+    db.down = True
+
+    async def scenario():
+        await writer.start()
+        for ad_id in range(1, 6):
+            writer.enqueue(placement(ad_id))
+        pending = [p.ad_id for p in writer._pending]
+        db.down = False
+        await writer.stop()
+        return pending
+
+    pending = asyncio.run(scenario())
+    assert pending == [3, 4, 5]
+    assert writer.stats()["dropped"] == 2
+    assert written_ids(db) == [3, 4, 5]
+
+
+def test_enqueue_without_running_writer_is_a_noop(db):
+    writer = make_writer()
+    writer.enqueue(placement(1))
+    assert writer.stats()["pending"] == 0
+    assert db.attempts == 0
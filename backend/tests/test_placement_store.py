@@ -0,0 +1,201 @@
+# backend/tests/test_placement_store.py
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.placement_models import AdPlacement
+from app.services.placement_service import PlacementStore
+
+T0 = datetime(2025, 1, 1, 10, 0)
+
+
+def placement(n: int, seconds: float = 0.0) -> AdPlacement:
+    # ad_id == θέση στο log (1, 2, 3, ...), ώστε τα asserts να διαβάζονται εύκολα
+    return AdPlacement(
+        ad_id=n,
+        screen_id=f"s-{n % 4}",
+        zone_id="glassfloor-1",
+        x=1.0,
+        y=2.0,
+        assigned_at=T0 + timedelta(seconds=seconds),
+    )
+
+
+def fill(store: PlacementStore, count: int, start: int = 1) -> None:
+    for n in range(start, start + count):
+        store.add(placement(n, seconds=n))
+
+
+def ids(items):
+    return [p.ad_id for p in items]
+
+
+def walk(store: PlacementStore, after: int, limit: int, since=None, until=None):
+    """Όλες οι σελίδες από after μέχρι την πρώτη άδεια (όπως το NDJSON stream)."""
+    pages = []
+    while True:
+        items, cursor = store.page(after, limit, since, until)
+        if not items:
+            return pages, cursor
+        assert cursor == items[-1].ad_id
+        assert cursor > after
+        pages.append(ids(items))
+        after = cursor
+
+
+# -----------------------------
+#  ΑΔΕΙΟ STORE / ΤΕΛΕΥΤΑΙΑ ΣΕΛΙΔΑ
+# -----------------------------
+
+@pytest.mark.parametrize("after", [0, 1, 50])
+def test_empty_store_returns_no_items_and_keeps_cursor(after):
+    store = PlacementStore(max_history=10)
+    assert store.page(after, 5) == ([], after)
+
+
+def test_pages_cover_the_log_and_last_page_is_short():
+    store = PlacementStore(max_history=100)
+    fill(store, 7)
+
+    pages, cursor = walk(store, 0, 3)
+    assert pages == [[1, 2, 3], [4, 5, 6], [7]]
+    # μετά την τελευταία σελίδα ο cursor μένει εκεί που ήταν
+    assert cursor == 7
+    assert store.page(7, 3) == ([], 7)
+
+
+def test_exact_multiple_of_limit_ends_with_empty_page():
+    store = PlacementStore(max_history=100)
+    fill(store, 6)
+    assert walk(store, 0, 3) == ([[1, 2, 3], [4, 5, 6]], 6)
+
+
+def test_cursor_resumes_after_new_appends():
+    store = PlacementStore(max_history=100)
+    fill(store, 4)
+    items, cursor = store.page(0, 10)
+    assert (ids(items), cursor) == ([1, 2, 3, 4], 4)
+
+    fill(store, 2, start=5)
+    assert store.page(cursor, 10) == (store.all()[-2:], 6)
+
+
+# -----------------------------
+#  EVICTION
+# -----------------------------
+
+def test_paging_across_eviction_keeps_positions_stable():
+    store = PlacementStore(max_history=5)
+    fill(store, 5)
+    items, cursor = store.page(0, 2)
+    assert (ids(items), cursor) == ([1, 2], 2)
+
+    # evict των 1..3: η θέση 3 χάθηκε, οι υπόλοιπες κρατάνε τον αριθμό τους
+    fill(store, 3, start=6)
+    assert ids(store.all()) == [4, 5, 6, 7, 8]
+    items, cursor = store.page(cursor, 2)
+    assert (ids(items), cursor) == ([4, 5], 5)
+    items, cursor = store.page(cursor, 2)
+    assert (ids(items), cursor) == ([6, 7], 7)
+
+
+def test_cursor_older_than_retention_starts_at_oldest_retained():
+    store = PlacementStore(max_history=3)
+    fill(store, 10)
+    assert store.stats()["evicted"] == 7
+    items, cursor = store.page(2, 10)
+    assert (ids(items), cursor) == ([8, 9, 10], 10)
+
+
+def test_cursor_older_than_time_retention():
+    store = PlacementStore(max_history=1000, retention_seconds=10)
+    fill(store, 20)
+    # η τελευταία στα 20s: ό,τι είναι πριν από τα 10s έχει φύγει
+    assert ids(store.all())[0] == 10
+    items, cursor = store.page(3, 2)
+    assert (ids(items), cursor) == ([10, 11], 11)
+
+
+def test_cursor_exactly_at_eviction_boundary():
+    store = PlacementStore(max_history=4)
+    fill(store, 10)          # κρατάει 7..10, evicted == 6
+    assert store.page(6, 2) == (store.all()[:2], 8)
+    assert store.page(5, 2) == (store.all()[:2], 8)
+    assert store.page(7, 2) == (store.all()[1:3], 9)
+
+
+def test_positions_survive_log_compaction():
+    store = PlacementStore(max_history=10)
+    fill(store, 3000)        # head > 1024: το log συμπιέζεται
+    assert len(store._log) < 3000
+    items, cursor = store.page(2995, 3)
+    assert (ids(items), cursor) == ([2996, 2997, 2998], 2998)
+    assert walk(store, 2995, 3) == ([[2996, 2997, 2998], [2999, 3000]], 3000)
+
+
+# -----------------------------
+#  since / until
+# -----------------------------
+
+def test_since_until_bound_the_pages():
+    store = PlacementStore(max_history=100)
+    fill(store, 10)
+    since, until = T0 + timedelta(seconds=3), T0 + timedelta(seconds=8)
+    assert walk(store, 0, 2, since, until) == ([[3, 4], [5, 6], [7]], 7)
+    # cursor μετά το until: τίποτα, ο cursor δεν γυρίζει πίσω
+    assert store.page(9, 2, since, until) == ([], 9)
+
+
+def test_since_after_everything_moves_cursor_to_the_end():
+    store = PlacementStore(max_history=100)
+    fill(store, 5)
+    assert store.page(0, 2, since=T0 + timedelta(hours=1)) == ([], 5)
+
+
+# -----------------------------
+#  ΤΥΧΑΙΑ ΣΕΝΑΡΙΑ ΕΝΑΝΤΙ BRUTE FORCE
+# -----------------------------
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_paging_matches_brute_force(seed):
+    rng = random.Random(seed)
+    max_history = rng.choice([3, 10, 50, 2000])
+    retention = rng.choice([0, 30, 200])
+    store = PlacementStore(max_history=max_history, retention_seconds=retention)
+
+    added = []
+    clock = 0.0
+    for n in range(1, rng.randint(0, 1500) + 1):
+        clock += rng.choice([0.0, 0.5, 1.0, 3.0])   # και ίδια timestamps (ties)
+        p = placement(n, seconds=clock)
+        store.add(p)
+        added.append(p)
+
+    # Brute force: κρατιούνται τα τελευταία max_history, όσα δεν είναι παλαιότερα του retention
+    kept = added[-max_history:] if added else []
+    if retention and kept:
+        cutoff = kept[-1].assigned_at - timedelta(seconds=retention)
+        kept = [p for p in kept if p.assigned_at >= cutoff]
+    assert ids(store.all()) == ids(kept)
+
+    for _ in range(10):
+        after = rng.randint(0, len(added) + 5)
+        limit = rng.randint(1, 40)
+        since = until = None
+        if rng.random() < 0.5:
+            since = T0 + timedelta(seconds=rng.uniform(0, clock + 1))
+        if rng.random() < 0.5:
+            until = T0 + timedelta(seconds=rng.uniform(0, clock + 1))
+
+        expected = [
+            p.ad_id
+            for p in kept
+            if p.ad_id > after
+            and (since is None or p.assigned_at >= since)
+            and (until is None or p.assigned_at < until)
+        ]
+        pages, _ = walk(store, after, limit, since, until)
+        assert [n for page in pages for n in page] == expected
+        assert all(len(page) == limit for page in pages[:-1])
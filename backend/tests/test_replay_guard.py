@@ -0,0 +1,176 @@
+# backend/tests/test_replay_guard.py
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.security.replay_guard import ReplayGuard, ReplayVerdict
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NOW = 1_700_000_000.0          # ακέραιο: αρχή bucket για κάθε bucket_seconds που χρησιμοποιούμε
+WINDOW = 30.0
+SKEW = 5.0
+
+ACCEPTED = ReplayVerdict.ACCEPTED
+REPLAY = ReplayVerdict.REPLAY
+STALE = ReplayVerdict.STALE
+FUTURE = ReplayVerdict.FUTURE
+
+
+def at(seconds: float) -> datetime:
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def make_guard(**kwargs) -> ReplayGuard:
+    kwargs.setdefault("window_seconds", WINDOW)
+    kwargs.setdefault("future_skew_seconds", SKEW)
+    kwargs.setdefault("bucket_seconds", 1.0)
+    kwargs.setdefault("max_nonces", 1000)
+    return ReplayGuard(**kwargs)
+
+
+# -----------------------------
+#  ΟΡΙΑ WINDOW / FUTURE SKEW
+# -----------------------------
+
+def test_window_lower_edge_is_inclusive():
+    guard = make_guard()
+    assert guard.check_nonce("n", "a", at(NOW - WINDOW), now=NOW) is ACCEPTED
+    assert guard.check_nonce("n", "b", at(NOW - WINDOW - 1e-6), now=NOW) is STALE
+    assert guard.stats()["stale"] == 1
+
+
+def test_future_skew_edge_is_inclusive():
+    guard = make_guard()
+    assert guard.check_nonce("n", "a", at(NOW + SKEW), now=NOW) is ACCEPTED
+    assert guard.check_nonce("n", "b", at(NOW + SKEW + 1e-6), now=NOW) is FUTURE
+    # ένα FUTURE δεν αποθηκεύεται: το ίδιο nonce περνάει όταν έρθει η ώρα του
+    assert len(guard) == 1
+    assert guard.check_nonce("n", "b", at(NOW + SKEW + 1e-6), now=NOW + 1) is ACCEPTED
+    assert guard.stats()["future"] == 1
+
+
+def test_naive_timestamps_are_utc():
+    guard = make_guard()
+    naive = at(NOW).replace(tzinfo=None)
+    assert guard.check_nonce("n", "a", naive, now=NOW) is ACCEPTED
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW) is REPLAY
+
+
+# -----------------------------
+#  REPLAY
+# -----------------------------
+
+def test_replay_is_keyed_by_node_and_nonce():
+    guard = make_guard()
+    ts = at(NOW - 0.5)
+    assert guard.check_nonce("n1", "a", ts, now=NOW) is ACCEPTED
+    assert guard.check_nonce("n1", "a", ts, now=NOW + 3) is REPLAY
+    assert guard.check_nonce("n2", "a", ts, now=NOW) is ACCEPTED
+    assert guard.check_nonce("n1", "b", ts, now=NOW) is ACCEPTED
+    assert guard.stats()["replays"] == 1
+
+
+def test_replay_until_window_end_then_stale():
+    guard = make_guard()
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW) is ACCEPTED
+
+    # ts == now - window: ακόμα μέσα, το bucket υπάρχει
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW + WINDOW) is REPLAY
+    assert guard.stats()["buckets"] == 1
+    # πέρα από το window: STALE πριν καν κοιτάξουμε το bucket
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW + WINDOW + 1e-6) is STALE
+    # ίδιο bucket με το cutoff: δεν πετιέται ακόμα
+    assert guard.check_nonce("n", "x", at(NOW + 29), now=NOW + WINDOW + 0.999) is ACCEPTED
+    assert guard.stats()["buckets"] == 2
+    # το cutoff πέρασε το bucket NOW: πετιέται ολόκληρο
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW + WINDOW + 1) is STALE
+    assert guard.stats()["buckets"] == 1
+    assert guard.stats()["evicted_buckets"] == 1
+
+
+@pytest.mark.parametrize("bucket_seconds", [0.25, 1.0, 7.0, 45.0])
+def test_replay_is_never_accepted_at_any_later_time(bucket_seconds):
+    """Κάθε αποδεκτό μήνυμα, όποτε κι αν ξαναέρθει, είναι REPLAY ή STALE."""
+    rng = random.Random(int(bucket_seconds * 100))
+    guard = make_guard(bucket_seconds=bucket_seconds)
+    now = NOW
+    sent = []
+    for n in range(400):
+        # βήματα 1/64 s: ακριβή και σε float και σε microseconds του datetime
+        now += rng.choice([0, 1, 16, 32, 64, 192]) / 64
+        ts = now + rng.randint(int(-WINDOW * 64), int(SKEW * 64)) / 64
+        if rng.random() < 0.1:
+            ts = now - WINDOW               # ακριβώς στο όριο
+        nonce = f"nonce-{n}"
+        assert guard.check_nonce("n", nonce, at(ts), now=now) is ACCEPTED
+        sent.append((nonce, ts))
+
+        nonce, ts = rng.choice(sent)
+        expected = STALE if ts < now - WINDOW else REPLAY
+        assert guard.check_nonce("n", nonce, at(ts), now=now) is expected
+
+    # μετά από πολύ καιρό: όλα STALE και τα buckets έχουν αδειάσει
+    later = now + WINDOW + SKEW + bucket_seconds + 1
+    assert all(guard.check_nonce("n", nonce, at(ts), now=later) is STALE for nonce, ts in sent)
+    assert len(guard) == 0
+
+
+def test_late_message_buckets_expire_in_order():
+    guard = make_guard()
+    for nonce, offset in (("a", -1), ("b", -10), ("c", -5)):
+        assert guard.check_nonce("n", nonce, at(NOW + offset), now=NOW) is ACCEPTED
+    assert list(guard._order) == [NOW - 10, NOW - 5, NOW - 1]
+
+    # cutoff = NOW - 9: μόνο το bucket του "b" πετιέται
+    now = NOW + WINDOW - 9
+    assert guard.check_nonce("n", "c", at(NOW - 5), now=now) is REPLAY
+    assert guard.check_nonce("n", "a", at(NOW - 1), now=now) is REPLAY
+    assert list(guard._order) == [NOW - 5, NOW - 1]
+    assert len(guard) == 2
+
+
+# -----------------------------
+#  ΧΩΡΗΤΙΚΟΤΗΤΑ (fail closed)
+# -----------------------------
+
+def test_capacity_eviction_raises_the_stale_floor():
+    guard = make_guard(max_nonces=3)
+    for nonce, offset in (("a", -3), ("b", -2), ("c", -1), ("d", 0)):
+        assert guard.check_nonce("n", nonce, at(NOW + offset), now=NOW) is ACCEPTED
+
+    stats = guard.stats()
+    assert (stats["size"], stats["capacity_evictions"]) == (3, 1)
+    assert guard._floor == NOW - 3
+    # το "a" δεν είναι πια στη μνήμη, αλλά το replay του ΔΕΝ περνάει
+    assert guard.check_nonce("n", "a", at(NOW - 3), now=NOW) is STALE
+    # ούτε νέο nonce στο ίδιο (ή παλαιότερο) bucket, ακόμα κι αν είναι μέσα στο window
+    assert guard.check_nonce("n", "e", at(NOW - 2.5), now=NOW) is STALE
+    assert guard.check_nonce("n", "f", at(NOW - 20), now=NOW) is STALE
+    # το επόμενο bucket δουλεύει κανονικά
+    assert guard.check_nonce("n", "b", at(NOW - 2), now=NOW) is REPLAY
+
+
+def test_capacity_eviction_of_the_only_bucket_fails_closed():
+    guard = make_guard(max_nonces=2)
+    ts = at(NOW)
+    for nonce in ("a", "b", "c"):
+        assert guard.check_nonce("n", nonce, ts, now=NOW) is ACCEPTED
+    # το 3ο nonce ξεχείλισε το μοναδικό bucket: πετιέται ολόκληρο
+    assert len(guard) == 0
+    for nonce in ("a", "b", "c", "d"):
+        assert guard.check_nonce("n", nonce, ts, now=NOW) is STALE
+    # το επόμενο bucket δέχεται ξανά
+    assert guard.check_nonce("n", "a", at(NOW + 1), now=NOW + 1) is ACCEPTED
+
+
+def test_floor_only_blocks_buckets_that_were_dropped():
+    guard = make_guard(max_nonces=1)
+    assert guard.check_nonce("n", "a", at(NOW), now=NOW) is ACCEPTED
+    assert guard.check_nonce("n", "b", at(NOW + 1), now=NOW + 1) is ACCEPTED
+    assert guard._floor == NOW
+    assert guard.check_nonce("n", "c", at(NOW + 1), now=NOW + 1) is ACCEPTED
+    assert guard._floor == NOW + 1
+    assert guard.check_nonce("n", "d", at(NOW + 2), now=NOW + 2) is ACCEPTED
+    assert guard.check_nonce("n", "d", at(NOW + 2), now=NOW + 2) is REPLAY
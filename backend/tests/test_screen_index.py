@@ -0,0 +1,284 @@
+# backend/tests/test_screen_index.py
+
+import json
+import random
+import time
+from datetime import datetime
+from math import inf
+
+import numpy as np
+import pytest
+
+from app.models.placement_models import AdPlacement
+from app.services import layout_service
+from app.services.layout_service import LayoutService, MultiDimScreenIndex
+from app.services.occupancy import ScreenOccupancy
+
+CATEGORIES = ["tech", "sports", "food", "auto"]
+WINDOWS = ["halftime", "prime_time", "pre_game"]
+TYPES = ["megatron_panel", "tile", "banner"]
+
+
+def random_layout(rng: random.Random, zones: int, side: int, explicit: int) -> dict:
+    """
+    Ζώνες grid (screen_prefix) και ζώνες με ρητά screens (τυχαίες, και
+    διπλές θέσεις, και αρνητικές γραμμές), με τυχαία επιλεξιμότητα.
+    """
+
+    def subset(pool, p_empty):
+        return [] if rng.random() < p_empty else rng.sample(pool, rng.randint(1, len(pool)))
+
+    specs = []
+    for z in range(zones):
+        spec = {
+            "id": f"z{z}",
+            "name": f"Zone {z}",
+            "description": "",
+            "rows": side,
+            "cols": side,
+            "screen_type": rng.choice(TYPES),
+            "ad_categories": subset(CATEGORIES, 0.5),
+        }
+        if z % 2 == 0:
+            spec["screen_prefix"] = f"P{z}"
+            spec["time_windows"] = subset(WINDOWS, 0.4)
+        else:
+            spec["screens"] = [
+                {
+                    "id": f"S{z}-{k}",
+                    "row": rng.randint(-3, side - 1),
+                    "col": rng.randint(0, side - 1),
+                    **({"ad_categories": subset(CATEGORIES, 0.3)} if rng.random() < 0.5 else {}),
+                    **({"time_windows": subset(WINDOWS, 0.3)} if rng.random() < 0.5 else {}),
+                    **({"screen_type": "megatron_panel"} if rng.random() < 0.2 else {}),
+                }
+                for k in range(explicit)
+            ]
+        specs.append(spec)
+    return {"zones": specs}
+
+
+class BruteForce:
+    """Γραμμικό scan πάνω στα materialized screens: η "σωστή" απάντηση."""
+
+    def __init__(self, index: MultiDimScreenIndex) -> None:
+        self.screens = index.get_all_screens()
+        self.ids = [s.id for s in self.screens]
+        self.xs = np.array([s.col for s in self.screens], dtype=np.float64)
+        self.ys = np.array([s.row for s in self.screens], dtype=np.float64)
+        self.zones = np.array([s.zone_id for s in self.screens])
+        self.types = np.array([s.screen_type for s in self.screens])
+        self.load = np.zeros(len(self.screens), dtype=np.int64)
+        self._accepts = {}
+
+    def _accepting(self, field: str, value) -> np.ndarray:
+        # κενή λίστα = η οθόνη δέχεται κάθε τιμή
+        key = (field, value)
+        if key not in self._accepts:
+            self._accepts[key] = np.array(
+                [not getattr(s, field) or value in getattr(s, field) for s in self.screens],
+                dtype=bool,
+            )
+        return self._accepts[key]
+
+    def eligible(self, zone_id, screen_type, ad_category, time_window) -> np.ndarray:
+        mask = np.ones(len(self.screens), dtype=bool)
+        if zone_id is not None:
+            mask &= self.zones == zone_id
+        if screen_type is not None:
+            mask &= self.types == screen_type
+        if ad_category is not None:
+            mask &= self._accepting("ad_categories", ad_category)
+        if time_window is not None:
+            mask &= self._accepting("time_windows", time_window)
+        return mask
+
+    def distances(self, x, y) -> np.ndarray:
+        return np.hypot(self.xs - x, self.ys - y)
+
+    def near(self, x, y, radius, *filters) -> list:
+        if not (np.isfinite(x) and np.isfinite(y)):
+            return []
+        hit = self.eligible(*filters) & (self.distances(x, y) <= radius)
+        return [self.ids[i] for i in np.flatnonzero(hit)]
+
+    def nearest(self, x, y, k, max_distance, *filters, skip_below=None, weight=0.0) -> list:
+        mask = self.eligible(*filters)
+        dist = self.distances(x, y)
+        mask = mask & (dist <= max_distance)
+        if skip_below is not None:
+            mask = mask & (self.load < skip_below)
+        idx = np.flatnonzero(mask)
+        rank = dist[idx] + weight * self.load[idx] if weight else dist[idx]
+        # κατάταξη, μετά σειρά layout (ισοπαλίες)
+        order = np.lexsort((idx, rank))[:k]
+        return [(self.ids[i], float(dist[i])) for i in idx[order]]
+
+
+@pytest.fixture(scope="module", params=[(0, 5, 70, 4500), (1, 4, 30, 600), (2, 3, 12, 40)])
+def columns(request, tmp_path_factory):
+    seed, zones, side, explicit = request.param
+    rng = random.Random(seed)
+    path = tmp_path_factory.mktemp("layouts") / f"layout-{seed}.json"
+    path.write_text(json.dumps(random_layout(rng, zones, side, explicit)), encoding="utf-8")
+    return seed, side, LayoutService.load_layout(str(path))
+
+
+@pytest.fixture(scope="module", params=[1.0, 4.0, 9.5])
+def case(request, columns):
+    seed, side, cols = columns
+    index = MultiDimScreenIndex.from_columns(cols, cell_size=request.param)
+    return random.Random(seed * 10 + int(request.param)), side, index, BruteForce(index)
+
+
+def random_query(rng: random.Random, side: int, index: MultiDimScreenIndex):
+    # Ακέραια σημεία (πολλές ισοπαλίες) και σημεία έξω από τα όρια των ζωνών
+    if rng.random() < 0.4:
+        x, y = rng.randint(-2, side + 2), rng.randint(-4, side + 2)
+    else:
+        x, y = rng.uniform(-side / 2, side * 1.5), rng.uniform(-side / 2, side * 1.5)
+    filters = (
+        rng.choice([None, None, *index.zone_ids[:3], "missing"]),
+        rng.choice([None, None, *TYPES, "nope"]),
+        rng.choice([None, None, "tech", "sports", "unknown_cat"]),
+        rng.choice([None, None, "halftime", "pre_game", "zzz"]),
+    )
+    return x, y, filters
+
+
+# -----------------------------
+#  query_near / query_near_many
+# -----------------------------
+
+def test_query_near_matches_brute_force(case):
+    rng, side, index, brute = case
+    for _ in range(120):
+        x, y, filters = random_query(rng, side, index)
+        # ακέραιες ακτίνες: οθόνες ακριβώς πάνω στο όριο (3-4-5) μετράνε·
+        # σπάνια και ακτίνα πέρα από όλες τις ζώνες (κόβεται στα όριά τους)
+        radius = rng.choice([0, 1, 1.5, 3, 5, 12.5])
+        if rng.random() < 0.05:
+            radius = rng.choice([side, 1e12])
+        got = [s.id for s in index.query_near(x, y, radius, *filters)]
+        assert got == brute.near(x, y, radius, *filters), (x, y, radius, filters)
+
+
+def test_query_near_many_matches_brute_force(case):
+    rng, side, index, brute = case
+    for _ in range(12):
+        _, _, filters = random_query(rng, side, index)
+        radius = rng.choice([0, 2, 5, 12.5, 1e12])
+        count = 3 if radius > side else rng.randint(1, 40)
+        points = [random_query(rng, side, index)[:2] for _ in range(count)]
+        points.append((float("nan"), 1.0))
+        got = index.query_near_many(points, radius, *filters)
+        assert [[s.id for s in found] for found in got] == [
+            brute.near(x, y, radius, *filters) for x, y in points
+        ], (radius, filters)
+
+
+def test_query_near_rejects_bad_input(case):
+    _, _, index, _ = case
+    assert index.query_near(float("nan"), 1, 5) == []
+    assert index.query_near(1, 1, -1) == []
+    assert index.query_near(1, 1, float("nan")) == []
+
+
+# -----------------------------
+#  nearest / nearest_many
+# -----------------------------
+
+def test_nearest_matches_brute_force(case):
+    rng, side, index, brute = case
+    for _ in range(120):
+        x, y, filters = random_query(rng, side, index)
+        k = rng.choice([1, 1, 3, 20])
+        max_distance = rng.choice([0, 2, 5, 8.5, inf])
+        zone_id, screen_type, ad_category, time_window = filters
+        got = [
+            (s.id, d)
+            for s, d in index.nearest(x, y, k, zone_id, screen_type, max_distance, ad_category, time_window)
+        ]
+        assert got == brute.nearest(x, y, k, max_distance, *filters), (x, y, k, max_distance, filters)
+
+
+def test_nearest_many_matches_brute_force(case):
+    rng, side, index, brute = case
+    for _ in range(10):
+        _, _, (zone_id, screen_type, ad_category, time_window) = random_query(rng, side, index)
+        max_distance = rng.choice([3, 10, inf])
+        points = [random_query(rng, side, index)[:2] for _ in range(rng.randint(1, 30))]
+        got = index.nearest_many(points, zone_id, screen_type, max_distance, ad_category, time_window)
+        expected = [
+            brute.nearest(x, y, 1, max_distance, zone_id, screen_type, ad_category, time_window)
+            for x, y in points
+        ]
+        assert [(g[0].id, g[1]) if g else None for g in got] == [e[0] if e else None for e in expected]
+
+
+# -----------------------------
+#  recommend_screen(s) + occupancy
+# -----------------------------
+
+@pytest.fixture
+def occupancy(case, monkeypatch):
+    """Δικό του ScreenOccupancy με φορτίο σε μια "καυτή" γωνία του γηπέδου."""
+    rng, side, index, brute = case
+    occ = ScreenOccupancy(window_seconds=3600, capacity=2, penalty=1.5, policy="penalize")
+    monkeypatch.setattr(layout_service, "screen_occupancy", occ)
+    occ.attach(index)
+
+    screens = brute.screens
+    hot = [s for s in screens if s.row < side / 3 and s.col < side / 3] or screens
+    now = datetime.utcnow()
+    brute.load[:] = 0
+    positions = {screen_id: i for i, screen_id in enumerate(brute.ids)}
+    for _ in range(3 * len(hot) // 2 + 5):
+        s = rng.choice(hot if rng.random() < 0.8 else screens)
+        occ.record(
+            AdPlacement(
+                ad_id=1, screen_id=s.id, zone_id=s.zone_id, x=s.col, y=s.row, assigned_at=now
+            )
+        )
+        brute.load[positions[s.id]] += 1
+    yield occ
+    # ο index είναι κοινός στο module: το φορτίο φεύγει με το expire
+    occ.expire(time.time() + occ.window + 1)
+    brute.load[:] = 0
+
+
+def expected_recommendation(brute, occ, policy, x, y, radius, filters):
+    if policy == "skip":
+        found = brute.nearest(x, y, 1, radius, *filters, skip_below=occ.capacity)
+    elif policy == "penalize":
+        found = brute.nearest(x, y, 1, radius, *filters, weight=occ.penalty / occ.capacity)
+    else:
+        found = brute.nearest(x, y, 1, radius, *filters)
+    return found[0] if found else None
+
+
+@pytest.mark.parametrize("policy", ["off", "skip", "penalize"])
+def test_recommend_screen_matches_brute_force(case, occupancy, policy):
+    rng, side, index, brute = case
+    for _ in range(100):
+        x, y, filters = random_query(rng, side, index)
+        radius = rng.choice([0, 2, 5, 10, side, 1e9])
+        got = index.recommend_screen(x, y, radius, *filters, occupancy=policy)
+        expected = expected_recommendation(brute, occupancy, policy, x, y, radius, filters)
+        assert ((got[0].screen_id, got[1]) if got else None) == expected, (x, y, radius, filters)
+        if got:
+            key = got[0]
+            assert (key.ad_category, key.time_window) == filters[2:]
+
+
+@pytest.mark.parametrize("policy", ["off", "skip", "penalize"])
+def test_recommend_screens_matches_recommend_screen(case, occupancy, policy):
+    rng, side, index, brute = case
+    for _ in range(6):
+        _, _, filters = random_query(rng, side, index)
+        radius = rng.choice([3, 10, 1e9])
+        points = [random_query(rng, side, index)[:2] for _ in range(rng.randint(1, 40))]
+        got = index.recommend_screens(points, radius, *filters, occupancy=policy)
+        assert [(g[0].screen_id, g[1]) if g else None for g in got] == [
+            expected_recommendation(brute, occupancy, policy, x, y, radius, filters) for x, y in points
+        ], (radius, filters)
@@ -0,0 +1,51 @@
+# backend/tests/test_ws_recommendation.py
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.websockets import websockets as ws_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ws_module, "WS_SIGNED_MODE", False)
+    app = FastAPI()
+    app.include_router(ws_module.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"x": "abc", "y": 1},
+        {"x": 1, "y": [2]},
+        {"x": 1, "y": 2, "radius": "far"},
+        {"x": 1, "y": 2, "ad_id": "seven"},
+        {"x": 1, "y": 2, "ad_id": {"id": 7}},
+        {"x": 1, "y": 2, "ad_id": float("inf")},
+    ],
+)
+def test_bad_numbers_get_a_validation_error(client, message):
+    with client.websocket_connect("/ws/recommendation") as ws:
+        ws.send_json(message)
+        assert ws.receive_json() == {"error": "Invalid number"}
+        # το socket μένει ανοιχτό
+        ws.send_json({"y": 1})
+        assert ws.receive_json() == {"error": "Missing x/y"}
+
+
+def test_binary_frames_are_ignored(client):
+    with client.websocket_connect("/ws/recommendation") as ws:
+        ws.send_bytes(b"\x00\x01binary")
+        ws.send_text("not json")
+        assert ws.receive_json() == {"error": "Invalid JSON"}
+
+
+def test_valid_request_still_answers(client):
+    with client.websocket_connect("/ws/recommendation") as ws:
+        ws.send_json({"x": "1.5", "y": 2, "radius": 1000, "occupancy": "off"})
+        reply = ws.receive_json()
+        # default layout: το πλησιέστερο στο (1.5, 2) είναι το tile (1, 2)
+        assert reply["type"] == "screen_recommendation"
+        assert reply["data"]["distance"] == 0.5
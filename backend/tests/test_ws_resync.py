@@ -0,0 +1,167 @@
+# backend/tests/test_ws_resync.py
+
+import asyncio
+import functools
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models.placement_models import AdPlacement
+from app.websockets import websockets as ws_module
+from app.websockets.fanout import ClientChannel, OverflowPolicy
+
+QUEUE_SIZE = 8
+POLICIES = list(OverflowPolicy)
+
+
+class FakeSocket:
+    """Ό,τι χρειάζεται ο ClientChannel από ένα WebSocket: κρατάει τα frames που στάλθηκαν."""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.closed = False
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, frame: str) -> None:
+        self.sent.append(json.loads(frame))
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def unsigned(monkeypatch):
+    monkeypatch.setattr(ws_module, "WS_SIGNED_MODE", False)
+
+
+def placement(n: int) -> AdPlacement:
+    return AdPlacement(
+        ad_id=n,
+        screen_id=f"s-{n % 3}",
+        zone_id="glassfloor-1",
+        x=float(n),
+        y=0.0,
+        assigned_at=datetime.utcnow(),
+    )
+
+
+def manager_with_events(count: int) -> ws_module.WSManager:
+    manager = ws_module.WSManager(event_log_size=1000)
+    for n in range(1, count + 1):
+        manager.broadcast_placement_assigned(placement(n))
+    return manager
+
+
+async def connect(monkeypatch, manager, policy: OverflowPolicy, since: int) -> FakeSocket:
+    monkeypatch.setattr(
+        ws_module,
+        "ClientChannel",
+        functools.partial(ClientChannel, maxsize=QUEUE_SIZE, policy=policy),
+    )
+    ws = FakeSocket()
+    await manager.register_placements(ws, since=since, epoch=manager.epoch)
+    # ο writer αδειάζει την ουρά
+    for _ in range(50):
+        await asyncio.sleep(0)
+    return ws
+
+
+def types(frames):
+    return [frame["type"] for frame in frames]
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_gap_that_fits_replays_deltas(monkeypatch, policy):
+    manager = manager_with_events(10)
+
+    async def scenario():
+        # 7 deltas + resync_complete == QUEUE_SIZE: χωράνε ακριβώς
+        return await connect(monkeypatch, manager, policy, since=3)
+
+    ws = asyncio.run(scenario())
+    assert types(ws.sent) == ["placement_assigned"] * 7 + ["resync_complete"]
+    assert [frame["seq"] for frame in ws.sent] == list(range(4, 11)) + [10]
+    assert not ws.closed
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_gap_larger_than_queue_sends_compacted_snapshot(monkeypatch, policy):
+    manager = manager_with_events(10)
+
+    async def scenario():
+        # 8 deltas + resync_complete > QUEUE_SIZE
+        return await connect(monkeypatch, manager, policy, since=2)
+
+    ws = asyncio.run(scenario())
+    assert not ws.closed
+    assert len(ws.sent) == 1
+    snapshot = ws.sent[0]
+    assert snapshot["type"] == "placements_snapshot"
+    assert snapshot["compacted"] is True
+    assert snapshot["seq"] == 10
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_gap_far_beyond_queue_never_loses_deltas_silently(monkeypatch, policy):
+    manager = manager_with_events(300)
+
+    async def scenario():
+        return await connect(monkeypatch, manager, policy, since=0)
+
+    ws = asyncio.run(scenario())
+    assert not ws.closed
+    # ποτέ resync_complete μετά από ελλιπή deltas: ή όλα, ή snapshot
+    assert types(ws.sent) == ["placements_snapshot"]
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_resync_on_open_socket_counts_queued_frames(policy):
+    manager = manager_with_events(10)
+    ws = FakeSocket()
+
+    async def scenario():
+        channel = ClientChannel(
+            ws,
+            maxsize=QUEUE_SIZE,
+            policy=policy,
+            snapshot=lambda: manager._compacted_snapshot(),
+        )
+        manager.placements_clients[ws] = channel
+        manager._subscriptions.add(ws, ws_module.ALL_PLACEMENTS)
+        # 3 frames ήδη στην ουρά (ο writer δεν έχει ξεκινήσει): χωράνε μόνο 5 ακόμα
+        for _ in range(3):
+            channel.offer('{"type":"noise"}')
+        manager.resync(ws, 5, manager.epoch)   # 5 deltas + resync_complete = 6 > 5
+        queued = [json.loads(frame)["type"] for frame in channel._queue]
+        channel.close()
+        return queued
+
+    queued = asyncio.run(scenario())
+    assert queued == ["noise"] * 3 + ["placements_snapshot"]
+
+
+def test_filtered_subscription_counts_only_matching_deltas(monkeypatch):
+    manager = manager_with_events(30)
+
+    async def scenario():
+        monkeypatch.setattr(
+            ws_module,
+            "ClientChannel",
+            functools.partial(ClientChannel, maxsize=QUEUE_SIZE, policy=OverflowPolicy.DISCONNECT),
+        )
+        ws = FakeSocket()
+        sub = ws_module.PlacementSubscription(screen_ids=frozenset({"s-0"}))
+        await manager.register_placements(ws, since=10, epoch=manager.epoch, subscription=sub)
+        for _ in range(50):
+            await asyncio.sleep(0)
+        return ws
+
+    ws = asyncio.run(scenario())
+    # 20 events μετά το 10, αλλά μόνο 7 στην s-0 (seq 12, 15, ..., 30): 7 + 1 χωράνε στα 8
+    deltas = [frame for frame in ws.sent if frame["type"] == "placement_assigned"]
+    assert all(frame["data"]["screen_id"] == "s-0" for frame in deltas)
+    assert types(ws.sent)[-1] == "resync_complete"
+    assert [frame["seq"] for frame in deltas] == [n for n in range(11, 31) if n % 3 == 0]
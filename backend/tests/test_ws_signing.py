@@ -0,0 +1,165 @@
+# backend/tests/test_ws_signing.py
+
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models.placement_models import AdPlacement
+from app.security.crypto_engine import get_crypto_engine
+from app.security.keyring import NodeKeyring
+from app.security.replay_guard import ReplayGuard
+from app.websockets import signing
+from app.websockets import websockets as ws_module
+from app.websockets.subscriptions import ALL_PLACEMENTS
+
+
+@pytest.fixture
+def keyring(tmp_path, monkeypatch):
+    path = tmp_path / "keys.json"
+    path.write_text(
+        json.dumps(
+            {
+                "backend": {"role": "system", "secret": "backend-secret"},
+                "display-1": {"role": "zone_display", "secret": "display-secret"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    ring = NodeKeyring(path=str(path))
+    ring.reload()
+    guard = ReplayGuard()
+    monkeypatch.setattr(signing, "get_keyring", lambda: ring)
+    monkeypatch.setattr(signing, "get_replay_guard", lambda: guard)
+    return ring
+
+
+@pytest.fixture
+def signed_mode(keyring, monkeypatch):
+    calls = []
+    real_sign = ws_module.sign_frame
+
+    def counting_sign(obj):
+        calls.append(obj.get("type"))
+        return real_sign(obj)
+
+    monkeypatch.setattr(ws_module, "WS_SIGNED_MODE", True)
+    monkeypatch.setattr(ws_module, "sign_frame", counting_sign)
+    return calls
+
+
+def envelope(raw: str) -> dict:
+    return json.loads(raw)
+
+
+# -----------------------------
+#  verify_frame
+# -----------------------------
+
+def test_sign_then_verify_roundtrip(keyring):
+    frame = signing.sign_frame({"v": 1, "type": "ping", "text": "Οθόνη"})
+    payload, error = signing.verify_frame(frame)
+    assert error is None
+    assert payload == {"v": 1, "type": "ping", "text": "Οθόνη"}
+
+
+@pytest.mark.parametrize("bad_hmac", ["é" * 64, "δ", "\u0000" * 64 + "λ", "🔑"])
+def test_non_ascii_hmac_is_rejected_not_raised(keyring, bad_hmac):
+    msg = envelope(signing.sign_frame({"type": "ping"}))
+    msg["hmac"] = bad_hmac
+    assert signing.verify_frame(json.dumps(msg, ensure_ascii=False)) == (None, signing.ERR_SIGNATURE)
+
+
+def test_tampered_payload_is_rejected(keyring):
+    msg = envelope(signing.sign_frame({"type": "ping", "n": 1}))
+    msg["payload"]["n"] = 2
+    assert signing.verify_frame(json.dumps(msg)) == (None, signing.ERR_SIGNATURE)
+
+
+def test_replayed_envelope_is_rejected(keyring):
+    frame = signing.sign_frame({"type": "ping"})
+    assert signing.verify_frame(frame)[1] is None
+    assert signing.verify_frame(frame) == (None, "Rejected (replay)")
+
+
+def test_signer_verify_handles_non_ascii_signatures():
+    signer = get_crypto_engine().signer("k")
+    good = signer.sign(b"m")
+    assert signer.verify(b"m", good)
+    assert not signer.verify(b"m", "é" * len(good))
+    assert signer.verify_many([(b"m", good), (b"m", "ß"), (b"x", good)]) == [True, False, False]
+
+
+# -----------------------------
+#  WSManager: σφράγισμα ανά event / ανά resend
+# -----------------------------
+
+class FakeChannel:
+    def __init__(self, ws) -> None:
+        self.ws = ws
+        self.maxsize = 1000
+        self.frames = []
+
+    def offer(self, frame: str) -> None:
+        self.frames.append(frame)
+
+    @property
+    def room(self) -> int:
+        return self.maxsize - len(self.frames)
+
+
+def make_manager(n_clients: int):
+    manager = ws_module.WSManager(event_log_size=100)
+    channels = []
+    for i in range(n_clients):
+        ws = f"ws-{i}"
+        channel = FakeChannel(ws)
+        manager.placements_clients[ws] = channel
+        manager._subscriptions.add(ws, ALL_PLACEMENTS)
+        channels.append(channel)
+    return manager, channels
+
+
+def placement(n: int) -> AdPlacement:
+    return AdPlacement(
+        ad_id=n, screen_id=f"s-{n}", zone_id="glassfloor-1", x=1.0, y=2.0, assigned_at=datetime.utcnow()
+    )
+
+
+def test_live_broadcast_signs_once_per_event(signed_mode):
+    manager, channels = make_manager(5)
+    manager.broadcast_placement_assigned(placement(1))
+    manager.broadcast_placement_assigned(placement(2))
+
+    assert signed_mode == ["placement_assigned", "placement_assigned"]
+    for channel in channels:
+        assert channel.frames == channels[0].frames
+    # κάθε client έχει δικό του ReplayGuard: αρκεί ένα έγκυρο, μοναδικό envelope ανά event
+    for frame in channels[0].frames:
+        assert signing.verify_frame(frame)[1] is None
+
+
+def test_resync_reseals_logged_events(signed_mode):
+    manager, channels = make_manager(2)
+    manager.broadcast_placement_assigned(placement(1))
+    live = channels[0].frames[0]
+    del signed_mode[:]
+
+    manager.resync("ws-0", 0, manager.epoch)
+    replayed, complete = channels[0].frames[1:]
+    assert signed_mode == ["placement_assigned", "resync_complete"]
+    # ίδιο payload, νέο envelope (νέο nonce): περνάει το ReplayGuard του client
+    assert envelope(replayed)["payload"] == envelope(live)["payload"]
+    assert envelope(replayed)["header"]["nonce"] != envelope(live)["header"]["nonce"]
+    assert signing.verify_frame(live)[1] is None
+    assert signing.verify_frame(replayed)[1] is None
+    assert envelope(complete)["payload"]["type"] == "resync_complete"
+
+
+def test_unsigned_broadcast_shares_one_frame(monkeypatch):
+    monkeypatch.setattr(ws_module, "WS_SIGNED_MODE", False)
+    manager, channels = make_manager(3)
+    manager.broadcast_placement_assigned(placement(1))
+    frames = [channel.frames[0] for channel in channels]
+    assert frames[0] is frames[1] is frames[2]
+    assert json.loads(frames[0])["type"] == "placement_assigned"